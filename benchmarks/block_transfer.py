@@ -0,0 +1,136 @@
+"""
+Compare transferring the basic blocks of the taint analyzer by matching
+the type of every opcode on every visit, as the analyzer did, with
+running the blocks compiled once into the transfer functions of their
+opcodes.
+
+The blocks are the ones of the methods of sqli_programs.py, each
+transferred from its input state at the fixed point, so both ways do the
+same work on the states.
+
+    python benchmarks/block_transfer.py [--methods N] [--size N] [--repeat N]
+
+"""
+
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+from jpamb import jvm
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "solutions"))
+import bytecode_taint_analyzer as analyzer
+from sqli_programs import programs
+
+log = analyzer.log
+
+
+def match_block(instructions, state):
+    """The transfer of a block by a match on each opcode."""
+    current_state = state.copy()
+    for opcode in instructions:
+        log.debug(f"  [{opcode.offset:3d}] {opcode}")
+        try:
+            match opcode:
+                case jvm.Push():
+                    current_state = analyzer.transfer_push(opcode, current_state)
+                case jvm.Load():
+                    current_state = analyzer.transfer_load(opcode, current_state)
+                case jvm.Store():
+                    current_state = analyzer.transfer_store(opcode, current_state)
+                case jvm.New():
+                    current_state = analyzer.transfer_new(opcode, current_state)
+                case jvm.Dup():
+                    current_state = analyzer.transfer_dup(opcode, current_state)
+                case jvm.Pop():
+                    current_state = analyzer.transfer_pop(opcode, current_state)
+                case jvm.ArrayLoad():
+                    current_state = analyzer.transfer_array_load(opcode, current_state)
+                case jvm.ArrayStore():
+                    current_state = analyzer.transfer_array_store(opcode, current_state)
+                case jvm.ArrayLength():
+                    current_state = analyzer.transfer_array_length(
+                        opcode, current_state
+                    )
+                case jvm.InvokeVirtual():
+                    current_state = analyzer.transfer_invoke_virtual(
+                        opcode, current_state
+                    )
+                case jvm.InvokeStatic():
+                    current_state = analyzer.transfer_invoke_static(
+                        opcode, current_state
+                    )
+                case jvm.InvokeSpecial():
+                    current_state = analyzer.transfer_invoke_special(
+                        opcode, current_state
+                    )
+                case jvm.InvokeDynamic():
+                    current_state = analyzer.transfer_invoke_dynamic(
+                        opcode, current_state
+                    )
+                case jvm.InvokeInterface():
+                    current_state = analyzer.transfer_invoke_interface(
+                        opcode, current_state
+                    )
+                case jvm.Return() | jvm.Goto():
+                    pass
+                case jvm.If() | jvm.Ifz():
+                    current_state = analyzer.transfer_if(opcode, current_state)
+                case _:
+                    current_state = analyzer.transfer_unknown(opcode, current_state)
+        except Exception as e:
+            log.error(f"Error processing opcode {opcode}: {e}")
+    return current_state
+
+
+def timed(f, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--methods", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    blocks = []
+    for methodid, opcodes in programs(args.methods, size=args.size):
+        initial = analyzer.AbstractState.initial(methodid)
+        graph, IN, _, _ = analyzer.solve(methodid, tuple(opcodes), initial)
+        blocks.extend(
+            (graph.instructions(b), IN[b])
+            for b in range(len(graph))
+            if IN[b] is not None
+        )
+    opcodes = sum(len(instructions) for instructions, _ in blocks)
+    print(f"{len(blocks):,} blocks of {args.methods:,} methods, {opcodes:,} opcodes")
+
+    matched, match_s = timed(
+        lambda: [match_block(i, s) for i, s in blocks], args.repeat
+    )
+    compiled, compile_s = timed(
+        lambda: [analyzer.compile_block(i) for i, _ in blocks], args.repeat
+    )
+    steps = [(c, s) for c, (_, s) in zip(compiled, blocks)]
+    ran, run_s = timed(
+        lambda: [analyzer.run_steps(c, s) for c, s in steps], args.repeat
+    )
+    assert matched == ran
+
+    print(f"{'':>10} {'ms':>9} {'blocks/s':>11}")
+    print(f"{'match':>10} {match_s * 1000:9.1f} {len(blocks) / match_s:11,.0f}")
+    print(f"{'compile':>10} {compile_s * 1000:9.1f}")
+    print(f"{'compiled':>10} {run_s * 1000:9.1f} {len(blocks) / run_s:11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Time the Datalog engine of the taint analyzer on the decompiled suite,
+and compare its one fixpoint over the facts of all methods with a
+worklist run per method on the methods of sqli_programs.py.
+
+Extracting the facts is the expensive part, the suite caches them per
+class in target/cache/facts, so the second load of the suite only reads
+the cache and solves.
+
+    python benchmarks/datalog_engine.py [--methods N]
+
+"""
+
+from pathlib import Path
+import argparse
+import logging
+import shutil
+import sys
+import time
+
+from jpamb import model
+from jpamb.taint import facts
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "solutions"))
+import bytecode_taint_analyzer as analyzer
+from sqli_programs import programs
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--methods", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    suite = model.Suite()
+    shutil.rmtree(suite.cache_folder / "facts", ignore_errors=True)
+    print("the decompiled suite")
+    for run in ("cold", "cached"):
+        program, ms = timed(lambda: facts.load(suite))
+        print(
+            f"  {run:6}: {len(program.methods)} methods, "
+            f"{sum(map(program.vulnerable, program.methods))} vulnerable, {ms:6.1f} ms"
+        )
+
+    methods = list(programs(args.methods))
+    print(f"\n{len(methods)} methods from sqli_programs.py")
+    found, worklist_ms = timed(
+        lambda: sum(analyzer.analyze_method(m, ops) for m, ops in methods)
+    )
+    print(f"  worklist: {found:5} vulnerable, {worklist_ms:8.1f} ms")
+
+    extracted, extract_ms = timed(
+        lambda: [(m, facts.extract(m, ops, static=True)) for m, ops in methods]
+    )
+    program = facts.TaintProgram()
+    for m, method_facts in extracted:
+        program.add(m, method_facts)
+    stats, solve_ms = timed(program.solve)
+    found = sum(program.vulnerable(m) for m, _ in methods)
+    print(
+        f"  datalog:  {found:5} vulnerable, {extract_ms:8.1f} ms extracting facts, "
+        f"{solve_ms:8.1f} ms solving"
+    )
+    print(
+        f"            {stats.added:,} facts, {stats.derived:,} derived in {stats.rounds} rounds"
+    )
+
+
+if __name__ == "__main__":
+    main()
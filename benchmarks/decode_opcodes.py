@@ -0,0 +1,65 @@
+"""
+Measure how fast the opcodes of the whole suite are decoded by
+`jvm.Opcode.from_json`, with and without field validation.
+
+    python benchmarks/decode_opcodes.py [--repeat N]
+
+"""
+
+from pathlib import Path
+import argparse
+import json
+import time
+
+from jpamb import jvm
+from jpamb.model import Suite
+
+
+def suite_bytecode(suite: Suite) -> list[list[dict]]:
+    """The bytecode of every decodable method in the decompiled files."""
+    methods = []
+    for file in sorted(suite.decompiledfiles()):
+        with open(file) as fp:
+            doc = json.load(fp)
+        for method in doc["methods"]:
+            if method["code"] is None:
+                continue
+            bytecode = method["code"]["bytecode"]
+            try:
+                for op in bytecode:
+                    jvm.Opcode.from_json(op)
+            except (NotImplementedError, KeyError):
+                continue
+            methods.append(bytecode)
+    return methods
+
+
+def decode_rate(methods: list[list[dict]], repeat: int) -> float:
+    """The number of opcodes decoded per second, best of repeat runs."""
+    count = sum(len(m) for m in methods)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for bytecode in methods:
+            for op in bytecode:
+                jvm.Opcode.from_json(op)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    methods = suite_bytecode(Suite(Path.cwd()))
+    print(f"{len(methods)} methods, {sum(len(m) for m in methods)} opcodes")
+    for strict in (True, False):
+        jvm.Opcode.strict = strict
+        rate = decode_rate(methods, args.repeat)
+        print(f"{'strict' if strict else 'fast':>6}: {rate:12,.0f} opcodes/s")
+    jvm.Opcode.strict = True
+
+
+if __name__ == "__main__":
+    main()
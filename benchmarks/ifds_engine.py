@@ -0,0 +1,115 @@
+"""
+Compare the IFDS engine of the taint analyzer with its intraprocedural
+worklist on generated methods: chains of helpers where each helper calls
+the next one `fanout` times, so there are fanout ** depth call chains
+from the entry to the last helper, and on the single methods of
+sqli_programs.py.
+
+The last helper either returns its argument or a constant. The worklist
+does not look into the helpers and reports both as vulnerable, the IFDS
+engine analyzes each helper once per tainted parameter.
+
+    python benchmarks/ifds_engine.py [--fanout N] [--methods N]
+
+"""
+
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+from jpamb import ifds, jvm
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "solutions"))
+import bytecode_taint_analyzer as analyzer
+from sqli_programs import DYNAMIC, OBJECT, SINK, programs
+
+M = jvm.AbsMethodID.decode
+ENTRY = M("jpamb.Chain.run:(A)V")
+
+
+def helper(k: int) -> jvm.AbsMethodID:
+    return M(f"jpamb.Chain.helper{k}:(A)A")
+
+
+def chain(depth: int, fanout: int, sanitize: bool) -> dict[jvm.AbsMethodID, tuple]:
+    """The opcodes of the entry and of the helpers of a chain."""
+    methods = {}
+    for k in range(depth):
+        ops = [jvm.Load(0, jvm.Reference(), 0), jvm.InvokeStatic(1, helper(k + 1))]
+        for _ in range(fanout - 1):
+            ops.append(jvm.Load(len(ops), jvm.Reference(), 0))
+            ops.append(jvm.InvokeStatic(len(ops), helper(k + 1)))
+            ops.append(jvm.InvokeDynamic(len(ops), DYNAMIC, 0))
+        ops.append(jvm.Return(len(ops), jvm.Reference()))
+        methods[helper(k)] = tuple(ops)
+    if sanitize:
+        last = (jvm.Push(0, jvm.Value.int(0)), jvm.Return(1, jvm.Reference()))
+    else:
+        last = (jvm.Load(0, jvm.Reference(), 0), jvm.Return(1, jvm.Reference()))
+    methods[helper(depth)] = last
+    methods[ENTRY] = (
+        jvm.New(0, OBJECT),
+        jvm.Load(1, jvm.Reference(), 0),
+        jvm.InvokeStatic(2, helper(0)),
+        jvm.InvokeInterface(3, SINK, 2),
+        jvm.Pop(4, 1),
+        jvm.Return(5, None),
+    )
+    return methods
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--methods", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"helper chains with fanout {args.fanout}")
+    print(
+        f"{'depth':>5} {'chains':>8} {'last':>9} {'worklist':>15} {'ifds':>15} "
+        f"{'entries':>7} {'path edges':>10}"
+    )
+    for depth in (1, 2, 4, 8, 16):
+        for sanitize in (False, True):
+            methods = chain(depth, args.fanout, sanitize)
+            found, worklist_ms = timed(
+                lambda methods=methods: analyzer.analyze_method(ENTRY, methods[ENTRY])
+            )
+            stats = ifds.SolverStats()
+            found_ifds, ifds_ms = timed(
+                lambda methods=methods, stats=stats: analyzer.analyze_method_ifds(
+                    ENTRY, opcodes_of=methods.get, stats=stats
+                )
+            )
+            print(
+                f"{depth:5} {args.fanout**depth:8,} {'constant' if sanitize else 'argument':>9} "
+                f"{found!s:>5} {worklist_ms:6.1f} ms {found_ifds!s:>5} {ifds_ms:6.1f} ms "
+                f"{stats.entries:7} {stats.path_edges:10,}"
+            )
+
+    methods = list(programs(args.methods))
+    print(f"\n{len(methods)} single methods from sqli_programs.py")
+    found, worklist_ms = timed(
+        lambda: sum(analyzer.analyze_method(m, ops) for m, ops in methods)
+    )
+    print(f"  worklist: {found:5} vulnerable, {worklist_ms:8.1f} ms")
+    found, ifds_ms = timed(
+        lambda: sum(
+            analyzer.analyze_method_ifds(m, ops, opcodes_of=lambda _: None)
+            for m, ops in methods
+        )
+    )
+    print(f"  ifds:     {found:5} vulnerable, {ifds_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Report the memory used by a fully decoded suite: the opcodes of every
+decodable method, and the cases.
+
+    python benchmarks/memory_report.py [--copies N]
+
+The suite is decoded `--copies` times, to get stable numbers for a suite
+the size of the ones kept in long-lived workers.
+
+"""
+
+from pathlib import Path
+import argparse
+import json
+import tracemalloc
+
+from jpamb import jvm
+from jpamb.model import Cases, Suite
+
+
+def bytecode(suite: Suite) -> list[list[dict]]:
+    methods = []
+    for file in sorted(suite.decompiledfiles()):
+        with open(file) as fp:
+            doc = json.load(fp)
+        for method in doc["methods"]:
+            if method["code"] is not None:
+                methods.append(method["code"]["bytecode"])
+    return methods
+
+
+def decode(methods: list[list[dict]]) -> list[tuple[jvm.Opcode, ...]]:
+    decoded = []
+    for ops in methods:
+        try:
+            decoded.append(tuple(jvm.Opcode.from_json(op) for op in ops))
+        except (NotImplementedError, KeyError):
+            continue
+    return decoded
+
+
+def measure(build) -> tuple[object, int]:
+    """The result of build, and the number of bytes it allocated."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=100)
+    args = parser.parse_args()
+
+    suite = Suite(Path.cwd())
+    methods = bytecode(suite)
+    with open(suite.case_file) as fp:
+        lines = fp.read().splitlines()
+
+    opcodes, nbytes = measure(lambda: [decode(methods) for _ in range(args.copies)])
+    count = sum(len(ops) for copy in opcodes for ops in copy)
+    print(
+        f"opcodes: {count:9,} {nbytes / 2**20:8.2f} MiB {nbytes / count:6.1f} B/opcode"
+    )
+
+    cases, nbytes = measure(lambda: Cases.decode(lines * args.copies))
+    print(
+        f"  cases: {len(cases):9,} {nbytes / 2**20:8.2f} MiB {nbytes / len(cases):6.1f} B/case"
+    )
+
+
+if __name__ == "__main__":
+    main()
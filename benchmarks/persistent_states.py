@@ -0,0 +1,191 @@
+"""
+Measure copying and joining abstract states with large heaps, on methods
+with many branches which allocate objects, and compare the persistent maps
+of jpamb.persistent with copying dicts. Then measure the heap size and time
+of methods allocating objects in nested loops, which should not depend on
+how often the loops are visited.
+
+    python benchmarks/persistent_states.py [--branches N] [--objects N] [--repeat N]
+
+"""
+
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+from jpamb import jvm
+from jpamb.persistent import PMap
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "solutions"))
+import bytecode_taint_analyzer as analyzer
+
+OBJECT = jvm.ClassName.decode("java.lang.Object")
+
+
+def best_of(repeat: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def branches(n: int, objects: int) -> tuple[jvm.Opcode, ...]:
+    """A method with n if-else statements in a row, where each branch
+    allocates objects."""
+    ops: list[jvm.Opcode] = []
+
+    def emit(cls, *args):
+        ops.append(cls(len(ops), *args))
+        return len(ops) - 1
+
+    def allocate():
+        for _ in range(objects):
+            emit(jvm.New, OBJECT)
+            emit(jvm.Pop, 1)
+
+    for _ in range(n):
+        emit(jvm.Load, jvm.Int(), 0)
+        branch = emit(jvm.Ifz, "eq", -1)
+        allocate()
+        goto = emit(jvm.Goto, -1)
+        ops[branch] = jvm.Ifz(branch, "eq", len(ops))
+        allocate()
+        ops[goto] = jvm.Goto(goto, len(ops))
+    emit(jvm.Return, None)
+    return tuple(ops)
+
+
+def loops(depth: int, objects: int) -> tuple[jvm.Opcode, ...]:
+    """A method with depth nested loops, allocating objects in each."""
+    ops: list[jvm.Opcode] = []
+
+    def emit(cls, *args):
+        ops.append(cls(len(ops), *args))
+        return len(ops) - 1
+
+    def loop(level):
+        head = len(ops)
+        emit(jvm.Load, jvm.Int(), 0)
+        branch = emit(jvm.Ifz, "eq", -1)
+        for _ in range(objects):
+            emit(jvm.New, OBJECT)
+            emit(jvm.Pop, 1)
+        if level > 1:
+            loop(level - 1)
+        emit(jvm.Goto, head)
+        ops[branch] = jvm.Ifz(branch, "eq", len(ops))
+
+    loop(depth)
+    emit(jvm.Return, None)
+    return tuple(ops)
+
+
+def shifting_loop(locals: int, objects: int) -> tuple[jvm.Opcode, ...]:
+    """A loop allocating objects and moving taint from local 0 to the next
+    local on each iteration, so it is visited once per local."""
+    ops: list[jvm.Opcode] = []
+
+    def emit(cls, *args):
+        ops.append(cls(len(ops), *args))
+        return len(ops) - 1
+
+    for i in range(1, locals + 1):
+        emit(jvm.Push, jvm.Value.int(0))
+        emit(jvm.Store, jvm.Reference(), i)
+    head = emit(jvm.Load, jvm.Int(), 0)
+    branch = emit(jvm.Ifz, "eq", -1)
+    for _ in range(objects):
+        emit(jvm.New, OBJECT)
+        emit(jvm.Pop, 1)
+    for i in range(locals, 0, -1):
+        emit(jvm.Load, jvm.Reference(), i - 1)
+        emit(jvm.Store, jvm.Reference(), i)
+    emit(jvm.Goto, head)
+    ops[branch] = jvm.Ifz(branch, "eq", len(ops))
+    emit(jvm.Return, None)
+    return tuple(ops)
+
+
+def copy_and_join(heap, update, merge, branches: int):
+    """Branch from a heap, change one entry in each branch and join."""
+    for i in range(branches):
+        left = update(heap, i, "left")
+        right = update(heap, -i - 1, "right")
+        heap = merge(left, right)
+    return heap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--branches", type=int, default=200)
+    parser.add_argument("--objects", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print("copy, update and join a heap of N objects, per branch")
+    for size in (10, 100, 1000, 10000):
+        heap = {i: object() for i in range(size)}
+        pheap = PMap(heap)
+        timings = {
+            "dict": best_of(
+                args.repeat,
+                lambda heap=heap: copy_and_join(
+                    heap,
+                    lambda h, k, v: {**h, k: v},
+                    lambda a, b: {**a, **b},
+                    args.branches,
+                ),
+            ),
+            "PMap": best_of(
+                args.repeat,
+                lambda pheap=pheap: copy_and_join(
+                    pheap, lambda h, k, v: h.set(k, v), PMap.merge, args.branches
+                ),
+            ),
+        }
+        print(
+            f"{size:>9,}: "
+            + "  ".join(
+                f"{name} {t / args.branches * 1e6:8.1f} us"
+                for name, t in timings.items()
+            )
+        )
+
+    methodid = jvm.AbsMethodID.decode("jpamb.Generated.branches:(I)V")
+    opcodes = branches(args.branches, args.objects)
+    stats = analyzer.WorklistStats()
+    elapsed = best_of(
+        args.repeat, lambda: analyzer.analyze_method(methodid, opcodes, stats)
+    )
+    print(
+        f"analyze {args.branches} branches allocating {args.objects} objects "
+        f"({len(opcodes)} opcodes, {stats.blocks} blocks): {elapsed * 1000:.1f} ms, "
+        f"heap {stats.heap}"
+    )
+
+    print(f"analyze loops allocating {args.objects} objects")
+    methodid = jvm.AbsMethodID.decode("jpamb.Generated.loops:(A)V")
+    for name, opcodes in [
+        *((f"nested {depth}", loops(depth, args.objects)) for depth in (1, 2, 4, 8)),
+        *((f"shifting {n}", shifting_loop(n, args.objects)) for n in (4, 16, 64)),
+    ]:
+        stats = analyzer.WorklistStats()
+        elapsed = best_of(
+            args.repeat,
+            lambda opcodes=opcodes, stats=stats: analyzer.analyze_method(
+                methodid, opcodes, stats
+            ),
+        )
+        print(
+            f"{name:>12}: {stats.iterations:4} visits, heap {stats.heap:4}, "
+            f"{elapsed / stats.iterations * 1e6:6.1f} us/visit"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Compare matching method names against large rule sets with a substring
+scan over every rule, as the analyzer did, and with the Aho-Corasick
+automaton of jpamb.taint.rules, uncached and cached by method.
+
+The rules are generated method, class and package patterns in the shape
+of the default sources and sinks, written to a rule file and loaded back.
+The methods are the ones called by the methods of sqli_programs.py, plus
+generated methods of which some match the rules.
+
+    python benchmarks/rule_index.py [--rules N ...] [--methods N]
+
+"""
+
+from pathlib import Path
+import argparse
+import random
+import tempfile
+import time
+
+from jpamb import jvm
+from jpamb.taint.rules import RuleIndex
+
+from sqli_programs import programs
+
+WORDS = [
+    "get",
+    "set",
+    "execute",
+    "query",
+    "read",
+    "write",
+    "parse",
+    "load",
+    "open",
+    "find",
+]
+
+
+def name(rng: random.Random) -> str:
+    """A random method name, java.util.Foo3.getBar:(A)A style."""
+    package = ".".join(
+        rng.choice(["org", "com", "net", "java"]) + f"{rng.randrange(50)}"
+        for _ in range(rng.randint(1, 3))
+    )
+    cls = rng.choice(WORDS).title() + f"{rng.randrange(1000)}"
+    method = rng.choice(WORDS) + rng.choice(WORDS).title()
+    return f"{package}.{cls}.{method}"
+
+
+def rules(n: int, rng: random.Random) -> list[tuple[str, str]]:
+    result = []
+    for _ in range(n):
+        pattern = name(rng)
+        match rng.randrange(10):
+            case 0:  # a package
+                pattern = pattern.rsplit(".", 2)[0] + ".*"
+            case 1 | 2:  # a class
+                pattern = pattern.rsplit(".", 1)[0] + "."
+        result.append((rng.choice(["source", "sink", "preserving"]), pattern))
+    return result
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--methods", type=int, default=5000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    called = {
+        op.method
+        for _, ops in programs(500)
+        for op in ops
+        if isinstance(
+            op,
+            (
+                jvm.InvokeVirtual,
+                jvm.InvokeStatic,
+                jvm.InvokeSpecial,
+                jvm.InvokeInterface,
+            ),
+        )
+    }
+    print(f"{len(called)} methods called by sqli_programs.py, {args.methods} generated")
+    print(
+        f"{'rules':>7} {'load':>9} {'compile':>9} {'scan':>10} {'automaton':>10} "
+        f"{'cached':>9} {'matches':>7}"
+    )
+    for n in args.rules:
+        generated = rules(n, rng)
+        methods = list(called) + [
+            # Half of them extend a rule pattern, the other half are random
+            rng.choice(generated)[1].rstrip("*.") + ".getX" if k % 2 else name(rng)
+            for k in range(args.methods)
+        ]
+        names = [str(m).replace("/", ".") for m in methods]
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / "generated.rules"
+            path.write_text(
+                "".join(f"{kind} {pattern}\n" for kind, pattern in generated)
+            )
+            index = RuleIndex()
+            _, load_ms = timed(lambda index=index, path=path: index.load(path))
+        _, compile_ms = timed(lambda index=index: index.match(""))
+
+        patterns = [(p.removesuffix("*"), kind) for kind, p in generated]
+        scan, scan_ms = timed(
+            lambda patterns=patterns, names=names: [
+                {kind for p, kind in patterns if p in s} for s in names
+            ]
+        )
+        masks, automaton_ms = timed(
+            lambda index=index, names=names: [index.match(s) for s in names]
+        )
+        for m in methods:
+            index.classify(m)
+        _, cached_ms = timed(
+            lambda index=index, methods=methods: [index.classify(m) for m in methods]
+        )
+
+        bits = index.kinds
+        assert all(
+            mask == sum(bits[kind] for kind in kinds)
+            for mask, kinds in zip(masks, scan)
+        )
+        print(
+            f"{n:7,} {load_ms:6.1f} ms {compile_ms:6.1f} ms {scan_ms:7.1f} ms "
+            f"{automaton_ms:7.1f} ms {cached_ms:6.1f} ms {sum(map(bool, masks)):7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
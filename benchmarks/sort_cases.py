@@ -0,0 +1,47 @@
+"""
+Measure sorting and grouping a large list of cases, which compares method
+ids, parameter types and input values.
+
+    python benchmarks/sort_cases.py [--copies N] [--repeat N]
+
+"""
+
+from pathlib import Path
+import argparse
+import random
+import time
+
+from jpamb.model import Case, Suite
+
+
+def best_of(repeat: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = list(Suite(Path.cwd()).cases) * args.copies
+    random.Random(0).shuffle(cases)
+    print(f"{len(cases):,} cases")
+
+    timings = {
+        "sort": lambda: sorted(cases),
+        "group": lambda: Case.by_methodid(cases),
+        "sort inputs": lambda: sorted(c.input for c in cases),
+        "sort params": lambda: sorted(c.methodid.extension.params for c in cases),
+    }
+    for name, run in timings.items():
+        print(f"{name:>12}: {best_of(args.repeat, run) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Random methods in the shape javac gives SQL injection cases: strings from
+parameters and sources are concatenated, trimmed, appended to
+StringBuilders and passed to java.sql.Statement.executeQuery, under nested
+ifs and loops. They are used by the benchmarks of the taint analyzer, as
+the suite only has a few of those cases decompiled.
+
+    from sqli_programs import programs
+
+    for methodid, opcodes in programs(1000):
+        ...
+
+"""
+
+from typing import Iterator
+import random
+
+from jpamb import jvm
+
+M = jvm.AbsMethodID.decode
+SINK = M("java.sql.Statement.executeQuery:(A)A")
+SOURCE = M("java.lang.System.getenv:(A)A")
+TRIM = M("java.lang.String.trim:()A")
+CONCAT = M("java.lang.String.concat:(A)A")
+APPEND = M("java.lang.StringBuilder.append:(A)A")
+TOSTRING = M("java.lang.StringBuilder.toString:()A")
+INIT = M("java.lang.StringBuilder.<init>:()V")
+UNKNOWN = M("jpamb.Helper.escape:(A)A")
+DYNAMIC = M("java.lang.invoke.StringConcatFactory.makeConcatWithConstants:(AA)A")
+STRING_BUILDER = jvm.ClassName.decode("java.lang.StringBuilder")
+OBJECT = jvm.ClassName.decode("java.lang.Object")
+
+
+class Generator:
+    """Emits the opcodes of one random method, with branch targets as
+    instruction indices."""
+
+    def __init__(self, seed: int, params: int = 2, locals: int = 6, size: int = 30):
+        self.random = random.Random(seed)
+        self.opcodes: list[jvm.Opcode] = []
+        self.params = params
+        self.locals = locals
+        self.size = size
+        self.builders: list[int] = []
+
+    def emit(self, cls, *args) -> int:
+        self.opcodes.append(cls(len(self.opcodes), *args))
+        return len(self.opcodes) - 1
+
+    def patch(self, i: int, cls, *args):
+        self.opcodes[i] = cls(i, *args)
+
+    def local(self) -> int:
+        return self.random.randrange(self.params, self.locals)
+
+    def expression(self, depth: int = 0):
+        """Push a string."""
+        r = self.random
+        match r.randrange(9 if depth < 2 else 3):
+            case 0:
+                self.emit(jvm.Load, jvm.Reference(), r.randrange(self.locals))
+            case 1:
+                self.emit(jvm.Push, jvm.Value.int(r.randrange(5)))
+            case 2 if self.builders:
+                self.emit(jvm.Load, jvm.Reference(), r.choice(self.builders))
+                self.emit(jvm.InvokeVirtual, TOSTRING)
+            case 2:
+                self.emit(jvm.Load, jvm.Reference(), r.randrange(self.params))
+            case 3:
+                self.expression(depth + 1)
+                self.emit(jvm.InvokeStatic, SOURCE)
+            case 4:
+                self.expression(depth + 1)
+                self.emit(jvm.InvokeVirtual, TRIM)
+            case 5:
+                self.expression(depth + 1)
+                self.expression(depth + 1)
+                self.emit(jvm.InvokeVirtual, CONCAT)
+            case 6:
+                self.expression(depth + 1)
+                self.expression(depth + 1)
+                self.emit(jvm.InvokeDynamic, DYNAMIC, 0)
+            case 7:
+                self.expression(depth + 1)
+                self.emit(jvm.InvokeStatic, UNKNOWN)
+            case _:
+                self.new_builder()
+                for _ in range(r.randrange(1, 3)):
+                    self.expression(depth + 1)
+                    self.emit(jvm.InvokeVirtual, APPEND)
+                self.emit(jvm.InvokeVirtual, TOSTRING)
+
+    def new_builder(self):
+        self.emit(jvm.New, STRING_BUILDER)
+        self.emit(jvm.Dup, 1)
+        self.emit(jvm.InvokeSpecial, INIT, False)
+
+    def statement(self, depth: int = 0):
+        r = self.random
+        match r.randrange(7 if depth < 3 else 4):
+            case 0:
+                self.expression()
+                self.emit(jvm.Store, jvm.Reference(), self.local())
+            case 1:
+                self.emit(jvm.New, OBJECT)
+                self.expression()
+                self.emit(jvm.InvokeInterface, SINK, 2)
+                self.emit(jvm.Pop, 1)
+            case 2:
+                local = self.local()
+                self.new_builder()
+                self.emit(jvm.Store, jvm.Reference(), local)
+                self.builders.append(local)
+            case 3 if self.builders:
+                self.emit(jvm.Load, jvm.Reference(), r.choice(self.builders))
+                self.expression()
+                self.emit(jvm.InvokeVirtual, APPEND)
+                self.emit(jvm.Pop, 1)
+            case 4:  # if, with an else half of the time
+                self.emit(jvm.Push, jvm.Value.int(0))
+                branch = self.emit(jvm.Ifz, "eq", -1)
+                self.block(depth + 1)
+                if r.random() < 0.5:
+                    goto = self.emit(jvm.Goto, -1)
+                    self.patch(branch, jvm.Ifz, "eq", len(self.opcodes))
+                    self.block(depth + 1)
+                    self.patch(goto, jvm.Goto, len(self.opcodes))
+                else:
+                    self.patch(branch, jvm.Ifz, "eq", len(self.opcodes))
+            case 5:  # while
+                head = len(self.opcodes)
+                self.emit(jvm.Push, jvm.Value.int(0))
+                branch = self.emit(jvm.Ifz, "eq", -1)
+                self.block(depth + 1)
+                self.emit(jvm.Goto, head)
+                self.patch(branch, jvm.Ifz, "eq", len(self.opcodes))
+            case _:
+                self.expression()
+                self.emit(jvm.Pop, 1)
+
+    def block(self, depth: int):
+        for _ in range(self.random.randrange(1, 4)):
+            self.statement(depth)
+
+    def method(self) -> tuple[jvm.Opcode, ...]:
+        while len(self.opcodes) < self.size:
+            self.statement()
+        self.emit(jvm.Return, None)
+        return tuple(self.opcodes)
+
+
+def programs(
+    n: int, seed: int = 0, size: int = 60
+) -> Iterator[tuple[jvm.AbsMethodID, tuple[jvm.Opcode, ...]]]:
+    """n random methods, with 1 to 3 string parameters and 10 to 10 + size
+    opcodes."""
+    for i in range(n):
+        params = 1 + i % 3
+        methodid = M("jpamb.Generated.run" + str(i) + ":(" + "A" * params + ")V")
+        generator = Generator(seed * 100003 + i, params=params, size=10 + i % size)
+        yield methodid, generator.method()
@@ -0,0 +1,70 @@
+"""
+Measure the taint analyzer on generated SQL injection methods (see
+sqli_programs.py), reporting methods and block visits per second, and
+the visits answered by the transfer cache of the blocks, which is off
+with --cache-size 0.
+
+    python benchmarks/taint_analyzer.py [--methods N] [--size N] [--repeat N]
+                                        [--cache-size N] [--summaries]
+
+With --summaries the methods are summarized as well, which analyzes each
+one once more per argument with the same cache.
+
+"""
+
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "solutions"))
+import bytecode_taint_analyzer as analyzer
+from sqli_programs import programs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--methods", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cache-size", type=int, default=analyzer.TRANSFER_CACHE_SIZE)
+    parser.add_argument("--summaries", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    analyzer.TRANSFER_CACHE_SIZE = args.cache_size
+
+    methods = list(programs(args.methods, size=args.size))
+    best, visits, skipped, hits, found = float("inf"), 0, 0, 0, 0
+    for _ in range(args.repeat):
+        visits = skipped = hits = found = 0
+        start = time.perf_counter()
+        for methodid, opcodes in methods:
+            stats = analyzer.WorklistStats()
+            found += analyzer.analyze_method(methodid, opcodes, stats)
+            visits += stats.iterations
+            skipped += stats.skipped
+            hits += stats.hits
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{len(methods):,} methods, {found:,} vulnerable")
+    print(
+        f"{visits:,} block visits, {skipped:,} with an unchanged input, {hits:,} cached"
+    )
+    print(f"{best * 1000:9.1f} ms")
+    print(f"{len(methods) / best:9,.0f} methods/s")
+    print(f"{visits / best:9,.0f} blocks/s")
+
+    if args.summaries:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for methodid, opcodes in methods:
+                analyzer.summarize_method(methodid, tuple(opcodes), static=True)
+            best = min(best, time.perf_counter() - start)
+        print(f"summaries {best * 1000:9.1f} ms")
+        print(f"{len(methods) / best:9,.0f} methods/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Count the block visits of the taint analyzer's worklist on the methods of
+jpamb.cases.Loops and on generated methods with nested loops, visiting the
+blocks in insertion order and in reverse postorder.
+
+    python benchmarks/worklist_iterations.py [--depth N] [--width N]
+
+"""
+
+from pathlib import Path
+import argparse
+import sys
+
+from jpamb import cfg, jvm
+from jpamb.model import Suite
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "solutions"))
+import bytecode_taint_analyzer as analyzer
+
+ORDERS = {"fifo": cfg.FifoWorklist, "rpo": cfg.Worklist}
+
+
+def nested_loops(depth: int, width: int) -> list[jvm.Opcode]:
+    """A method with `width` sequential nests of `depth` counting loops.
+
+    Every loop is `for (i = 0; i < 10; i++) { <inner loop> }` over its own
+    local.
+    """
+    ops: list[jvm.Opcode] = []
+
+    def emit(cls, *args):
+        ops.append(cls(len(ops), *args))
+        return ops[-1]
+
+    def loop(level, local):
+        emit(jvm.Push, jvm.Value.int(0))
+        emit(jvm.Store, jvm.Int(), local)
+        header = len(ops)
+        emit(jvm.Load, jvm.Int(), local)
+        emit(jvm.Push, jvm.Value.int(10))
+        branch = len(ops)
+        emit(jvm.If, "ge", -1)
+        if level > 1:
+            loop(level - 1, local + 1)
+        emit(jvm.Incr, local, 1)
+        emit(jvm.Goto, header)
+        ops[branch] = jvm.If(branch, "ge", len(ops))
+
+    for _ in range(width):
+        loop(depth, 1)
+    emit(jvm.Return, None)
+    return ops
+
+
+def count(methodid, opcodes, worklist_class) -> analyzer.WorklistStats:
+    stats = analyzer.WorklistStats()
+    analyzer.analyze_method(methodid, opcodes, stats, worklist_class)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--width", type=int, default=8)
+    args = parser.parse_args()
+
+    suite = Suite(Path.cwd())
+    loops = jvm.ClassName.decode("jpamb.cases.Loops")
+    methods = {
+        str(m.extension.name): (m, suite.method_opcodes(m))
+        for m in suite.cases.index
+        if m.classname == loops
+    }
+    generated = jvm.AbsMethodID.decode("jpamb.cases.Generated.nested:(I)V")
+    for depth in range(1, args.depth + 1):
+        methods[f"nested depth {depth}"] = (
+            generated,
+            nested_loops(depth, args.width),
+        )
+
+    print(f"{'method':>20} {'blocks':>7} " + " ".join(f"{o:>7}" for o in ORDERS))
+    totals = dict.fromkeys(ORDERS, 0)
+    for name, (methodid, opcodes) in methods.items():
+        row = {o: count(methodid, opcodes, w) for o, w in ORDERS.items()}
+        for o, stats in row.items():
+            totals[o] += stats.iterations
+        blocks = next(iter(row.values())).blocks
+        print(
+            f"{name:>20} {blocks:7} "
+            + " ".join(
+                f"{s.iterations:7}" + ("*" if s.capped else "") for s in row.values()
+            )
+        )
+    print(f"{'total':>20} {'':7} " + " ".join(f"{t:7}" for t in totals.values()))
+
+
+if __name__ == "__main__":
+    main()
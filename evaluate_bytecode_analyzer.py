@@ -9,7 +9,10 @@ import subprocess
 import sys
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+from jpamb import jvm
+from jpamb.model import Suite
 
 
 @dataclass
@@ -43,120 +46,107 @@ class TestResult:
 
 def get_method_signature_from_bytecode(method_name: str) -> str:
     """
-    Get the actual method signature from bytecode JSON file.
+    Get the actual method signature from the method index of the decompiled class.
 
     Args:
         method_name: Method name like "jpamb.sqli.SQLi_DirectConcat.vulnerable"
 
     Returns:
-        Full signature like "jpamb.sqli.SQLi_DirectConcat.vulnerable:(Ljava/lang/String;)V"
+        Full signature like "jpamb.sqli.SQLi_DirectConcat.vulnerable:(A)V"
     """
-    parts = method_name.split(".")
-    class_name = ".".join(parts[:-1])
-    method = parts[-1]
+    class_name, _, method = method_name.rpartition(".")
 
-    # Convert class name to file path
-    json_path = Path("target/decompiled") / (class_name.replace(".", "/") + ".json")
+    try:
+        suite = Suite(Path.cwd())
+        overloads = suite.method_index(jvm.ClassName.decode(class_name)).by_name(method)
+    except Exception:
+        # Error reading the class, fallback
+        overloads = ()
 
-    if not json_path.exists():
-        # Fallback to no parameters
+    if not overloads:
+        # Method not found, fallback to no parameters
         return f"{method_name}:()V"
 
-    try:
-        with open(json_path) as f:
-            data = json.load(f)
-
-        for method_data in data.get("methods", []):
-            if method_data["name"] == method:
-                # Build parameter signature
-                params = []
-                for param in method_data.get("params", []):
-                    param_type = param.get("type", {})
-                    kind = param_type.get("kind")
-
-                    if kind == "class" or kind == "string":
-                        # All reference/object types use 'A' in JPAMB format
-                        params.append("A")
-                    elif kind == "int":
-                        params.append("I")
-                    elif kind == "boolean":
-                        params.append("Z")
-                    elif kind == "byte":
-                        params.append("B")
-                    elif kind == "char":
-                        params.append("C")
-                    elif kind == "short":
-                        params.append("S")
-                    elif kind == "long":
-                        params.append("J")
-                    elif kind == "float":
-                        params.append("F")
-                    elif kind == "double":
-                        params.append("D")
-                    elif kind == "array":
-                        # Arrays are '[' + element type
-                        params.append("[A")  # Simplification: assume object arrays
-                    else:
-                        # Unknown type - skip (don't add to params)
-                        continue
-
-                # Build return type
-                returns = method_data.get("returns", {})
-                ret_kind = returns.get("kind")
-                if ret_kind == "void":
-                    ret_sig = "V"
-                elif ret_kind == "class" or ret_kind == "string":
-                    ret_sig = "A"  # Reference type
-                elif ret_kind == "int":
-                    ret_sig = "I"
-                elif ret_kind == "boolean":
-                    ret_sig = "Z"
-                else:
-                    ret_sig = "V"  # Default to void
-
-                param_sig = "".join(params)
-                return f"{method_name}:({param_sig}){ret_sig}"
-
-        # Method not found, fallback
-        return f"{method_name}:()V"
+    return f"{class_name}.{overloads[0].encode()}"
 
-    except Exception:
-        # Error reading file, fallback
-        return f"{method_name}:()V"
 
+ANALYZER = ["python3", "solutions/bytecode_taint_analyzer.py", "--json"]
 
-def run_analyzer(method_signature: str) -> Tuple[str, bool]:
-    """
-    Run the bytecode analyzer on a method.
 
-    Args:
-        method_signature: Method name (e.g., "jpamb.sqli.SQLi_DirectConcat.vulnerable")
+def _text(output) -> str:
+    """The output of a process, which is bytes when it timed out on some
+    platforms."""
+    if isinstance(output, bytes):
+        return output.decode(errors="replace")
+    return output or ""
 
-    Returns:
-        Tuple of (full output, is_vulnerable)
+
+def _run(method_signatures: List[str], timeout: float) -> Tuple[Dict[str, Tuple[str, bool]], str]:
     """
-    # Our analyzer handles simple signatures directly via resolve_method_id()
-    # No need to convert to full JVM bytecode format
+    Run the analyzer on methods, and read the JSON line it prints for each
+    one, also if it fails before the end.
 
+    Returns:
+        The results of the methods printed, and the failure, "" if none
+    """
     try:
         result = subprocess.run(
-            ["python3", "solutions/bytecode_taint_analyzer.py", method_signature],
-            capture_output=True,
-            text=True,
-            timeout=30
+            [*ANALYZER, *method_signatures], capture_output=True, text=True, timeout=timeout
         )
+        stdout, stderr = result.stdout, result.stderr
+        failure = f"exit code {result.returncode}" if result.returncode else ""
+    except subprocess.TimeoutExpired as e:
+        stdout, stderr = _text(e.stdout), _text(e.stderr)
+        failure = "TIMEOUT"
+    except Exception as e:
+        return {}, f"ERROR: {e}"
+
+    results = {}
+    # One JSON line per method, with the output as "sql injection;90%" or "ok;90%"
+    for line in stdout.splitlines():
+        try:
+            line = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # Not a result, or cut off by a crash
+        if not isinstance(line, dict) or "method" not in line:
+            continue
+        results[line["method"]] = (line["output"], "sql injection" in line["output"].lower())
+    if failure and stderr.strip():
+        failure += ": " + stderr.strip().splitlines()[-1]
+    return results, failure
+
+
+def run_analyzer(method_signatures: List[str]) -> Dict[str, Tuple[str, bool]]:
+    """
+    Run the bytecode analyzer on many methods, in one batch process.
 
-        output = result.stdout.strip()
-
-        # Parse output: "sql injection;90%" or "ok;90%"
-        is_vulnerable = "sql injection" in output.lower()
+    If the batch process crashes, exits with an error or times out, the
+    results it printed are kept, and the other methods are analyzed one
+    at a time, so that only the methods which fail on their own are
+    reported as ERROR or TIMEOUT.
 
-        return output, is_vulnerable
+    Args:
+        method_signatures: Method names (e.g., "jpamb.sqli.SQLi_DirectConcat.vulnerable")
 
-    except subprocess.TimeoutExpired:
-        return "TIMEOUT", False
-    except Exception as e:
-        return f"ERROR: {e}", False
+    Returns:
+        Dict from method name to tuple of (full output, is_vulnerable)
+    """
+    # Our analyzer handles simple signatures directly via resolve_method_id()
+    # No need to convert to full JVM bytecode format
+    results, failure = _run(method_signatures, timeout=30 + len(method_signatures))
+    missing = [m for m in method_signatures if m not in results]
+    if failure:
+        print(f"Batch analysis failed ({failure})", file=sys.stderr)
+    if missing:
+        print(f"Analyzing {len(missing)} methods one at a time...", file=sys.stderr)
+    for m in missing:
+        result, failure = _run([m], timeout=30)
+        if m not in result:
+            failure = failure or "no result"
+            result[m] = (failure if failure == "TIMEOUT" else f"ERROR: {failure}", False)
+        results[m] = result[m]
+
+    return {m: results[m] for m in method_signatures}
 
 
 def load_test_cases(test_cases_file: Path) -> List[dict]:
@@ -174,54 +164,37 @@ def run_evaluation(test_cases_file: Path) -> List[TestResult]:
     total_methods = len(test_cases) * 2  # vulnerable + safe for each
     current = 0
 
+    print(f"Analyzing {total_methods} methods in one batch...")
+    outputs = run_analyzer(
+        [m for t in test_cases for m in (t["vulnerable_method"], t["safe_method"])]
+    )
+
     for test_case in test_cases:
         test_id = test_case["id"]
         name = test_case["name"]
         category = test_case["category"]
 
-        # Test vulnerable method
-        current += 1
-        print(f"[{current}/{total_methods}] Testing {name}.vulnerable...", end=" ")
-        vulnerable_method = test_case["vulnerable_method"]
-        output, detected = run_analyzer(vulnerable_method)
-        expected = test_case["expected_vulnerable"]
-        correct = (detected == expected)
-
-        results.append(TestResult(
-            test_id=test_id,
-            name=f"{name}_vulnerable",
-            method_signature=vulnerable_method,
-            expected_vulnerable=expected,
-            actual_result=output,
-            detected_vulnerable=detected,
-            correct=correct,
-            category=category
-        ))
-
-        status = "✅" if correct else "❌"
-        print(f"{status} (expected: {'VULN' if expected else 'SAFE'}, got: {'VULN' if detected else 'SAFE'})")
-
-        # Test safe method
-        current += 1
-        print(f"[{current}/{total_methods}] Testing {name}.safe...", end=" ")
-        safe_method = test_case["safe_method"]
-        output, detected = run_analyzer(safe_method)
-        expected = test_case["expected_safe"]
-        correct = (detected == expected)
-
-        results.append(TestResult(
-            test_id=test_id,
-            name=f"{name}_safe",
-            method_signature=safe_method,
-            expected_vulnerable=expected,
-            actual_result=output,
-            detected_vulnerable=detected,
-            correct=correct,
-            category=category
-        ))
-
-        status = "✅" if correct else "❌"
-        print(f"{status} (expected: {'VULN' if expected else 'SAFE'}, got: {'VULN' if detected else 'SAFE'})")
+        for kind, expected in (("vulnerable", test_case["expected_vulnerable"]),
+                               ("safe", test_case["expected_safe"])):
+            current += 1
+            print(f"[{current}/{total_methods}] Testing {name}.{kind}...", end=" ")
+            method = test_case[f"{kind}_method"]
+            output, detected = outputs[method]
+            correct = (detected == expected)
+
+            results.append(TestResult(
+                test_id=test_id,
+                name=f"{name}_{kind}",
+                method_signature=method,
+                expected_vulnerable=expected,
+                actual_result=output,
+                detected_vulnerable=detected,
+                correct=correct,
+                category=category
+            ))
+
+            status = "✅" if correct else "❌"
+            print(f"{status} (expected: {'VULN' if expected else 'SAFE'}, got: {'VULN' if detected else 'SAFE'})")
 
     return results
 
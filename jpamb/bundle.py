@@ -0,0 +1,168 @@
+"""
+jpamb.bundle
+
+This module packs the decompiled suite into a single binary file, which can
+be opened with mmap so that a single method can be decoded without parsing
+its class or walking `target/decompiled`.
+
+The layout of a bundle is:
+
+    MAGIC | VERSION (u32) | index length (u64) | index (json) | data
+
+The index maps every class to the byte range of its class document
+(without methods), the byte ranges of its methods in declaration order, the
+position of each method by name and descriptor, its overloads, and the
+stamp and digest of the decompiled file it was built from. The data is
+the compact json of these documents.
+
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from jpamb import jvm
+from jpamb.model import MethodIndex, ClassCache, LazyMethods
+
+HEADER = struct.Struct("<8sIQ")
+
+
+def _compact(doc) -> bytes:
+    return json.dumps(doc, separators=(",", ":"), sort_keys=True).encode()
+
+
+def _methodkey(key: tuple[str, str]) -> str:
+    return f"{key[0]}:{key[1]}"
+
+
+class SuiteBundle:
+    """A read-only view of a bundle file."""
+
+    MAGIC = b"JPAMBBDL"
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {self.VERSION} bundle")
+        self._data = HEADER.size + length
+        self.index = json.loads(self._mmap[HEADER.size : self._data])
+        self._classes = self.index["classes"]
+        self._method_indices = {}
+
+    def close(self):
+        self._mmap.close()
+
+    def decode(self, span: list[int]):
+        """Decode the document at the (offset, length) span of the data."""
+        start = self._data + span[0]
+        return json.loads(self._mmap[start : start + span[1]])
+
+    def classes(self) -> list[jvm.ClassName]:
+        return [jvm.ClassName.decode(cn) for cn in self._classes]
+
+    def __contains__(self, cn: jvm.ClassName) -> bool:
+        return cn.encode() in self._classes
+
+    def source(self, cn: jvm.ClassName) -> str:
+        """The decompiled file, relative to the decompiled folder."""
+        return self._classes[cn.encode()]["source"]
+
+    def stamp(self, cn: jvm.ClassName) -> tuple[int, int]:
+        """The stamp of the decompiled file the class was bundled from."""
+        return tuple(self._classes[cn.encode()]["stamp"])
+
+    def digest(self, cn: jvm.ClassName) -> str:
+        """The sha256 of the decompiled file the class was bundled from."""
+        return self._classes[cn.encode()]["digest"]
+
+    def method_index(self, cn: jvm.ClassName) -> MethodIndex:
+        if (index := self._method_indices.get(cn)) is None:
+            entry = self._classes[cn.encode()]
+            spans = entry["methods"]
+            positions = {}
+            for key, i in entry["keys"].items():
+                name, _, params = key.rpartition(":")
+                positions[(name, params)] = i
+            index = MethodIndex(
+                LazyMethods(positions, lambda i: self.decode(spans[i])),
+                {
+                    name: tuple(jvm.MethodID.decode(m) for m in ms)
+                    for name, ms in entry["overloads"].items()
+                },
+            )
+            self._method_indices[cn] = index
+        return index
+
+    def findclass(self, cn: jvm.ClassName) -> dict:
+        entry = self._classes[cn.encode()]
+        doc = self.decode(entry["class"])
+        doc["methods"] = [self.decode(span) for span in entry["methods"]]
+        return doc
+
+    @property
+    def case_stamp(self) -> tuple[int, int] | None:
+        if (stamp := self.index["cases"]["stamp"]) is not None:
+            return tuple(stamp)
+
+    def case_text(self) -> bytes:
+        span = self.index["cases"]["text"]
+        start = self._data + span[0]
+        return self._mmap[start : start + span[1]]
+
+    @classmethod
+    def write(cls, suite, path: Path):
+        """Bundle the decompiled files and the case file of the suite."""
+        data = bytearray()
+
+        def append(blob: bytes) -> list[int]:
+            span = [len(data), len(blob)]
+            data.extend(blob)
+            return span
+
+        classes = {}
+        for file in sorted(suite.decompiledfiles()):
+            rel = file.relative_to(suite.decompiled_folder)
+            cn = jvm.ClassName.from_parts(*rel.with_suffix("").parts)
+            content = file.read_bytes()
+            doc = json.loads(content)
+            index = MethodIndex.from_json(doc)
+            position = {id(method): i for i, method in enumerate(doc["methods"])}
+            classes[cn.encode()] = {
+                "source": rel.as_posix(),
+                "stamp": ClassCache.stamp(file),
+                "digest": hashlib.sha256(content).hexdigest(),
+                "class": append(
+                    _compact({k: v for k, v in doc.items() if k != "methods"})
+                ),
+                "methods": [append(_compact(method)) for method in doc["methods"]],
+                "keys": {
+                    _methodkey(key): position[id(method)]
+                    for key, method in index.methods.items()
+                },
+                "overloads": {
+                    name: [m.encode() for m in ms]
+                    for name, ms in index.overloads.items()
+                },
+            }
+
+        cases = {"stamp": None, "text": append(b"")}
+        if suite.case_file.exists():
+            cases["stamp"] = ClassCache.stamp(suite.case_file)
+            cases["text"] = append(suite.case_file.read_bytes())
+
+        index = json.dumps({"classes": classes, "cases": cases}).encode()
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as fp:
+            fp.write(HEADER.pack(cls.MAGIC, cls.VERSION, len(index)))
+            fp.write(index)
+            fp.write(data)
+        os.replace(tmp, path)
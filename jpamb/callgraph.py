@@ -0,0 +1,207 @@
+"""
+jpamb.callgraph
+
+This module builds the call graph of the methods of a suite from the invoke
+opcodes of their bytecode, and splits it into strongly connected
+components, so interprocedural analyses can summarize the methods bottom
+up: callees before their callers, and the methods of a recursive cycle
+together.
+
+Only methods whose opcodes are in the suite are part of the graph, calls to
+library methods (java.lang.String.trim, ...) are left to the analyses.
+Calls are resolved by the method named in the opcode, see `target`, without
+looking for overriding methods in subclasses.
+
+    from jpamb import callgraph
+
+    graph = callgraph.build(suite, [methodid])
+    for component in graph.sccs:            # callees first
+        for m in component:
+            ... graph.methods[m] ...
+
+Methods are numbered from 0 in the order they are discovered, and the
+edges are stored in flat arrays indexed by method, as in jpamb.cfg.
+
+"""
+
+from array import array
+from functools import cache, cached_property
+from typing import Iterable
+
+from jpamb import jvm
+from jpamb.cfg import flatten
+
+INVOKES = (
+    jvm.InvokeVirtual,
+    jvm.InvokeStatic,
+    jvm.InvokeInterface,
+    jvm.InvokeSpecial,
+)
+
+
+@cache
+def target(methodid: jvm.AbsMethodID) -> jvm.AbsMethodID:
+    """The method an invoke opcode calls. The class names of the opcodes
+    are slashed (jpamb/cases/Calls), the ones of the suite are dotted."""
+    name = methodid.classname.dotted()
+    if "/" not in name:
+        return methodid
+    return jvm.AbsMethodID(
+        jvm.ClassName.decode(name.replace("/", ".")), methodid.extension
+    )
+
+
+def method_opcodes(suite, methodid: jvm.AbsMethodID) -> tuple[jvm.Opcode, ...] | None:
+    """The opcodes of a method, or None if the suite does not have them."""
+    try:
+        return suite.method_opcodes(methodid)
+    except (FileNotFoundError, IndexError, KeyError, NotImplementedError, TypeError):
+        return None
+
+
+class CallGraph:
+    """The calls between the methods of a suite.
+
+    The callees of method m are `callee[callee_start[m]:callee_start[m + 1]]`,
+    and the callers are stored the same way. A method calling itself has an
+    edge to itself.
+    """
+
+    def __init__(self, suite, roots: Iterable[jvm.AbsMethodID]):
+        self.methods: list[jvm.AbsMethodID] = []
+        self.index: dict[jvm.AbsMethodID, int] = {}
+        self.opcodes: list[tuple[jvm.Opcode, ...]] = []
+        missing: set[jvm.AbsMethodID] = set()
+
+        def add(methodid) -> int | None:
+            if (m := self.index.get(methodid)) is not None:
+                return m
+            if methodid in missing:
+                return None
+            if (opcodes := method_opcodes(suite, methodid)) is None:
+                missing.add(methodid)
+                return None
+            m = self.index[methodid] = len(self.methods)
+            self.methods.append(methodid)
+            self.opcodes.append(opcodes)
+            return m
+
+        edges: list[list[int]] = []
+        for root in roots:
+            add(root)
+        while len(edges) < len(self.methods):
+            targets = []
+            for op in self.opcodes[len(edges)]:
+                if (
+                    isinstance(op, INVOKES)
+                    and (t := add(target(op.method))) is not None
+                ):
+                    targets.append(t)
+            edges.append(list(dict.fromkeys(targets)))
+        self.callee_start, self.callee = flatten(edges)
+
+        reverse = [[] for _ in self.methods]
+        for m, targets in enumerate(edges):
+            for t in targets:
+                reverse[t].append(m)
+        self.caller_start, self.caller = flatten(reverse)
+
+    def __len__(self) -> int:
+        """The number of methods."""
+        return len(self.methods)
+
+    def __contains__(self, methodid: jvm.AbsMethodID) -> bool:
+        return methodid in self.index
+
+    def callees(self, m: int) -> array:
+        return self.callee[self.callee_start[m] : self.callee_start[m + 1]]
+
+    def callers(self, m: int) -> array:
+        return self.caller[self.caller_start[m] : self.caller_start[m + 1]]
+
+    @cached_property
+    def sccs(self) -> list[list[int]]:
+        """The strongly connected components, by Tarjan's algorithm, in
+        reverse topological order: the callees of a component are in the
+        component itself or in one before it."""
+        return _tarjan(len(self), self.callees)
+
+    @cached_property
+    def scc_of(self) -> array:
+        """The index in `sccs` of the component of each method."""
+        scc_of = array("i", [0] * len(self))
+        for c, component in enumerate(self.sccs):
+            for m in component:
+                scc_of[m] = c
+        return scc_of
+
+    def scc_callees(self, c: int) -> set[int]:
+        """The other components the methods of component c call."""
+        return {self.scc_of[t] for m in self.sccs[c] for t in self.callees(m)} - {c}
+
+    def is_recursive(self, c: int) -> bool:
+        """Whether the methods of component c may call themselves."""
+        component = self.sccs[c]
+        return len(component) > 1 or component[0] in self.callees(component[0])
+
+    def __repr__(self) -> str:
+        return f"CallGraph({len(self)} methods, {len(self.callee)} calls, {len(self.sccs)} sccs)"
+
+
+def _tarjan(n: int, successors) -> list[list[int]]:
+    """The strongly connected components, without recursion so deep call
+    chains do not hit the recursion limit."""
+    index = array("i", [-1] * n)
+    low = array("i", [0] * n)
+    on_stack = bytearray(n)
+    stack: list[int] = []
+    components: list[list[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, iter(successors(root)))]
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, iter(successors(w))))
+                    break
+                if on_stack[w]:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+    return components
+
+
+def build(suite, roots: Iterable[jvm.AbsMethodID]) -> CallGraph:
+    """The graph of the roots and the methods they call, transitively."""
+    return CallGraph(suite, roots)
+
+
+def suite_callgraph(suite) -> CallGraph:
+    """The graph of every method with decodable opcodes in the suite."""
+    from jpamb.columnar import suite_methods
+
+    return CallGraph(suite, suite_methods(suite))
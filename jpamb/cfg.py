@@ -0,0 +1,370 @@
+"""
+jpamb.cfg
+
+This module builds the control flow graph of a method from its opcodes,
+together with the orders and trees most analyses need: a reverse
+postorder, the dominator and post-dominator trees, and the loop nesting
+forest.
+
+Blocks are numbered from 0, block 0 is the entry, and everything is stored
+in flat arrays indexed by block. Note that branch targets of the opcodes
+are instruction indices, not byte offsets.
+
+    from jpamb import cfg
+
+    graph = cfg.build(suite.method_opcodes(methodid), methodid)
+    for b in graph.rpo:
+        for op in graph.instructions(b):
+            ...
+
+Given the method id, the graph is cached by it for as long as the method
+has the same opcodes, so building the graph of a method again is free.
+
+"""
+
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from functools import cached_property
+import heapq
+
+from jpamb import jvm
+
+# Opcodes which end a block and never fall through to the next instruction.
+TERMINATORS = (jvm.Goto, jvm.Return, jvm.Throw)
+BRANCHES = (jvm.Goto, jvm.If, jvm.Ifz)
+
+
+@dataclass(frozen=True)
+class Loop:
+    """A natural loop, identified by its header block."""
+
+    header: int
+    blocks: frozenset[int]
+    parent: int | None
+    depth: int
+
+
+class CFG:
+    """The control flow graph of a method.
+
+    Block b holds the instructions `starts[b]` up to `starts[b + 1]`. The
+    successors of b are `succ[succ_start[b]:succ_start[b + 1]]`, and the
+    predecessors are stored the same way. Unreachable blocks are not part
+    of the orders and trees.
+    """
+
+    def __init__(self, opcodes: tuple[jvm.Opcode, ...]):
+        self.opcodes = opcodes
+        n = len(opcodes)
+
+        leaders = bytearray(n + 1)
+        leaders[0] = leaders[n] = 1
+        for i, op in enumerate(opcodes):
+            if isinstance(op, BRANCHES) and 0 <= op.target < n:
+                leaders[op.target] = 1
+            if isinstance(op, BRANCHES + TERMINATORS):
+                leaders[i + 1] = 1
+
+        self.starts = array("i", (i for i in range(n + 1) if leaders[i]))
+        self.block_of = array("i", [0]) * n
+        for b in range(len(self.starts) - 1):
+            for i in range(self.starts[b], self.starts[b + 1]):
+                self.block_of[i] = b
+
+        edges = [[] for _ in range(len(self))]
+        for b in range(len(self)):
+            last = self.starts[b + 1] - 1
+            op = opcodes[last]
+            targets = []
+            if isinstance(op, BRANCHES) and 0 <= op.target < n:
+                targets.append(self.block_of[op.target])
+            if not isinstance(op, TERMINATORS) and last + 1 < n:
+                targets.append(self.block_of[last + 1])
+            edges[b] = list(dict.fromkeys(targets))
+        self.succ_start, self.succ = flatten(edges)
+
+        reverse = [[] for _ in range(len(self))]
+        for b, targets in enumerate(edges):
+            for t in targets:
+                reverse[t].append(b)
+        self.pred_start, self.pred = flatten(reverse)
+
+    def __len__(self) -> int:
+        """The number of blocks."""
+        return len(self.starts) - 1
+
+    def instructions(self, b: int) -> tuple[jvm.Opcode, ...]:
+        return self.opcodes[self.starts[b] : self.starts[b + 1]]
+
+    def successors(self, b: int) -> array:
+        return self.succ[self.succ_start[b] : self.succ_start[b + 1]]
+
+    def predecessors(self, b: int) -> array:
+        return self.pred[self.pred_start[b] : self.pred_start[b + 1]]
+
+    def exits(self) -> list[int]:
+        """The reachable blocks without successors."""
+        return [b for b in self.rpo if self.succ_start[b] == self.succ_start[b + 1]]
+
+    @cached_property
+    def rpo(self) -> array:
+        """The blocks reachable from the entry, in reverse postorder."""
+        return _reverse_postorder(len(self), [0] if len(self) else [], self.successors)
+
+    @cached_property
+    def rpo_number(self) -> array:
+        """The position of each block in `rpo`, or -1 if it is unreachable."""
+        return _numbering(len(self), self.rpo)
+
+    @cached_property
+    def idom(self) -> array:
+        """The immediate dominator of each block, -1 for the entry and for
+        unreachable blocks."""
+        return _dominators(len(self), self.rpo, self.rpo_number, self.predecessors)
+
+    @cached_property
+    def ipdom(self) -> array:
+        """The immediate post-dominator of each block, -1 for the exits, and
+        for blocks which do not reach an exit.
+
+        The post-dominators are computed from a virtual node joining all
+        exits, so a block which is post-dominated by two different exits
+        only has the virtual node as post-dominator, which is also -1."""
+        n = len(self)
+        exits = self.exits()
+
+        def successors(b):  # in the reverse graph, with n as the virtual exit
+            return exits if b == n else self.predecessors(b)
+
+        def predecessors(b):
+            if b == n:
+                return ()
+            succ = self.successors(b)
+            return succ if len(succ) else [n]
+
+        order = _reverse_postorder(n + 1, [n], successors)
+        ipdom = _dominators(n + 1, order, _numbering(n + 1, order), predecessors)
+        return array("i", (-1 if d == n else d for d in ipdom[:n]))
+
+    def dominates(self, a: int, b: int) -> bool:
+        """Whether every path from the entry to b goes through a."""
+        if self.rpo_number[b] < 0:
+            return False
+        while b != -1:
+            if a == b:
+                return True
+            b = self.idom[b]
+        return False
+
+    @cached_property
+    def loops(self) -> dict[int, Loop]:
+        """The loop nesting forest, keyed by the loop headers, outermost
+        loops first.
+
+        A back edge is an edge to a block dominating its source, and the loop
+        of a header is the header and all blocks reaching one of its back
+        edges without passing the header. Irreducible control flow, which
+        javac does not produce, does not form loops."""
+        bodies = {}
+        for b in self.rpo:
+            for h in self.successors(b):
+                if self.dominates(h, b):
+                    body = bodies.setdefault(h, {h})
+                    stack = [b]
+                    while stack:
+                        x = stack.pop()
+                        if x not in body and self.rpo_number[x] >= 0:
+                            body.add(x)
+                            stack.extend(self.predecessors(x))
+
+        loops = {}
+        headers = sorted(bodies, key=lambda h: len(bodies[h]), reverse=True)
+        for h in headers:
+            parent = None
+            for outer in reversed(list(loops)):
+                if h in loops[outer].blocks:
+                    parent = outer
+                    break
+            depth = 1 if parent is None else loops[parent].depth + 1
+            loops[h] = Loop(h, frozenset(bodies[h]), parent, depth)
+        return loops
+
+    @cached_property
+    def loop_of(self) -> array:
+        """The header of the innermost loop containing each block, or -1."""
+        loop_of = array("i", [-1] * len(self))
+        for h, loop in self.loops.items():  # outermost first
+            for b in loop.blocks:
+                loop_of[b] = h
+        return loop_of
+
+    def loop_depth(self, b: int) -> int:
+        h = self.loop_of[b]
+        return 0 if h < 0 else self.loops[h].depth
+
+    def is_loop_header(self, b: int) -> bool:
+        return b in self.loops
+
+    def __repr__(self) -> str:
+        return (
+            "CFG("
+            + ", ".join(
+                f"{b}:{self.starts[b]}-{self.starts[b + 1] - 1}->{list(self.successors(b))}"
+                for b in range(len(self))
+            )
+            + ")"
+        )
+
+
+def flatten(lists: list[list[int]]) -> tuple[array, array]:
+    """The lists as one flat array, and the start of each list in it."""
+    starts = array("i", [0])
+    flat = array("i")
+    for items in lists:
+        flat.extend(items)
+        starts.append(len(flat))
+    return starts, flat
+
+
+def _numbering(n: int, order) -> array:
+    number = array("i", [-1] * n)
+    for i, b in enumerate(order):
+        number[b] = i
+    return number
+
+
+def _reverse_postorder(n: int, roots, successors) -> array:
+    seen = bytearray(n)
+    post = []
+    for root in roots:
+        if seen[root]:
+            continue
+        seen[root] = 1
+        stack = [(root, iter(successors(root)))]
+        while stack:
+            b, it = stack[-1]
+            for s in it:
+                if not seen[s]:
+                    seen[s] = 1
+                    stack.append((s, iter(successors(s))))
+                    break
+            else:
+                stack.pop()
+                post.append(b)
+    post.reverse()
+    return array("i", post)
+
+
+def _dominators(n: int, order, number, predecessors) -> array:
+    """The immediate dominators, by Cooper, Harvey and Kennedy's "A Simple,
+    Fast Dominance Algorithm", with order a reverse postorder from its
+    first node."""
+    idom = array("i", [-1] * n)
+    if not order:
+        return idom
+    entry = order[0]
+    idom[entry] = entry
+
+    def intersect(a, b):
+        while a != b:
+            while number[a] > number[b]:
+                a = idom[a]
+            while number[b] > number[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for b in order[1:]:
+            new = -1
+            for p in predecessors(b):
+                if idom[p] == -1:
+                    continue
+                new = p if new == -1 else intersect(p, new)
+            if new != idom[b]:
+                idom[b] = new
+                changed = True
+
+    idom[entry] = -1
+    return idom
+
+
+class Worklist:
+    """The blocks left to visit in a data-flow analysis.
+
+    Blocks are popped in reverse postorder, so a block is visited after its
+    forward predecessors, and inner loops are stable before the blocks after
+    them are visited. A block is at most once in the worklist, and pushing
+    an unreachable block, which has no place in the order, does nothing.
+    """
+
+    def __init__(self, graph: CFG):
+        self.graph = graph
+        self._heap: list[int] = []
+        self._queued = bytearray(len(graph))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, b: int) -> bool:
+        return bool(self._queued[b])
+
+    def push(self, b: int):
+        if not self._queued[b] and (number := self.graph.rpo_number[b]) >= 0:
+            self._queued[b] = 1
+            heapq.heappush(self._heap, number)
+
+    def pop(self) -> int:
+        b = self.graph.rpo[heapq.heappop(self._heap)]
+        self._queued[b] = 0
+        return b
+
+
+class FifoWorklist(Worklist):
+    """A worklist visiting the blocks in the order they are added."""
+
+    def __init__(self, graph: CFG):
+        self.graph = graph
+        self._queue: deque[int] = deque()
+        self._queued = bytearray(len(graph))
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def push(self, b: int):
+        if not self._queued[b]:
+            self._queued[b] = 1
+            self._queue.append(b)
+
+    def pop(self) -> int:
+        b = self._queue.popleft()
+        self._queued[b] = 0
+        return b
+
+
+# The graph of each method, with the opcodes it was built from.
+_graphs: dict[jvm.AbsMethodID, tuple[tuple[jvm.Opcode, ...], CFG]] = {}
+
+
+def build(
+    opcodes: tuple[jvm.Opcode, ...], methodid: jvm.AbsMethodID | None = None
+) -> CFG:
+    """The graph of the opcodes of a method, cached by the method id if given.
+
+    A cached graph is reused only for the very same opcodes, so a method
+    whose bytecode changed gets a new graph.
+    """
+    if methodid is None:
+        return CFG(opcodes)
+    cached = _graphs.get(methodid)
+    if cached is not None and cached[0] is opcodes:
+        return cached[1]
+    graph = CFG(opcodes)
+    _graphs[methodid] = (opcodes, graph)
+    return graph
+
+
+def method_cfg(suite, methodid: jvm.AbsMethodID) -> CFG:
+    return build(suite.method_opcodes(methodid), methodid)
@@ -494,6 +494,60 @@ def evaluate(ctx, program, report, timeout, iterations, with_python):
     )
 
 
+def count_opcodes(suite):
+    """Count the opcodes of the case methods, once per case, and record the
+    classes each opcode appears in."""
+    opcode_counts = Counter()
+    opcode_urls = {}
+    class_opcodes = {}
+    for case in suite.cases:
+        class_opcodes.setdefault(str(case.methodid.classname).split(".")[-1], set())
+        list_ops = []
+        for opcode in suite.method_opcodes(case.methodid):
+            index = opcode.mnemonic()  # opcode.real().split()[0]
+            list_ops.append(index)
+
+            opcode_urls[index] = (
+                opcode.mnemonic(),
+                opcode.url(),
+                opcode.__class__,
+            )
+
+            opcode_counts[index] += 1
+
+        for o in list_ops:
+            class_opcodes[str(case.methodid.classname).split(".")[-1]].add(o)
+    return opcode_counts, opcode_urls, class_opcodes
+
+
+def count_opcodes_columnar(suite):
+    """Like count_opcodes, but counting on the opcode table of the case
+    methods, weighted by their number of cases."""
+    import numpy as np
+    from jpamb import columnar
+
+    cases = suite.cases.index
+    table = columnar.suite_table(suite, cases)
+    weights = np.array([len(cs) for cs in cases.values()])
+    counts = np.bincount(table.mnemonic, weights=weights[table.method])
+    ids, first = np.unique(table.mnemonic, return_index=True)
+
+    opcode_counts = Counter()
+    opcode_urls = {}
+    for i in sorted(range(len(ids)), key=lambda i: first[i]):
+        mnemonic = table.symbols[ids[i]]
+        opcode_counts[mnemonic] = int(counts[ids[i]])
+        cls = columnar.KINDS[table.kind[first[i]]]
+        opcode_urls[mnemonic] = (mnemonic, cls.url_of(mnemonic), cls)
+
+    names = [m.classname.name for m in table.methods]
+    class_opcodes = {name: set() for name in names}
+    pairs = np.unique(np.stack([table.method, table.mnemonic]), axis=1)
+    for method, mnemonic in pairs.T:
+        class_opcodes[names[method]].add(table.symbols[mnemonic])
+    return opcode_counts, opcode_urls, class_opcodes
+
+
 @cli.command()
 @click.option(
     "-D",
@@ -511,6 +565,11 @@ def evaluate(ctx, program, report, timeout, iterations, with_python):
     help="decompile the classfiles using jvm2json.",
     default=None,
 )
+@click.option(
+    "--bundle / --no-bundle",
+    help="pack the decompiled files and the cases into a single bundle.",
+    default=None,
+)
 @click.option(
     "--document / --no-document",
     help="docmument the files",
@@ -522,30 +581,32 @@ def evaluate(ctx, program, report, timeout, iterations, with_python):
     default=None,
 )
 @click.pass_obj
-def build(suite, compile, decompile, document, test, docker):
+def build(suite, compile, decompile, bundle, document, test, docker):
     """Rebuild all benchmarks."""
 
-    if not any(s for s in [compile, decompile, document, test]):
+    if not any(s for s in [compile, decompile, bundle, document, test]):
         compile = compile is None
         decompile = decompile is None
+        bundle = bundle is None
         document = document is None
         test = test is None
 
-    dockerbin = shutil.which("podman") or shutil.which("docker")
+    if compile or decompile or test:
+        dockerbin = shutil.which("podman") or shutil.which("docker")
 
-    if not dockerbin:
-        raise click.UsageError("No docker or podman on PATH")
+        if not dockerbin:
+            raise click.UsageError("No docker or podman on PATH")
 
-    log.info(f"Using docker: {dockerbin}")
+        log.info(f"Using docker: {dockerbin}")
 
-    cmd = [
-        dockerbin,
-        "run",
-        "--rm",
-        "-v",
-        f"{suite.workfolder}:/workspace",
-        docker,
-    ]
+        cmd = [
+            dockerbin,
+            "run",
+            "--rm",
+            "-v",
+            f"{suite.workfolder}:/workspace",
+            docker,
+        ]
 
     if compile:
         log.info("Compiling")
@@ -590,28 +651,21 @@ def build(suite, compile, decompile, document, test, docker):
                 json.dump(json.loads(res), f, indent=2, sort_keys=True)
         log.success("Done decompiling")
 
+    if bundle:
+        from jpamb.bundle import SuiteBundle
+
+        log.info(f"Bundling into {suite.bundle_file}")
+        SuiteBundle.write(suite, suite.bundle_file)
+        log.success("Done bundling")
+
     if document:
         log.info("Documenting")
-        opcode_counts = Counter()
-        opcode_urls = {}
-        class_opcodes = {}
-        for case in suite.cases:
-            class_opcodes[str(case.methodid.classname).split(".")[-1]] = set()
-            list_ops = []
-            for opcode in suite.method_opcodes(case.methodid):
-                index = opcode.mnemonic()  # opcode.real().split()[0]
-                list_ops.append(index)
-
-                opcode_urls[index] = (
-                    opcode.mnemonic(),
-                    opcode.url(),
-                    opcode,
-                )
+        from jpamb import columnar
 
-                opcode_counts[index] += 1
-
-            for o in list_ops:
-                class_opcodes[str(case.methodid.classname).split(".")[-1]].add(o)
+        if columnar.available():
+            opcode_counts, opcode_urls, class_opcodes = count_opcodes_columnar(suite)
+        else:
+            opcode_counts, opcode_urls, class_opcodes = count_opcodes(suite)
 
         with open("OPCODES.md", "w") as document:
             document.write("#Bytecode instructions\n")
@@ -619,21 +673,21 @@ def build(suite, compile, decompile, document, test, docker):
             document.write("| :---- | :---- | :----- | -----: |\n")
 
             for op, count in opcode_counts.most_common():
-                (mnemonic, url, opcode) = opcode_urls[op]
+                (mnemonic, url, opclass) = opcode_urls[op]
                 in_classes = ""
 
                 for classname in class_opcodes:
                     if op in class_opcodes[classname]:
                         in_classes += " " + classname
 
-                folder = Path(getsourcefile(opcode.__class__)).parent
+                folder = Path(getsourcefile(opclass)).parent
                 while folder.name != "jpamb":
                     folder = folder.parent
 
                 root = folder.parent
 
-                rel = Path(getsourcefile(opcode.__class__)).relative_to(root)
-                giturl = f"{rel}?plain=1#L{getsourcelines(opcode.__class__)[1]}"
+                rel = Path(getsourcefile(opclass)).relative_to(root)
+                giturl = f"{rel}?plain=1#L{getsourcelines(opclass)[1]}"
 
                 document.write(
                     " | ["
@@ -641,7 +695,7 @@ def build(suite, compile, decompile, document, test, docker):
                     + "]("
                     + url
                     + ") | "
-                    + f"[{opcode.__class__.__name__}]({giturl})"
+                    + f"[{opclass.__name__}]({giturl})"
                     + " | "
                     + in_classes
                     + " | "
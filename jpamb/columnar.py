@@ -0,0 +1,236 @@
+"""
+jpamb.columnar
+
+This module encodes the opcodes of methods as columns of numpy arrays, one
+row per opcode, so that queries over the bytecode of many methods, like
+"which methods invoke java.sql.Statement.executeQuery" or "how often is
+each opcode used", are vectorized operations instead of loops over
+`jvm.Opcode` objects.
+
+numpy is an optional dependency (the "stats" extra), use `available()`
+before using the tables.
+
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from jpamb import jvm
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def available() -> bool:
+    """Whether numpy is installed, which is needed to build tables."""
+    return np is not None
+
+
+# The opcode classes, in the order of their kind ids.
+KINDS: tuple[type[jvm.Opcode], ...] = tuple(
+    dict.fromkeys(decode.__self__ for decode in jvm.DECODERS.values())
+)
+KIND_IDS: dict[type[jvm.Opcode], int] = {kind: i for i, kind in enumerate(KINDS)}
+
+# The field of each opcode class which is stored as its operand.
+OPERANDS: dict[type[jvm.Opcode], str] = {
+    jvm.Push: "value",
+    jvm.NewArray: "type",
+    jvm.ArrayStore: "type",
+    jvm.ArrayLoad: "type",
+    jvm.Binary: "operant",
+    jvm.Store: "type",
+    jvm.Load: "type",
+    jvm.If: "condition",
+    jvm.Get: "field",
+    jvm.Ifz: "condition",
+    jvm.Cast: "to_",
+    jvm.New: "classname",
+    jvm.Return: "type",
+    jvm.Negate: "type",
+    jvm.InvokeVirtual: "method",
+    jvm.InvokeStatic: "method",
+    jvm.InvokeInterface: "method",
+    jvm.InvokeSpecial: "method",
+    jvm.InvokeDynamic: "method",
+}
+
+INVOKES = (
+    jvm.InvokeVirtual,
+    jvm.InvokeStatic,
+    jvm.InvokeInterface,
+    jvm.InvokeSpecial,
+    jvm.InvokeDynamic,
+)
+
+
+class Symbols:
+    """Gives each operand and mnemonic a dense id."""
+
+    def __init__(self):
+        self.values: list[object] = []
+        self.ids: dict[object, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, id: int) -> object:
+        return self.values[id]
+
+    def id(self, value: object) -> int:
+        if (id := self.ids.get(value)) is None:
+            id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return id
+
+    def get(self, value: object) -> int:
+        """The id of value, or -1 if it has no id."""
+        return self.ids.get(value, -1)
+
+
+SYMBOLS = Symbols()
+
+
+def _require():
+    if np is None:
+        raise ImportError("jpamb.columnar needs numpy, install the 'stats' extra")
+
+
+@dataclass(frozen=True)
+class OpcodeTable:
+    """The opcodes of one or more methods, as columns.
+
+    Row i is an opcode of the method `methods[method[i]]`, of class
+    `KINDS[kind[i]]`. Target and operand are -1 for opcodes without them, and
+    operand and mnemonic are ids in `symbols`.
+    """
+
+    methods: tuple[jvm.AbsMethodID, ...]
+    method: "np.ndarray"
+    kind: "np.ndarray"
+    offset: "np.ndarray"
+    target: "np.ndarray"
+    operand: "np.ndarray"
+    mnemonic: "np.ndarray"
+    symbols: Symbols = SYMBOLS
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    @staticmethod
+    def from_opcodes(
+        methodid: jvm.AbsMethodID,
+        opcodes: Iterable[jvm.Opcode],
+        symbols: Symbols = SYMBOLS,
+    ) -> "OpcodeTable":
+        _require()
+        kinds, offsets, targets, operands, mnemonics = [], [], [], [], []
+        for op in opcodes:
+            cls = type(op)
+            kinds.append(KIND_IDS[cls])
+            offsets.append(op.offset)
+            targets.append(getattr(op, "target", -1))
+            field = OPERANDS.get(cls)
+            operands.append(-1 if field is None else symbols.id(getattr(op, field)))
+            mnemonics.append(symbols.id(op.mnemonic()))
+
+        return OpcodeTable(
+            methods=(methodid,),
+            method=np.zeros(len(kinds), dtype=np.int32),
+            kind=np.array(kinds, dtype=np.uint8),
+            offset=np.array(offsets, dtype=np.int32),
+            target=np.array(targets, dtype=np.int32),
+            operand=np.array(operands, dtype=np.int32),
+            mnemonic=np.array(mnemonics, dtype=np.int32),
+            symbols=symbols,
+        )
+
+    @staticmethod
+    def concat(tables: Iterable["OpcodeTable"], symbols: Symbols = SYMBOLS):
+        """Stack the tables of several methods into one table."""
+        _require()
+        tables = list(tables)
+        assert all(t.symbols is symbols for t in tables)
+        methods = tuple(m for t in tables for m in t.methods)
+        starts = np.cumsum([0] + [len(t.methods) for t in tables[:-1]])
+
+        def column(name, dtype):
+            return np.concatenate(
+                [getattr(t, name) for t in tables] or [np.empty(0, dtype=dtype)]
+            )
+
+        return OpcodeTable(
+            methods=methods,
+            method=np.concatenate(
+                [t.method + s for t, s in zip(tables, starts)]
+                or [np.empty(0, dtype=np.int32)]
+            ).astype(np.int32),
+            kind=column("kind", np.uint8),
+            offset=column("offset", np.int32),
+            target=column("target", np.int32),
+            operand=column("operand", np.int32),
+            mnemonic=column("mnemonic", np.int32),
+            symbols=symbols,
+        )
+
+    def is_kind(self, *kinds: type[jvm.Opcode]) -> "np.ndarray":
+        """A mask of the rows of the given opcode classes."""
+        return np.isin(self.kind, [KIND_IDS[k] for k in kinds])
+
+    def methods_where(self, mask: "np.ndarray") -> list[jvm.AbsMethodID]:
+        """The methods with at least one row in mask, in table order."""
+        return [self.methods[i] for i in np.unique(self.method[mask])]
+
+    def methods_with(self, kind: type[jvm.Opcode]) -> list[jvm.AbsMethodID]:
+        return self.methods_where(self.is_kind(kind))
+
+    def methods_invoking(self, methodid: jvm.AbsMethodID) -> list[jvm.AbsMethodID]:
+        mask = self.is_kind(*INVOKES) & (self.operand == self.symbols.get(methodid))
+        return self.methods_where(mask)
+
+    def histogram(self, weights: "np.ndarray | None" = None) -> dict[type, int]:
+        """The number of opcodes of each class, optionally with a weight per
+        method."""
+        if weights is not None:
+            weights = weights[self.method]
+        counts = np.bincount(self.kind, weights=weights, minlength=len(KINDS))
+        return {KINDS[k]: int(c) for k, c in enumerate(counts) if c}
+
+
+_tables: dict[jvm.AbsMethodID, tuple[tuple[jvm.Opcode, ...], OpcodeTable]] = {}
+
+
+def method_table(suite, methodid: jvm.AbsMethodID) -> OpcodeTable:
+    """The table of a method, rebuilt when its opcodes are decoded again."""
+    opcodes = suite.method_opcodes(methodid)
+    if (cached := _tables.get(methodid)) is None or cached[0] is not opcodes:
+        cached = _tables[methodid] = (
+            opcodes,
+            OpcodeTable.from_opcodes(methodid, opcodes),
+        )
+    return cached[1]
+
+
+def suite_methods(suite) -> Iterable[jvm.AbsMethodID]:
+    """Every method with decodable opcodes in the decompiled classes."""
+    for file in sorted(suite.decompiledfiles()):
+        cn = jvm.ClassName.from_parts(
+            *file.relative_to(suite.decompiled_folder).with_suffix("").parts
+        )
+        for methodids in suite.method_index(cn).overloads.values():
+            for methodid in methodids:
+                absmethod = jvm.AbsMethodID(cn, methodid)
+                try:
+                    suite.method_opcodes(absmethod)
+                except (NotImplementedError, KeyError, TypeError):
+                    continue
+                yield absmethod
+
+
+def suite_table(suite, methods: Iterable[jvm.AbsMethodID] | None = None):
+    """The table of the given methods, by default all methods of the suite."""
+    if methods is None:
+        methods = suite_methods(suite)
+    return OpcodeTable.concat(method_table(suite, m) for m in methods)
@@ -0,0 +1,290 @@
+"""
+jpamb.datalog
+
+This module has a small Datalog engine: relations are sets of tuples with
+hash indexes on the columns rules look them up by, and rules are evaluated
+semi-naively, so each round only joins the tuples derived in the round
+before with the rest.
+
+Facts can be added after solving, and solving again only derives what
+follows from the new facts.
+
+    from jpamb import datalog
+
+    program = datalog.Program()
+    edge = program.relation("edge", 2)
+    path = program.relation("path", 2)
+    X, Y, Z = datalog.variables("X Y Z")
+    program.rule(path(X, Y), edge(X, Y))
+    program.rule(path(X, Z), path(X, Y), edge(Y, Z))
+
+    program.add(edge, [(1, 2), (2, 3)])
+    program.solve()
+    assert (1, 3) in path
+
+Rules are Horn clauses without negation, and every variable of the head
+must occur in the body.
+
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+
+class Var:
+    """A variable of a rule."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+def variables(names: str) -> tuple[Var, ...]:
+    """Variables by their space separated names."""
+    return tuple(Var(name) for name in names.split())
+
+
+@dataclass(frozen=True)
+class Atom:
+    relation: "Relation"
+    terms: tuple
+
+    def __repr__(self) -> str:
+        return f"{self.relation.name}({', '.join(map(repr, self.terms))})"
+
+
+class Relation:
+    """A set of tuples of the same arity, with an index for each set of
+    columns the rules look the tuples up by."""
+
+    def __init__(self, name: str, arity: int):
+        self.name = name
+        self.arity = arity
+        self.tuples: set[tuple] = set()
+        self._indexes: dict[tuple[int, ...], dict[tuple, list[tuple]]] = {}
+
+    def __call__(self, *terms) -> Atom:
+        if len(terms) != self.arity:
+            raise ValueError(f"{self.name} has arity {self.arity}, not {len(terms)}")
+        return Atom(self, terms)
+
+    def __len__(self) -> int:
+        return len(self.tuples)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self.tuples)
+
+    def __contains__(self, t: tuple) -> bool:
+        return t in self.tuples
+
+    def __repr__(self) -> str:
+        return f"Relation({self.name!r}, {len(self)} tuples)"
+
+    def index(self, columns: tuple[int, ...]) -> dict[tuple, list[tuple]]:
+        """The tuples by their values in columns, kept up to date."""
+        if (index := self._indexes.get(columns)) is None:
+            index = self._indexes[columns] = defaultdict(list)
+            for t in self.tuples:
+                index[tuple(t[c] for c in columns)].append(t)
+        return index
+
+    def lookup(self, columns: tuple[int, ...], key: tuple) -> list[tuple]:
+        return self.index(columns).get(key, ())
+
+    def _insert(self, t: tuple) -> bool:
+        if t in self.tuples:
+            return False
+        self.tuples.add(t)
+        for columns, index in self._indexes.items():
+            index[tuple(t[c] for c in columns)].append(t)
+        return True
+
+
+class _Step:
+    """Matching one atom of a rule body against a relation, given the
+    variables bound by the steps before it."""
+
+    __slots__ = ("relation", "columns", "key", "binds", "checks")
+
+    def __init__(self, atom: Atom, bound: dict[Var, int], slots: dict[Var, int]):
+        self.relation = atom.relation
+        columns, key, binds, checks = [], [], [], []
+        seen: dict[Var, int] = {}
+        for column, term in enumerate(atom.terms):
+            if not isinstance(term, Var):
+                columns.append(column)
+                key.append((False, term))
+            elif term in bound:
+                columns.append(column)
+                key.append((True, bound[term]))
+            elif term in seen:
+                checks.append((column, seen[term]))
+            else:
+                seen[term] = column
+                binds.append((column, slots[term]))
+        for var in seen:
+            bound[var] = slots[var]
+        self.columns = tuple(columns)
+        self.key = tuple(key)
+        self.binds = tuple(binds)
+        self.checks = tuple(checks)
+
+    def matches(
+        self, env: list, tuples: Iterable[tuple] | None = None
+    ) -> Iterable[tuple]:
+        """The tuples matching the bound variables, all of them if tuples
+        are given, otherwise looked up in the relation."""
+        if self.columns:
+            key = tuple([env[v] if is_var else v for is_var, v in self.key])
+            if tuples is None:
+                index = self.relation._indexes.get(self.columns)
+                if index is None:
+                    index = self.relation.index(self.columns)
+                tuples = index.get(key, ())
+            else:
+                columns = self.columns
+                tuples = [t for t in tuples if tuple([t[c] for c in columns]) == key]
+        elif tuples is None:
+            tuples = self.relation.tuples
+        if self.checks:
+            checks = self.checks
+            tuples = [t for t in tuples if all(t[a] == t[b] for a, b in checks)]
+        return tuples
+
+
+class Rule:
+    """head :- body, with a join plan for each body atom taking the new
+    tuples of a round."""
+
+    def __init__(self, head: Atom, body: Iterable[Atom]):
+        self.head = head
+        self.body = tuple(body)
+        if not self.body:
+            raise ValueError(f"Rule {head} has an empty body, add it as a fact")
+        slots: dict[Var, int] = {}
+        for atom in self.body:
+            for term in atom.terms:
+                if isinstance(term, Var):
+                    slots.setdefault(term, len(slots))
+        for term in head.terms:
+            if isinstance(term, Var) and term not in slots:
+                raise ValueError(
+                    f"Variable {term} of {head} does not occur in the body"
+                )
+        self.slots = slots
+        self._head = tuple(
+            (True, slots[t]) if isinstance(t, Var) else (False, t) for t in head.terms
+        )
+        self.plans = [self._plan(i) for i in range(len(self.body))]
+
+    def _plan(self, first: int) -> list[_Step]:
+        """The steps starting with body atom first, followed by the atom
+        with the most bound terms, so later steps are index lookups."""
+        bound: dict[Var, int] = {}
+        steps = [_Step(self.body[first], bound, self.slots)]
+        rest = [a for i, a in enumerate(self.body) if i != first]
+        while rest:
+            atom = max(
+                rest,
+                key=lambda a: sum(
+                    not isinstance(t, Var) or t in bound for t in a.terms
+                ),
+            )
+            rest.remove(atom)
+            steps.append(_Step(atom, bound, self.slots))
+        return steps
+
+    def derive(self, first: int, delta: Iterable[tuple]) -> list[tuple]:
+        """The head tuples from the tuples delta of body atom first, joined
+        with the relations of the other atoms."""
+        steps = self.plans[first]
+        env: list[Any] = [None] * len(self.slots)
+        head = self._head
+        last = len(steps) - 1
+        derived: list[tuple] = []
+
+        def join(i: int, tuples):
+            step = steps[i]
+            binds = step.binds
+            for t in step.matches(env, tuples):
+                for column, slot in binds:
+                    env[slot] = t[column]
+                if i == last:
+                    derived.append(
+                        tuple([env[v] if is_var else v for is_var, v in head])
+                    )
+                else:
+                    join(i + 1, None)
+
+        join(0, delta)
+        return derived
+
+    def __repr__(self) -> str:
+        return f"{self.head} :- {', '.join(map(repr, self.body))}."
+
+
+@dataclass
+class SolveStats:
+    rounds: int = 0  # Rounds of semi-naive evaluation
+    derived: int = 0  # New tuples derived by the rules
+    added: int = 0  # Facts added since the last solve
+
+
+class Program:
+    """Relations and the rules deriving them."""
+
+    def __init__(self):
+        self.relations: dict[str, Relation] = {}
+        self.rules: list[Rule] = []
+        self.stats = SolveStats()
+        self._by_relation: dict[Relation, list[tuple[Rule, int]]] = defaultdict(list)
+        self._delta: dict[Relation, list[tuple]] = defaultdict(list)
+
+    def relation(self, name: str, arity: int) -> Relation:
+        if (relation := self.relations.get(name)) is None:
+            relation = self.relations[name] = Relation(name, arity)
+        elif relation.arity != arity:
+            raise ValueError(f"{name} has arity {relation.arity}, not {arity}")
+        return relation
+
+    def rule(self, head: Atom, *body: Atom) -> Rule:
+        rule = Rule(head, body)
+        self.rules.append(rule)
+        for i, atom in enumerate(rule.body):
+            self._by_relation[atom.relation].append((rule, i))
+        # The tuples already there are new to the rule
+        for relation in {atom.relation for atom in rule.body}:
+            self._delta[relation] = list(relation.tuples)
+        return rule
+
+    def add(self, relation: Relation, tuples: Iterable[tuple]):
+        """Add facts, which the rules see at the next `solve`."""
+        delta = self._delta[relation]
+        for t in tuples:
+            if len(t) != relation.arity:
+                raise ValueError(f"{relation.name} has arity {relation.arity}: {t!r}")
+            if relation._insert(t):
+                delta.append(t)
+                self.stats.added += 1
+
+    def solve(self):
+        """Derive tuples until none are new, starting from the ones added
+        since the last call."""
+        delta, self._delta = self._delta, defaultdict(list)
+        while any(delta.values()):
+            self.stats.rounds += 1
+            new: dict[Relation, list[tuple]] = defaultdict(list)
+            for relation, tuples in delta.items():
+                for rule, i in self._by_relation.get(relation, ()):
+                    target = rule.head.relation
+                    # The join reads the relations, so insert afterwards
+                    for t in rule.derive(i, tuples):
+                        if target._insert(t):
+                            new[target].append(t)
+                            self.stats.derived += 1
+            delta = new
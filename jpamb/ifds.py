@@ -0,0 +1,183 @@
+"""
+jpamb.ifds
+
+This module has a tabulation solver for IFDS problems, interprocedural
+data-flow problems over finite sets of facts with distributive flow
+functions, by Reps, Horwitz and Sagiv's "Precise Interprocedural Dataflow
+Analysis via Graph Reachability", in the variant of Naeem, Lhoták and
+Rodriguez which discovers the methods as it goes.
+
+An analysis describes its facts and flow functions as a `Problem`. The
+solver memoizes path edges, a fact d2 holding at node n of a method when
+fact d1 held at its start, and end summaries, the facts at the exits of a
+method for each fact at its start. A method is analyzed once for each fact
+it is entered with, whatever the call chain, so the analysis is context
+sensitive in polynomial time.
+
+    from jpamb import ifds
+
+    solver = ifds.Solver(problem)
+    solver.solve({start: [problem.zero]})
+    solver.facts(node)
+
+Nodes and facts can be any hashable values.
+
+"""
+
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Hashable, Iterable
+
+Node = Hashable
+Fact = Hashable
+Method = Hashable
+
+
+class Problem:
+    """The flow graph and the flow functions of an IFDS analysis.
+
+    Flow functions map one fact before a node to the facts after it, and
+    must map `zero`, the fact which always holds, to itself.
+    """
+
+    zero: Fact = None
+
+    def method_of(self, node: Node) -> Method:
+        raise NotImplementedError()
+
+    def start(self, method: Method) -> Node:
+        raise NotImplementedError()
+
+    def successors(self, node: Node) -> Iterable[Node]:
+        """The nodes after node in its method, none for calls."""
+        raise NotImplementedError()
+
+    def callees(self, node: Node) -> Iterable[Method]:
+        """The methods a node calls, if it is a call node."""
+        raise NotImplementedError()
+
+    def return_site(self, call: Node) -> Node:
+        raise NotImplementedError()
+
+    def is_exit(self, node: Node) -> bool:
+        raise NotImplementedError()
+
+    def normal_flow(self, node: Node, fact: Fact) -> Iterable[Fact]:
+        raise NotImplementedError()
+
+    def call_flow(self, call: Node, callee: Method, fact: Fact) -> Iterable[Fact]:
+        """The facts at the start of callee from a fact before call."""
+        raise NotImplementedError()
+
+    def return_flow(
+        self, call: Node, callee: Method, exit: Node, fact: Fact
+    ) -> Iterable[Fact]:
+        """The facts at the return site of call from a fact at an exit of
+        callee."""
+        raise NotImplementedError()
+
+    def call_to_return_flow(self, call: Node, fact: Fact) -> Iterable[Fact]:
+        """The facts at the return site of call which do not go through
+        the callees, like the locals of the caller."""
+        raise NotImplementedError()
+
+
+@dataclass
+class SolverStats:
+    path_edges: int = 0  # Distinct (d1, n, d2) edges
+    propagations: int = 0  # Path edges popped from the worklist
+    summaries: int = 0  # Distinct end summaries (method, d1, exit, d2)
+    summary_uses: int = 0  # End summaries applied at a call site
+    entries: int = 0  # Distinct (method, fact) a method is entered with
+
+    def __str__(self):
+        return (
+            f"{self.path_edges} path edges, {self.entries} method entries, "
+            f"{self.summaries} summaries used {self.summary_uses} times"
+        )
+
+
+class Solver:
+    """The tabulation algorithm for a problem."""
+
+    def __init__(self, problem: Problem, stats: SolverStats | None = None):
+        self.problem = problem
+        self.stats = SolverStats() if stats is None else stats
+        # node -> fact at node -> facts at the start of its method
+        self._path_edges: dict[Node, dict[Fact, set[Fact]]] = defaultdict(dict)
+        # (method, fact at start) -> {(exit, fact at exit)}
+        self._end_summaries: dict[tuple, set[tuple]] = defaultdict(set)
+        # (method, fact at start) -> {(call, fact at caller start, fact at call)}
+        self._incoming: dict[tuple, set[tuple]] = defaultdict(set)
+        self._worklist: deque[tuple] = deque()
+
+    def facts(self, node: Node) -> set[Fact]:
+        """The facts which may hold before node."""
+        return set(self._path_edges.get(node, ()))
+
+    def nodes(self) -> Iterable[Node]:
+        """The nodes reached by the analysis."""
+        return self._path_edges.keys()
+
+    def solve(self, seeds: dict[Node, Iterable[Fact]]):
+        """Propagate the facts holding at the seed nodes, which are the
+        starts of their methods, to a fixed point."""
+        for node, facts in seeds.items():
+            for fact in facts:
+                self._propagate(self.problem.zero, node, fact)
+        self._run()
+
+    def _propagate(self, d1: Fact, node: Node, d2: Fact):
+        sources = self._path_edges[node].setdefault(d2, set())
+        if d1 not in sources:
+            sources.add(d1)
+            self.stats.path_edges += 1
+            self._worklist.append((d1, node, d2))
+
+    def _run(self):
+        problem = self.problem
+        while self._worklist:
+            d1, node, d2 = self._worklist.popleft()
+            self.stats.propagations += 1
+            callees = problem.callees(node)
+            if callees:
+                self._call(d1, node, d2, callees)
+            elif problem.is_exit(node):
+                self._exit(d1, node, d2)
+            else:
+                for d3 in problem.normal_flow(node, d2):
+                    for succ in problem.successors(node):
+                        self._propagate(d1, succ, d3)
+
+    def _call(self, d1: Fact, call: Node, d2: Fact, callees: Iterable[Method]):
+        problem = self.problem
+        ret = problem.return_site(call)
+        for callee in callees:
+            start = problem.start(callee)
+            for d3 in problem.call_flow(call, callee, d2):
+                key = (callee, d3)
+                if key not in self._incoming:
+                    self.stats.entries += 1
+                self._incoming[key].add((call, d1, d2))
+                self._propagate(d3, start, d3)
+                for exit, d4 in list(self._end_summaries.get(key, ())):
+                    self.stats.summary_uses += 1
+                    for d5 in problem.return_flow(call, callee, exit, d4):
+                        self._propagate(d1, ret, d5)
+        for d3 in problem.call_to_return_flow(call, d2):
+            self._propagate(d1, ret, d3)
+
+    def _exit(self, d1: Fact, exit: Node, d2: Fact):
+        problem = self.problem
+        method = problem.method_of(exit)
+        key = (method, d1)
+        summary = (exit, d2)
+        if summary in self._end_summaries[key]:
+            return
+        self._end_summaries[key].add(summary)
+        self.stats.summaries += 1
+        for call, caller_d1, _ in list(self._incoming.get(key, ())):
+            self.stats.summary_uses += 1
+            ret = problem.return_site(call)
+            for d5 in problem.return_flow(call, method, exit, d2):
+                self._propagate(caller_d1, ret, d5)
@@ -11,19 +11,91 @@ from jpamb import jvm
 """
 
 from collections import namedtuple
-from functools import total_ordering
 import re
+import weakref
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Callable, Protocol, Self, Iterable, Optional, Iterator, NoReturn
 
 
-@dataclass(frozen=True, order=True)
-class ClassName:
+class Interned:
+    """A value which is shared by all equal instances.
+
+    Subclasses are dataclasses with `init=False, eq=False`, which call
+    `_intern` from `__new__` with their fields, and get the existing instance
+    if there is one. Since equal values are the same object, equality is
+    identity, and the hash, the encoding and the sort key are computed once.
+    The hash is that of the sort key, so it does not depend on where the
+    value is in memory and stays the same when it is pickled and unpickled.
+    The instances are held weakly, so unused values are collected.
+    """
+
+    __slots__ = ("__weakref__", "_hash", "_encoded", "_sort_key")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _intern(cls, *key) -> Self:
+        if (self := cls._interned.get(key)) is None:
+            self = object.__new__(cls)
+            for f, value in zip(fields(cls), key):
+                object.__setattr__(self, f.name, value)
+            object.__setattr__(self, "_encoded", None)
+            object.__setattr__(self, "_sort_key", self._make_sort_key())
+            object.__setattr__(self, "_hash", hash(self._sort_key))
+            self = cls._interned.setdefault(key, self)
+        return self
+
+    def _make_sort_key(self) -> tuple | str:
+        raise NotImplementedError()
+
+    def sort_key(self) -> tuple | str:
+        return self._sort_key
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, f.name) for f in fields(self)))
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+    def __lt__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._sort_key < other._sort_key
+
+    def __le__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._sort_key <= other._sort_key
+
+    def __gt__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._sort_key > other._sort_key
+
+    def __ge__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._sort_key >= other._sort_key
+
+
+@dataclass(frozen=True, slots=True, init=False, eq=False)
+class ClassName(Interned):
     """The name of a class, inner classes must use the $ syntax"""
 
     _as_string: str
 
+    def __new__(cls, _as_string: str):
+        return cls._intern(_as_string)
+
+    def _make_sort_key(self) -> str:
+        return self._as_string
+
     @property
     def packages(self) -> list[str]:
         """Get a list of packages"""
@@ -68,9 +140,14 @@ class ClassName:
         return ClassName(".".join(args))
 
 
-@total_ordering
 class Type(ABC):
-    """A jvm type"""
+    """A jvm type
+
+    Types are interned, so two types are equal if they are the same object.
+    Types are ordered by their encoding, which is computed once.
+    """
+
+    __slots__ = ("_sort_key",)
 
     @abstractmethod
     def encode(self) -> str: ...
@@ -123,11 +200,39 @@ class Type(ABC):
 
         return r, input[i + 1 :]
 
-    def __lt__(self, other):
-        return self.encode() <= other.encode()
+    def sort_key(self) -> str:
+        try:
+            return self._sort_key
+        except AttributeError:
+            key = self.encode()
+            object.__setattr__(self, "_sort_key", key)
+            return key
 
     def __eq__(self, other):
-        return self.encode() <= other.encode()
+        return self is other
+
+    def __hash__(self):
+        return hash(self.sort_key())
+
+    def __lt__(self, other):
+        if not isinstance(other, Type):
+            return NotImplemented
+        return self.sort_key() < other.sort_key()
+
+    def __le__(self, other):
+        if not isinstance(other, Type):
+            return NotImplemented
+        return self is other or self.sort_key() < other.sort_key()
+
+    def __gt__(self, other):
+        if not isinstance(other, Type):
+            return NotImplemented
+        return self.sort_key() > other.sort_key()
+
+    def __ge__(self, other):
+        if not isinstance(other, Type):
+            return NotImplemented
+        return self is other or self.sort_key() > other.sort_key()
 
     @staticmethod
     def from_json(json: str) -> "Type":
@@ -167,14 +272,13 @@ class Type(ABC):
         return self.encode()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class StackType(Type):
-
     def is_stacktype(self):
         return True
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Boolean(Type):
     """
     A boolean
@@ -184,7 +288,7 @@ class Boolean(Type):
 
     def __new__(cls) -> "Boolean":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -194,7 +298,7 @@ class Boolean(Type):
         return "bool"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Int(StackType):
     """
     A 32bit signed integer
@@ -204,7 +308,7 @@ class Int(StackType):
 
     def __new__(cls) -> "Int":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -214,7 +318,7 @@ class Int(StackType):
         return "int"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Byte(Type):
     """
     An 8bit signed integer
@@ -224,7 +328,7 @@ class Byte(Type):
 
     def __new__(cls) -> "Byte":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -234,7 +338,7 @@ class Byte(Type):
         return "byte"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Char(Type):
     """
     An 16bit character
@@ -244,7 +348,7 @@ class Char(Type):
 
     def __new__(cls) -> "Char":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -254,7 +358,7 @@ class Char(Type):
         return "char"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Short(Type):
     """
     An 16bit signed integer
@@ -264,7 +368,7 @@ class Short(Type):
 
     def __new__(cls) -> "Short":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -274,7 +378,7 @@ class Short(Type):
         return "short"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Reference(StackType):
     """An unknown reference"""
 
@@ -282,7 +386,7 @@ class Reference(StackType):
 
     def __new__(cls) -> "Reference":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -292,7 +396,7 @@ class Reference(StackType):
         return "ref"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Object(Type):
     """
     A reference to an object of an known class.
@@ -302,7 +406,7 @@ class Object(Type):
 
     def __new__(cls, subtype) -> "Object":
         if subtype not in cls._instance:
-            cls._instance[subtype] = super().__new__(cls)
+            cls._instance[subtype] = object.__new__(cls)
         return cls._instance[subtype]
 
     name: ClassName
@@ -310,6 +414,9 @@ class Object(Type):
     def __post_init__(self):
         assert self.name is not None
 
+    def __getnewargs__(self):
+        return (self.name,)
+
     def encode(self):
         return "L" + self.name.slashed() + ";"  # ]
 
@@ -317,7 +424,7 @@ class Object(Type):
         return f"object {self.name}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Array(Type):
     """
     A reference to an array of known type
@@ -327,7 +434,7 @@ class Array(Type):
 
     def __new__(cls, subtype) -> "Array":
         if subtype not in cls._instance:
-            cls._instance[subtype] = super().__new__(cls)
+            cls._instance[subtype] = object.__new__(cls)
         return cls._instance[subtype]
 
     contains: Type
@@ -335,6 +442,9 @@ class Array(Type):
     def __post_init__(self):
         assert self.contains is not None
 
+    def __getnewargs__(self):
+        return (self.contains,)
+
     def encode(self):
         return "[" + self.contains.encode()  # ]
 
@@ -342,7 +452,7 @@ class Array(Type):
         return f"array {self.contains.math()}"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Long(StackType):
     """
     A 64bit signed integer
@@ -352,7 +462,7 @@ class Long(StackType):
 
     def __new__(cls) -> "Long":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -362,7 +472,7 @@ class Long(StackType):
         return "long"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Float(Type):
     """
     A 32bit floating point number
@@ -372,7 +482,7 @@ class Float(Type):
 
     def __new__(cls) -> "Float":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -382,7 +492,7 @@ class Float(Type):
         return "float"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Double(StackType):
     """
     A 64bit floating point number
@@ -392,7 +502,7 @@ class Double(StackType):
 
     def __new__(cls) -> "Double":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = object.__new__(cls)
         return cls._instance
 
     def encode(self):
@@ -402,23 +512,32 @@ class Double(StackType):
         return "double"
 
 
-@dataclass(frozen=True, order=True)
-class ParameterType:
+@dataclass(frozen=True, slots=True, init=False, eq=False)
+class ParameterType(Interned):
     """A list of parameters types"""
 
     _elements: tuple[Type, ...]
 
+    def __new__(cls, _elements: tuple[Type, ...]):
+        return cls._intern(_elements)
+
+    def _make_sort_key(self) -> tuple:
+        return tuple(e.sort_key() for e in self._elements)
+
     def __getitem__(self, index):
         return self._elements.__getitem__(index)
 
     def __len__(self):
         return self._elements.__len__()
-    
+
     def __iter__(self):
         return self._elements.__iter__()
 
     def encode(self):
-        return "".join(e.encode() for e in self._elements)
+        if (encoded := self._encoded) is None:
+            encoded = "".join(e.encode() for e in self._elements)
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded
 
     @staticmethod
     def decode(input: str) -> "ParameterType":
@@ -449,14 +568,21 @@ METHOD_ID_RE_RAW = r"(?P<method_name>.*)\:\((?P<params>.*)\)(?P<return>.*)"
 METHOD_ID_RE = re.compile(METHOD_ID_RE_RAW)
 
 
-@dataclass(frozen=True, order=True)
-class MethodID:
+@dataclass(frozen=True, slots=True, init=False, eq=False)
+class MethodID(Interned):
     """A method ID consist of a name, a list of parameter types and a return type."""
 
     name: str
     params: ParameterType
     return_type: Type | None
 
+    def __new__(cls, name: str, params: ParameterType, return_type: Type | None):
+        return cls._intern(name, params, return_type)
+
+    def _make_sort_key(self) -> tuple:
+        rt = self.return_type.sort_key() if self.return_type is not None else ""
+        return (self.name, self.params.sort_key(), rt)
+
     @staticmethod
     def decode(input: str):
         if (match := METHOD_ID_RE.match(input)) is None:
@@ -477,11 +603,14 @@ class MethodID:
         )
 
     def encode(self) -> str:
-        rt = self.return_type.encode() if self.return_type is not None else "V"
-        return f"{self.name}:({self.params.encode()}){rt}"
+        if (encoded := self._encoded) is None:
+            rt = self.return_type.encode() if self.return_type is not None else "V"
+            encoded = f"{self.name}:({self.params.encode()}){rt}"
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class FieldID:
     """A field ID consists of a name and a type."""
 
@@ -491,6 +620,9 @@ class FieldID:
     def encode(self) -> str:
         return f"{self.name}:{self.type.encode()}"
 
+    def sort_key(self) -> tuple:
+        return (self.name, self.type.sort_key())
+
     @staticmethod
     def decode(input: str) -> "FieldID":
         if ":" not in input:
@@ -512,15 +644,19 @@ class Encodable(Protocol):
 ABSOLUTE_RE = re.compile(r"(?P<class_name>.+)\.(?P<rest>.*)")
 
 
-@dataclass(frozen=True, order=True)
-class Absolute[T: Encodable](ABC):
+@dataclass(frozen=True, slots=True, init=False, eq=False)
+class Absolute[T: Encodable](Interned, ABC):
     classname: ClassName
     extension: T
 
-    def __post_init__(self):
-        assert (
-            self.__class__ != Absolute
-        ), "Do not use absolute directly, use AbsMethodId or AbsFieldID"
+    def __new__(cls, classname: ClassName, extension: T):
+        assert cls is not Absolute, (
+            "Do not use absolute directly, use AbsMethodId or AbsFieldID"
+        )
+        return cls._intern(classname, extension)
+
+    def _make_sort_key(self) -> tuple:
+        return (self.classname.sort_key(), self.extension.sort_key())
 
     @classmethod
     def decode(cls, input, decode: Callable[[str], T]) -> "Self":
@@ -530,13 +666,17 @@ class Absolute[T: Encodable](ABC):
         return cls(ClassName.decode(match["class_name"]), decode(match["rest"]))
 
     def encode(self) -> str:
-        return f"{self.classname.encode()}.{self.extension.encode()}"
+        if (encoded := self._encoded) is None:
+            encoded = f"{self.classname.encode()}.{self.extension.encode()}"
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded
 
     def __str__(self):
         return self.encode()
 
 
 class AbsMethodID(Absolute[MethodID]):
+    __slots__ = ()
 
     @classmethod
     def decode(cls, input) -> "Self":
@@ -550,6 +690,9 @@ class AbsMethodID(Absolute[MethodID]):
     def from_json(cls, json: dict) -> "Self":
         # For invokedynamic, there's no "ref" field, use a default classname
         if "ref" in json:
+            if json["ref"].get("kind") == "array":
+                # methods of arrays, like clone, have no class to name them
+                raise NotImplementedError(f"Unhandled method of an array {json!r}")
             classname = ClassName.decode(json["ref"]["name"])
         else:
             # invokedynamic doesn't have a ref - use method name as classname
@@ -570,6 +713,7 @@ class AbsMethodID(Absolute[MethodID]):
 
 
 class AbsFieldID(Absolute[FieldID]):
+    __slots__ = ()
 
     @classmethod
     def decode(cls, input) -> "Self":
@@ -580,7 +724,7 @@ class AbsFieldID(Absolute[FieldID]):
         return self.extension
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Value:
     type: Type
     value: object
@@ -659,6 +803,20 @@ class Value:
 @dataclass
 class ValueParser:
     Token = namedtuple("Token", "kind value")
+    TOKEN_RE = re.compile(
+        "|".join(
+            f"(?P<{n}>{m})"
+            for n, m in [
+                ("OPEN_ARRAY", r"\[[IC]:"),
+                ("CLOSE_ARRAY", r"\]"),
+                ("INT", r"-?\d+"),
+                ("BOOL", r"true|false"),
+                ("CHAR", r"'[^']'"),
+                ("COMMA", r","),
+                ("SKIP", r"[ \t]+"),
+            ]
+        )
+    )
 
     input: str
     head: Optional["ValueParser.Token"]
@@ -671,18 +829,7 @@ class ValueParser:
 
     @staticmethod
     def tokenize(string):
-        token_specification = [
-            ("OPEN_ARRAY", r"\[[IC]:"),
-            ("CLOSE_ARRAY", r"\]"),
-            ("INT", r"-?\d+"),
-            ("BOOL", r"true|false"),
-            ("CHAR", r"'[^']'"),
-            ("COMMA", r","),
-            ("SKIP", r"[ \t]+"),
-        ]
-        tok_regex = "|".join(f"(?P<{n}>{m})" for n, m in token_specification)
-
-        for m in re.finditer(tok_regex, string):
+        for m in ValueParser.TOKEN_RE.finditer(string):
             kind, value = m.lastgroup, m.group()
             if kind == "SKIP":
                 continue
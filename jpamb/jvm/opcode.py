@@ -9,7 +9,7 @@ each instruction.
 
 from dataclasses import dataclass, fields
 from abc import ABC, abstractmethod
-from typing import Self
+from typing import Callable, ClassVar, Self
 
 import enum
 import sys
@@ -19,13 +19,19 @@ from jpamb.jvm import base as jvm
 logger.add(sys.stderr, format="[{level}] {message}")
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Opcode(ABC):
     """An opcode, as parsed from the jvm2json output."""
 
     offset: int
 
+    # Check the types of the fields on construction. Analyzers turn this off,
+    # as the opcodes are built from trusted jvm2json output.
+    strict: ClassVar[bool] = True
+
     def __post_init__(self):
+        if not Opcode.strict:
+            return
         for f in fields(self):
             v = getattr(self, f.name)
             assert isinstance(v, f.type), (
@@ -34,69 +40,16 @@ class Opcode(ABC):
 
     @classmethod
     def from_json(cls, json: dict) -> "Opcode":
-        match json["opr"]:
-            case "push":
-                opr = Push
-            case "newarray":
-                opr = NewArray
-            case "dup":
-                opr = Dup
-            case "array_store":
-                opr = ArrayStore
-            case "array_load":
-                opr = ArrayLoad
-            case "binary":
-                opr = Binary
-            case "store":
-                opr = Store
-            case "load":
-                opr = Load
-            case "arraylength":
-                opr = ArrayLength
-            case "if":
-                opr = If
-            case "get":
-                opr = Get
-            case "ifz":
-                opr = Ifz
-            case "cast":
-                opr = Cast
-            case "new":
-                opr = New
-            case "throw":
-                opr = Throw
-            case "incr":
-                opr = Incr
-            case "goto":
-                opr = Goto
-            case "return":
-                opr = Return
-            case "pop":
-                opr = Pop
-            case "negate":
-                opr = Negate
-            case "invoke":
-                match json["access"]:
-                    case "virtual":
-                        opr = InvokeVirtual
-                    case "static":
-                        opr = InvokeStatic
-                    case "interface":
-                        opr = InvokeInterface
-                    case "special":
-                        opr = InvokeSpecial
-                    case "dynamic":
-                        opr = InvokeDynamic
-                    case access:
-                        raise NotImplementedError(
-                            f"Unhandled invoke access {access!r} (implement yourself)"
-                        )
-            case opr:
+        opr = json["opr"]
+        key = (opr, json["access"]) if opr == "invoke" else opr
+        if (decode := DECODERS.get(key)) is None:
+            if opr == "invoke":
                 raise NotImplementedError(
-                    f"Unhandled opcode {opr!r} (implement yourself)"
+                    f"Unhandled invoke access {key[1]!r} (implement yourself)"
                 )
+            raise NotImplementedError(f"Unhandled opcode {opr!r} (implement yourself)")
         try:
-            return opr.from_json(json)
+            return decode(json)
         except NotImplementedError as e:
             raise NotImplementedError(f"Unhandled opcode {json!r}") from e
 
@@ -113,13 +66,17 @@ class Opcode(ABC):
     def mnemonic(self) -> str: ...
 
     def url(self) -> str:
+        return Opcode.url_of(self.mnemonic())
+
+    @staticmethod
+    def url_of(mnemonic: str) -> str:
         return (
             "https://docs.oracle.com/javase/specs/jvms/se23/html/jvms-6.html#jvms-6.5."
-            + self.mnemonic()
+            + mnemonic
         )
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Push(Opcode):
     """The push opcode"""
 
@@ -183,7 +140,7 @@ class Push(Opcode):
         return f"push:{self.value.type} {self.value.value}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Negate(Opcode):
     """The new array opcode"""
 
@@ -208,7 +165,7 @@ class Negate(Opcode):
         return self.real()
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class NewArray(Opcode):
     """The new array opcode"""
 
@@ -247,7 +204,7 @@ class NewArray(Opcode):
         return f"newarray[{self.dim}D] {self.type}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Dup(Opcode):
     """The dublicate the stack opcode"""
 
@@ -263,7 +220,7 @@ class Dup(Opcode):
     def real(self) -> str:
         if self.words == 1:
             return "dup"
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         semantic = """
@@ -281,7 +238,7 @@ class Dup(Opcode):
         return f"dup {self.words}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Pop(Opcode):
     """The pop stack opcode"""
 
@@ -297,7 +254,7 @@ class Pop(Opcode):
     def real(self) -> str:
         if self.words == 1:
             return "pop"
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         semantic = """
@@ -315,7 +272,7 @@ class Pop(Opcode):
         return f"pop {self.words}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class ArrayStore(Opcode):
     """The Array Store command that stores a value in the array."""
 
@@ -335,7 +292,7 @@ class ArrayStore(Opcode):
             case jvm.Int():
                 return "iastore"
 
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         return None
@@ -347,7 +304,7 @@ class ArrayStore(Opcode):
         return f"array_store {self.type}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Cast(Opcode):
     """Cast one type to another"""
 
@@ -369,7 +326,7 @@ class Cast(Opcode):
                     case jvm.Short():
                         return "i2s"
 
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         return None
@@ -381,7 +338,7 @@ class Cast(Opcode):
         return f"cast {self.from_} {self.to_}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class ArrayLoad(Opcode):
     """The Array Load command that load a value from the array."""
 
@@ -403,7 +360,7 @@ class ArrayLoad(Opcode):
             case jvm.Char():
                 return "caload"
 
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         return None
@@ -415,7 +372,7 @@ class ArrayLoad(Opcode):
         return f"array_load:{self.type}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class ArrayLength(Opcode):
     """
     arraylength:
@@ -449,7 +406,7 @@ class ArrayLength(Opcode):
         return "arraylength"
 
 
-@dataclass(frozen=True, order=True)  # make it work for
+@dataclass(frozen=True, order=True, slots=True)  # make it work for
 class InvokeVirtual(Opcode):
     """The invoke virtual opcode for calling instance methods"""
 
@@ -484,7 +441,7 @@ class InvokeVirtual(Opcode):
         return f"invoke virtual {self.method}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class InvokeStatic(Opcode):
     """The invoke static opcode for calling static methods"""
 
@@ -519,7 +476,7 @@ class InvokeStatic(Opcode):
         return f"invoke static {self.method}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class InvokeInterface(Opcode):
     """The invoke interface opcode for calling interface methods"""
 
@@ -557,7 +514,7 @@ class InvokeInterface(Opcode):
         return f"invoke interface {self.method} (stack_size={self.stack_size})"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class InvokeSpecial(Opcode):
     """The invoke special opcode for calling constructors, private methods,
     and superclass methods.
@@ -607,7 +564,7 @@ class InvokeSpecial(Opcode):
         return f"invoke special{interface_str} {self.method}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class InvokeDynamic(Opcode):
     """The invoke dynamic opcode for dynamic method invocation.
 
@@ -643,7 +600,7 @@ class InvokeDynamic(Opcode):
         return f"invoke dynamic {self.method}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Store(Opcode):
     """The store opcode that stores values to local variables"""
 
@@ -665,7 +622,7 @@ class Store(Opcode):
         # Handle integer type
         elif isinstance(self.type, jvm.Int):
             return f"istore_{self.index}" if self.index < 4 else f"istore {self.index}"
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         return None
@@ -711,7 +668,7 @@ class BinaryOpr(enum.Enum):
         return self.name.lower()
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Binary(Opcode):
     type: jvm.Type
     operant: BinaryOpr
@@ -748,7 +705,7 @@ class Binary(Opcode):
         return self.real()
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Load(Opcode):
     """The load opcode that loads values from local variables"""
 
@@ -770,7 +727,7 @@ class Load(Opcode):
         # Handle integer type
         elif isinstance(self.type, jvm.Int):
             return f"iload_{self.index}" if self.index < 4 else f"iload {self.index}"
-        return super().real()
+        return Opcode.real(self)
 
     def semantics(self) -> str | None:
         return None
@@ -787,7 +744,7 @@ class Load(Opcode):
         return f"load:{self.type} {self.index}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class If(Opcode):
     """The if opcode that performs conditional jumps based on comparison of two values.
 
@@ -852,7 +809,7 @@ class If(Opcode):
         return f"if {self.condition} {self.target}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Get(Opcode):
     """The get opcode that retrieves field values (static or instance).
 
@@ -913,7 +870,7 @@ class Get(Opcode):
         return f"get {kind} {self.field}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Ifz(Opcode):
     """The ifz opcode that performs conditional jumps based on comparison with zero/null.
 
@@ -981,7 +938,7 @@ class Ifz(Opcode):
         return f"ifz {self.condition} {self.target}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class New(Opcode):
     """The new opcode that creates a new instance of a class.
 
@@ -1020,7 +977,7 @@ class New(Opcode):
         return f"new {self.classname}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Throw(Opcode):
     """The throw opcode that throws an exception object.
 
@@ -1057,7 +1014,7 @@ class Throw(Opcode):
         return "throw"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Incr(Opcode):
     """The increment opcode that adds a constant value to a local variable.
 
@@ -1099,7 +1056,7 @@ class Incr(Opcode):
         return f"incr {self.index} by {self.amount}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Goto(Opcode):
     """The goto opcode that performs an unconditional jump.
 
@@ -1139,7 +1096,7 @@ class Goto(Opcode):
         return f"goto {self.target}"
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Return(Opcode):
     """The return opcode that returns (with optional value) from a method.
 
@@ -1154,6 +1111,8 @@ class Return(Opcode):
     type: jvm.Type | None  # Return type (None for void return)
 
     def __post_init__(self):
+        if not Opcode.strict:
+            return
         assert self.type is None or self.type.is_stacktype(), (
             "return only handles stack types {self.type()}"
         )
@@ -1207,3 +1166,33 @@ class Return(Opcode):
     def __str__(self):
         type = str(self.type) if self.type is not None else "V"
         return f"return:{type}"
+
+
+# The decoder of each jvm2json "opr", and of each "access" of invoke.
+DECODERS: dict[str | tuple[str, str], Callable[[dict], Opcode]] = {
+    "push": Push.from_json,
+    "newarray": NewArray.from_json,
+    "dup": Dup.from_json,
+    "array_store": ArrayStore.from_json,
+    "array_load": ArrayLoad.from_json,
+    "binary": Binary.from_json,
+    "store": Store.from_json,
+    "load": Load.from_json,
+    "arraylength": ArrayLength.from_json,
+    "if": If.from_json,
+    "get": Get.from_json,
+    "ifz": Ifz.from_json,
+    "cast": Cast.from_json,
+    "new": New.from_json,
+    "throw": Throw.from_json,
+    "incr": Incr.from_json,
+    "goto": Goto.from_json,
+    "return": Return.from_json,
+    "pop": Pop.from_json,
+    "negate": Negate.from_json,
+    ("invoke", "virtual"): InvokeVirtual.from_json,
+    ("invoke", "static"): InvokeStatic.from_json,
+    ("invoke", "interface"): InvokeInterface.from_json,
+    ("invoke", "special"): InvokeSpecial.from_json,
+    ("invoke", "dynamic"): InvokeDynamic.from_json,
+}
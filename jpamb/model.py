@@ -11,17 +11,20 @@ from pathlib import Path
 from loguru import logger
 import collections
 from collections import defaultdict
+from collections.abc import Mapping
 import re
 import os
+import hashlib
+import pickle
 import shutil
 import subprocess
 
-from typing import Iterable
+from typing import Callable, Iterable
 
 from jpamb import jvm
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Input:
     """
     An 'Input' to a 'Case' is a comma seperated list of JVM values
@@ -43,7 +46,7 @@ class Input:
 CASE_RE = re.compile(r"([^ ]*) +(\([^)]*\)) -> (.*)")
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class Case:
     """
     A 'Case' is an absolute method id, an input, and the expected result.
@@ -79,6 +82,9 @@ class Case:
         iterable: Iterable["Case"],
     ) -> list[tuple[jvm.Absolute[jvm.MethodID], list["Case"]]]:
         """Given an interable of cases, group the cases by the methodid"""
+        if isinstance(iterable, Cases):
+            return iterable.by_methodid()
+
         cases_by_id = collections.defaultdict(list)
 
         for c in iterable:
@@ -87,6 +93,51 @@ class Case:
         return sorted(cases_by_id.items())
 
 
+class Cases(tuple):
+    """The cases of a suite, in the order they were read, together with an
+    index of the cases by method id.
+
+    `Cases.decode` loads many lines at once, decoding each distinct method id
+    and input only once, so equal method ids and inputs are shared.
+    """
+
+    index: dict[jvm.Absolute[jvm.MethodID], tuple[Case, ...]]
+
+    def __new__(cls, cases: Iterable[Case] = ()):
+        self = super().__new__(cls, cases)
+        index = defaultdict(list)
+        for c in self:
+            index[c.methodid].append(c)
+        # Sorted once here, so by_methodid does not sort again
+        self.index = {m: tuple(index[m]) for m in sorted(index)}
+        return self
+
+    def __reduce__(self):
+        return (Cases, (tuple(self),))
+
+    @staticmethod
+    def decode(lines: Iterable[str]) -> "Cases":
+        methodids = {}
+        inputs = {}
+        results = {}
+        cases = []
+        for line in lines:
+            m = Case.match(line)
+            mid, input, result = m.groups()
+            if (methodid := methodids.get(mid)) is None:
+                methodid = methodids[mid] = jvm.AbsMethodID.decode(mid)
+            if (value := inputs.get(input)) is None:
+                value = inputs[input] = Input.decode(input)
+            result = results.setdefault(result, result)
+            cases.append(Case(methodid, value, result))
+        return Cases(cases)
+
+    def by_methodid(self) -> list[tuple[jvm.Absolute[jvm.MethodID], list[Case]]]:
+        """The cases grouped by method id, sorted by method id. The lists are
+        new copies of the index, so the caller may change them."""
+        return [(m, list(cs)) for m, cs in self.index.items()]
+
+
 @contextmanager
 def _check(reason, failfast=False):
     """Used in the checkhealth command"""
@@ -217,15 +268,394 @@ class Response:
         return total
 
 
+@dataclass
+class CacheStats:
+    """Counters of a cache, useful for checking that the cache is effective."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class ClassCache:
+    """A least-recently-used cache of decoded class files.
+
+    Entries are keyed by path, and are invalidated when the mtime or the size
+    of the file changes. The cache is bounded by `max_bytes`, measured as the
+    size of the files on disk, which is a cheap proxy for the size of the
+    decoded value.
+
+    The decoded values are shared, and should not be mutated.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: collections.OrderedDict[Path, tuple[tuple[int, int], object]]
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+
+    @staticmethod
+    def stamp(path: Path) -> tuple[int, int]:
+        """The mtime and size of a file, used to detect that it has changed."""
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes currently accounted for in the cache."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._entries
+
+    def get(
+        self,
+        path: Path,
+        load: Callable[[Path], object],
+        stamp: tuple[int, int] | None = None,
+    ) -> object:
+        """Get the decoded content of path, using load on a miss.
+
+        The stamp defaults to the one of the file, but can be given if the
+        content comes from elsewhere, like a bundle."""
+        stamp = stamp or self.stamp(path)
+        if (entry := self._entries.get(path)) is not None:
+            if entry[0] == stamp:
+                self._entries.move_to_end(path)
+                self.stats.hits += 1
+                return entry[1]
+            self._drop(path)
+            self.stats.invalidations += 1
+
+        self.stats.misses += 1
+        value = load(path)
+        self._entries[path] = (stamp, value)
+        self._nbytes += stamp[1]
+        self._shrink()
+        return value
+
+    def resize(self, max_bytes: int):
+        """Change the budget of the cache, evicting entries if needed."""
+        self.max_bytes = max_bytes
+        self._shrink()
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
+
+    def _drop(self, path: Path):
+        (_, size), _ = self._entries.pop(path)
+        self._nbytes -= size
+
+    def _shrink(self):
+        while self._nbytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+
+def _load_json(path: Path) -> dict:
+    import json
+
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def _methodid_from_json(method: dict) -> jvm.MethodID:
+    returns = method["returns"]["type"]
+    return jvm.MethodID(
+        name=method["name"],
+        params=jvm.ParameterType.from_json(method["params"], annotated=True),
+        return_type=jvm.Type.from_json(returns) if returns is not None else None,
+    )
+
+
+# The strings and the structural characters of a json document, everything
+# else (numbers, true, false and null) only appears between them.
+JSON_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\],:]')
+
+
+@dataclass(frozen=True)
+class MethodSpan:
+    """The byte range of a method in a decompiled file, and the byte ranges
+    of its fields."""
+
+    start: int
+    end: int
+    fields: dict[bytes, tuple[int, int]]
+
+    def field(self, content: bytes, name: bytes):
+        import json
+
+        start, end = self.fields[name]
+        return json.loads(content[start:end])
+
+
+def scan_methods(content: bytes) -> list[MethodSpan]:
+    """Find the methods in the content of a decompiled file without parsing it.
+
+    This walks the strings and the structural characters of the document,
+    keeping track of the nesting, and records the objects in the top-level
+    "methods" array, in declaration order.
+    """
+    methods = []
+    depth = 0
+    key = None  # the last string, which is a key if followed by a ':'
+    in_methods = False
+    start, fields, field = 0, {}, None
+    for m in JSON_TOKEN_RE.finditer(content):
+        c = content[m.start()]
+        if c == 0x22:  # "
+            key = m
+            continue
+        if c == 0x3A:  # :
+            if depth == 1:
+                in_methods = key.group() == b'"methods"'
+            elif depth == 3 and in_methods:
+                field = (key.group()[1:-1], m.end())
+            continue
+        if depth == 3 and in_methods and field is not None and c in b",}":
+            fields[field[0]] = (field[1], m.start())
+            field = None
+        if c in b"{[":
+            if depth == 2 and in_methods and c == 0x7B:
+                start, fields = m.start(), {}
+            depth += 1
+        elif c in b"}]":
+            depth -= 1
+            if depth == 2 and in_methods and c == 0x7D:
+                methods.append(MethodSpan(start, m.end(), fields))
+    return methods
+
+
+class LazyMethods(Mapping):
+    """The methods of a class keyed like the `MethodIndex`, where each method
+    is loaded from its position in the class on first access."""
+
+    def __init__(
+        self, positions: dict[tuple[str, str], int], load: Callable[[int], dict]
+    ):
+        self._positions = positions
+        self._load = load
+        self._loaded = {}
+
+    def __getitem__(self, key: tuple[str, str]) -> dict:
+        if (method := self._loaded.get(key)) is None:
+            method = self._loaded[key] = self._load(self._positions[key])
+        return method
+
+    def __contains__(self, key) -> bool:
+        return key in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+@dataclass(frozen=True)
+class MethodIndex:
+    """An index of the methods in a decompiled class.
+
+    The methods are keyed by their name and parameter descriptor, and
+    `overloads` lists the method ids with a given name in declaration order.
+    """
+
+    methods: Mapping[tuple[str, str], dict]
+    overloads: dict[str, tuple[jvm.MethodID, ...]]
+
+    @staticmethod
+    def key(methodid: jvm.MethodID) -> tuple[str, str]:
+        return (methodid.name, methodid.params.encode())
+
+    @staticmethod
+    def from_json(json: dict) -> "MethodIndex":
+        methods = {}
+        overloads = defaultdict(list)
+        for method in json["methods"]:
+            try:
+                methodid = _methodid_from_json(method)
+            except NotImplementedError as e:
+                logger.debug(f"Not indexing {method['name']!r}: {e}")
+                continue
+            methods[MethodIndex.key(methodid)] = method
+            overloads[methodid.name].append(methodid)
+
+        return MethodIndex(methods, {n: tuple(ms) for n, ms in overloads.items()})
+
+    @staticmethod
+    def from_file(path: Path) -> "MethodIndex":
+        """Index a decompiled file without parsing it as a whole.
+
+        Only the name, parameters and return type of each method are parsed,
+        and the byte range of each method is kept so that it can be read and
+        parsed on its own when it is looked up."""
+        import json
+
+        with open(path, "rb") as fp:
+            content = fp.read()
+        spans = scan_methods(content)
+
+        positions = {}
+        overloads = defaultdict(list)
+        for i, span in enumerate(spans):
+            method = {
+                k.decode(): span.field(content, k)
+                for k in (b"name", b"params", b"returns")
+            }
+            try:
+                methodid = _methodid_from_json(method)
+            except NotImplementedError as e:
+                logger.debug(f"Not indexing {method['name']!r}: {e}")
+                continue
+            positions[MethodIndex.key(methodid)] = i
+            overloads[methodid.name].append(methodid)
+
+        def load(i: int) -> dict:
+            with open(path, "rb") as fp:
+                fp.seek(spans[i].start)
+                return json.loads(fp.read(spans[i].end - spans[i].start))
+
+        return MethodIndex(
+            LazyMethods(positions, load),
+            {n: tuple(ms) for n, ms in overloads.items()},
+        )
+
+    def lookup(self, methodid: jvm.MethodID) -> dict:
+        try:
+            return self.methods[MethodIndex.key(methodid)]
+        except KeyError:
+            raise IndexError(f"Could not find {methodid.encode()}") from None
+
+    def by_name(self, name: str) -> tuple[jvm.MethodID, ...]:
+        """All the overloads of the method called name."""
+        return self.overloads.get(name, ())
+
+
+class ContentStore:
+    """An on-disk cache of values computed from the content of files.
+
+    Each file is named by the content hash of what its value was computed
+    from, so changing that is picked up automatically. The files start with
+    a header identifying the store and the version of the `MODULES` which
+    wrote them, followed by a pickle of the value. Subclasses set `MAGIC`,
+    `VERSION` and `MODULES`.
+
+    Given a name, like that of a class, the file is kept in a folder of
+    that name, and storing it removes the files it supersedes there, so the
+    store holds one file per name rather than one per version of its content.
+    """
+
+    MAGIC: bytes
+    VERSION: int
+    MODULES: tuple[str, ...]
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+
+    @staticmethod
+    def digest(path: Path) -> str:
+        with open(path, "rb") as fp:
+            return hashlib.file_digest(fp, "sha256").hexdigest()
+
+    @classmethod
+    def header(cls) -> bytes:
+        """The header, which changes when the modules change."""
+        if (header := cls.__dict__.get("_header")) is None:
+            import importlib
+
+            h = hashlib.sha256(str(cls.VERSION).encode())
+            for name in cls.MODULES:
+                with open(importlib.import_module(name).__file__, "rb") as fp:
+                    h.update(fp.read())
+            header = cls._header = cls.MAGIC + h.digest()[:16]
+        return header
+
+    def file(self, digest: str, name: str | None = None) -> Path:
+        folder = self.folder if name is None else self.folder / name
+        return folder / f"{digest}.pickle"
+
+    def load(self, digest: str, name: str | None = None):
+        header = self.header()
+        file = self.file(digest, name)
+        try:
+            with open(file, "rb") as fp:
+                if fp.read(len(header)) != header:
+                    return None
+                return pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.debug(f"Ignoring broken cache file {file}: {e}")
+            return None
+
+    def store(self, digest: str, value, name: str | None = None):
+        file = self.file(digest, name)
+        tmp = file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as fp:
+                fp.write(self.header())
+                pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, file)
+            if name is not None:
+                for old in file.parent.glob("*.pickle"):
+                    if old != file:
+                        old.unlink(missing_ok=True)
+        except OSError as e:
+            logger.debug(f"Could not write cache file {file}: {e}")
+            tmp.unlink(missing_ok=True)
+
+
+class OpcodeStore(ContentStore):
+    """An on-disk cache of decoded opcodes.
+
+    Each file holds the opcodes of all methods in a class, keyed like the
+    `MethodIndex`, and is named by the content hash of the decompiled class,
+    so rebuilding `target/decompiled` is picked up automatically.
+    """
+
+    MAGIC = b"JPAMBOPS"
+    VERSION = 1
+    MODULES = ("jpamb.jvm.base", "jpamb.jvm.opcode")
+
+
+class CaseStore(ContentStore):
+    """An on-disk cache of the decoded cases, named by the content hash of
+    the case file."""
+
+    MAGIC = b"JPAMBCSE"
+    VERSION = 1
+    MODULES = ("jpamb.jvm.base", "jpamb.model")
+
+
 class Suite:
     """The suite!
 
     Note that only one instance per abstract path exist to be able to cache
     information about the suite on read.
 
+    The decoded class files are kept in `class_cache`, their method indices
+    in `index_cache` and their decoded opcodes in `opcode_cache`, which are
+    shared by all suites in the process. The decoded opcodes are also stored
+    on disk in `opcode_store`, and the decoded cases in `case_store`.
+
+    Decompiled files of at least `lazy_bytes` which have not been decoded
+    already are indexed with `MethodIndex.from_file`, so that looking up a
+    method only parses that method.
+
     """
 
     _instances = dict()
+    class_cache = ClassCache()
+    index_cache = ClassCache()
+    opcode_cache = ClassCache()
+    lazy_bytes = 1024 * 1024
 
     def __new__(cls, workfolder: Path | None = None):
         workfolder = workfolder or Path.cwd()
@@ -237,6 +667,8 @@ class Suite:
         workfolder = workfolder or Path.cwd()
         assert workfolder.is_absolute(), f"Assuming that {workfolder} is absolute."
         self.workfolder = workfolder
+        self.opcode_store = OpcodeStore(self.cache_folder / "opcodes")
+        self.case_store = CaseStore(self.cache_folder / "cases")
         self.invalidate_cache()
 
     def invalidate_cache(self):
@@ -248,6 +680,11 @@ class Suite:
         """The folder to place the statistics about the repository"""
         return self.workfolder / "target" / "stats"
 
+    @property
+    def cache_folder(self) -> Path:
+        """The folder to place caches derived from the build"""
+        return self.workfolder / "target" / "cache"
+
     @property
     def classfiles_folder(self) -> Path:
         """The folder containing the class files"""
@@ -286,31 +723,113 @@ class Suite:
             ".json"
         )
 
-    def findclass(self, cn: jvm.ClassName) -> dict:
-        import json
+    @property
+    def bundle_file(self) -> Path:
+        """The bundle of the decompiled files and the cases, see jpamb.bundle"""
+        return self.workfolder / "target" / "suite.bundle"
 
-        with open(self.decompiledfile(cn)) as fp:
-            return json.load(fp)
+    @property
+    def bundle(self):
+        """The bundle of the suite if it has been built, otherwise None."""
+        from jpamb.bundle import SuiteBundle
 
-    def findmethod(self, methodid: jvm.Absolute[jvm.MethodID]) -> jvm:
-        methods = self.findclass(methodid.classname)["methods"]
-        for method in methods:
-            if method["name"] != methodid.extension.name:
-                continue
-            params = jvm.ParameterType.from_json(method["params"], annotated=True)
+        try:
+            stamp = ClassCache.stamp(self.bundle_file)
+        except FileNotFoundError:
+            return None
+        if getattr(self, "_bundle", (None,))[0] != stamp:
+            try:
+                self._bundle = (stamp, SuiteBundle(self.bundle_file))
+            except ValueError as e:
+                logger.warning(f"Ignoring bundle: {e}")
+                self._bundle = (stamp, None)
+        return self._bundle[1]
+
+    def _bundled(self, cn: jvm.ClassName):
+        """The bundle, if it contains an up-to-date version of the class.
+
+        A bundled class is considered up-to-date if the decompiled file is
+        unchanged since it was bundled, or if it no longer exists."""
+        if (bundle := self.bundle) is None or cn not in bundle:
+            return None
+        try:
+            if ClassCache.stamp(self.decompiledfile(cn)) != bundle.stamp(cn):
+                return None
+        except FileNotFoundError:
+            pass
+        return bundle
 
-            assert params == methodid.extension.params, (
-                f"Mulitple methods with same name {method['name']!r}, "
-                f"but different params {params} from {method['params']} and {methodid.extension.params}"
+    def findclass(self, cn: jvm.ClassName) -> dict:
+        path = self.decompiledfile(cn)
+        if not path.exists() and (bundle := self._bundled(cn)) is not None:
+            return self.class_cache.get(
+                path, lambda _: bundle.findclass(cn), bundle.stamp(cn)
             )
-            break
-        else:
-            raise IndexError(f"Could not find {methodid}")
-        return method
-
-    def method_opcodes(self, method: jvm.Absolute[jvm.MethodID]) -> list[jvm.Opcode]:
-        for op in self.findmethod(method)["code"]["bytecode"]:
-            yield jvm.Opcode.from_json(op)
+        return self.class_cache.get(path, _load_json)
+
+    def method_index(self, cn: jvm.ClassName) -> MethodIndex:
+        if (bundle := self._bundled(cn)) is not None:
+            return bundle.method_index(cn)
+        return self.index_cache.get(self.decompiledfile(cn), self._index_file)
+
+    def _index_file(self, path: Path) -> MethodIndex:
+        if (
+            path not in self.class_cache
+            and ClassCache.stamp(path)[1] >= self.lazy_bytes
+        ):
+            return MethodIndex.from_file(path)
+        return MethodIndex.from_json(self.class_cache.get(path, _load_json))
+
+    def findmethod(self, methodid: jvm.Absolute[jvm.MethodID]) -> dict:
+        try:
+            return self.method_index(methodid.classname).lookup(methodid.extension)
+        except IndexError:
+            raise IndexError(f"Could not find {methodid}") from None
+
+    def class_digest(self, cn: jvm.ClassName) -> str:
+        """The content hash of the decompiled class, taken from the bundle
+        if it has an up-to-date version of the class."""
+        if (bundle := self._bundled(cn)) is not None:
+            return bundle.digest(cn)
+        return ContentStore.digest(self.decompiledfile(cn))
+
+    def _decode_opcodes(self, cn: jvm.ClassName) -> dict:
+        """Decode the opcodes of all methods in a class, going through the
+        opcode store. Methods which cannot be decoded are left out."""
+        digest = self.class_digest(cn)
+        if (opcodes := self.opcode_store.load(digest, cn.encode())) is not None:
+            return opcodes
+
+        opcodes = {}
+        for key, method in self.method_index(cn).methods.items():
+            if method["code"] is None:
+                continue
+            try:
+                opcodes[key] = tuple(
+                    jvm.Opcode.from_json(op) for op in method["code"]["bytecode"]
+                )
+            except NotImplementedError:
+                continue
+        self.opcode_store.store(digest, opcodes, cn.encode())
+        return opcodes
+
+    def method_opcodes(
+        self, method: jvm.Absolute[jvm.MethodID]
+    ) -> tuple[jvm.Opcode, ...]:
+        cn = method.classname
+        bundle = self._bundled(cn)
+        opcodes = self.opcode_cache.get(
+            self.decompiledfile(cn),
+            lambda _: self._decode_opcodes(cn),
+            bundle and bundle.stamp(cn),
+        )
+        if (ops := opcodes.get(MethodIndex.key(method.extension))) is not None:
+            return ops
+        # Not decodable as a whole, decode it here to report the failure.
+        return tuple(
+            jvm.Opcode.from_json(op)
+            for op in self.findmethod(method)["code"]["bytecode"]
+        )
 
     def classes(self) -> Iterable[jvm.ClassName]:
         for file in self.classfiles():
@@ -329,20 +848,29 @@ class Suite:
 
             return yaml.safe_load(f)["version"]
 
+    def _case_text(self) -> bytes:
+        if (bundle := self.bundle) is not None and bundle.case_stamp is not None:
+            try:
+                fresh = ClassCache.stamp(self.case_file) == bundle.case_stamp
+            except FileNotFoundError:
+                fresh = True
+            if fresh:
+                return bundle.case_text()
+        return self.case_file.read_bytes()
+
     @property
-    def cases(self) -> tuple[Case, ...]:
+    def cases(self) -> Cases:
         if self._cases is None:
-            with open(self.case_file) as f:
-                self._cases = tuple(Case.decode(line) for line in f)
+            text = self._case_text()
+            digest = hashlib.sha256(text).hexdigest()
+            if (cases := self.case_store.load(digest)) is None:
+                cases = Cases.decode(text.decode().splitlines())
+                self.case_store.store(digest, cases)
+            self._cases = cases
         return self._cases
 
     def case_methods(self) -> Iterable[tuple[jvm.Absolute[jvm.MethodID], set[str]]]:
-        methods = defaultdict(set)
-
-        for case in self.cases:
-            methods[case.methodid].add(case.result)
-
-        return methods.items()
+        return {m: {c.result for c in cs} for m, cs in self.cases.index.items()}.items()
 
     def case_opcodes(self) -> list[jvm.Opcode]:
         for m, _ in self.case_methods():
@@ -0,0 +1,327 @@
+"""
+jpamb.persistent
+
+This module has an immutable map with structural sharing, a hash array
+mapped trie (HAMT), for the parts of abstract states which are copied and
+joined at every block of a data-flow analysis.
+
+Updating a map returns a new map which shares all nodes but the path to the
+changed key with the old one, so a copy is free and a change costs
+O(log32 n). Merging two maps skips the subtrees they share, so joining the
+states of two branches costs in proportion to what the branches changed.
+
+    from jpamb.persistent import PMap
+
+    heap = PMap().set(1000, obj)
+    other = heap.set(1001, obj)          # heap is unchanged
+    joined = heap.merge(other)           # only visits the new entry
+
+"""
+
+from typing import Any, Callable, Iterator, Mapping
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+
+def _hash(key) -> int:
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+def _index(bitmap: int, bit: int) -> int:
+    return (bitmap & (bit - 1)).bit_count()
+
+
+# A trie entry is either a leaf, the tuple (hash, key, value), a _Node with
+# the entries of the next 5 bits of the hash, or a _Collision of leaves
+# whose hashes are the same.
+
+
+class _Node:
+    __slots__ = ("bitmap", "entries", "size")
+
+    def __init__(self, bitmap: int, entries: tuple, size: int):
+        self.bitmap = bitmap
+        self.entries = entries
+        self.size = size
+
+
+class _Collision:
+    __slots__ = ("hash", "leaves", "size")
+
+    def __init__(self, hash: int, leaves: tuple):
+        self.hash = hash
+        self.leaves = leaves
+        self.size = len(leaves)
+
+
+def _size(entry) -> int:
+    return 1 if type(entry) is tuple else entry.size
+
+
+def _leaves(entry) -> Iterator[tuple]:
+    if type(entry) is tuple:
+        yield entry
+    elif type(entry) is _Node:
+        for e in entry.entries:
+            yield from _leaves(e)
+    else:
+        yield from entry.leaves
+
+
+def _get(entry, h: int, shift: int, key, default):
+    while True:
+        if type(entry) is tuple:
+            return entry[2] if entry[0] == h and entry[1] == key else default
+        if type(entry) is _Collision:
+            for leaf in entry.leaves:
+                if leaf[1] == key:
+                    return leaf[2]
+            return default
+        bit = 1 << ((h >> shift) & _MASK)
+        if not entry.bitmap & bit:
+            return default
+        entry = entry.entries[_index(entry.bitmap, bit)]
+        shift += _BITS
+
+
+def _pair(a: tuple, b: tuple, shift: int):
+    """The entry holding two leaves with different keys."""
+    if a[0] == b[0] or shift >= _HASH_BITS:
+        return _Collision(a[0], (a, b))
+    ia, ib = (a[0] >> shift) & _MASK, (b[0] >> shift) & _MASK
+    if ia == ib:
+        return _Node(1 << ia, (_pair(a, b, shift + _BITS),), 2)
+    entries = (a, b) if ia < ib else (b, a)
+    return _Node((1 << ia) | (1 << ib), entries, 2)
+
+
+def _set(entry, leaf: tuple, shift: int):
+    """The entry with leaf added or replacing the leaf with its key."""
+    if type(entry) is tuple:
+        if entry[0] == leaf[0] and entry[1] == leaf[1]:
+            return entry if entry[2] is leaf[2] else leaf
+        return _pair(entry, leaf, shift)
+
+    if type(entry) is _Collision:
+        if entry.hash != leaf[0]:
+            # split the collision by the next bits of the hash
+            node = _Node(1 << ((entry.hash >> shift) & _MASK), (entry,), entry.size)
+            return _set(node, leaf, shift)
+        for i, old in enumerate(entry.leaves):
+            if old[1] == leaf[1]:
+                if old[2] is leaf[2]:
+                    return entry
+                return _Collision(
+                    entry.hash, entry.leaves[:i] + (leaf,) + entry.leaves[i + 1 :]
+                )
+        return _Collision(entry.hash, entry.leaves + (leaf,))
+
+    bit = 1 << ((leaf[0] >> shift) & _MASK)
+    i = _index(entry.bitmap, bit)
+    entries = entry.entries
+    if not entry.bitmap & bit:
+        return _Node(
+            entry.bitmap | bit, entries[:i] + (leaf,) + entries[i:], entry.size + 1
+        )
+    old = entries[i]
+    new = _set(old, leaf, shift + _BITS)
+    if new is old:
+        return entry
+    return _Node(
+        entry.bitmap,
+        entries[:i] + (new,) + entries[i + 1 :],
+        entry.size - _size(old) + _size(new),
+    )
+
+
+def _delete(entry, h: int, key, shift: int):
+    """The entry without key, None if it is empty."""
+    if type(entry) is tuple:
+        return None if entry[0] == h and entry[1] == key else entry
+
+    if type(entry) is _Collision:
+        leaves = tuple(leaf for leaf in entry.leaves if leaf[1] != key)
+        if len(leaves) == len(entry.leaves):
+            return entry
+        return leaves[0] if len(leaves) == 1 else _Collision(entry.hash, leaves)
+
+    bit = 1 << ((h >> shift) & _MASK)
+    if not entry.bitmap & bit:
+        return entry
+    i = _index(entry.bitmap, bit)
+    old = entry.entries[i]
+    new = _delete(old, h, key, shift + _BITS)
+    if new is old:
+        return entry
+    if new is None:
+        if entry.size == 1:
+            return None
+        entries = entry.entries[:i] + entry.entries[i + 1 :]
+        if len(entries) == 1 and type(entries[0]) is tuple:
+            return entries[0]
+        return _Node(entry.bitmap ^ bit, entries, entry.size - 1)
+    if len(entry.entries) == 1 and type(new) is tuple:
+        return new
+    return _Node(
+        entry.bitmap,
+        entry.entries[:i] + (new,) + entry.entries[i + 1 :],
+        entry.size - _size(old) + _size(new),
+    )
+
+
+def _merge(a, b, shift: int, combine):
+    """The union of two entries, with combine(a, b) for the values of the
+    keys in both."""
+    if a is b:
+        return a
+    if type(a) is _Node and type(b) is _Node:
+        entries, size = None, a.size
+        if a.bitmap == b.bitmap:
+            for i, theirs in enumerate(b.entries):
+                mine = a.entries[i]
+                if mine is theirs:
+                    continue
+                entry = _merge(mine, theirs, shift + _BITS, combine)
+                if entry is not mine:
+                    if entries is None:
+                        entries = list(a.entries)
+                    entries[i] = entry
+                    size += _size(entry) - _size(mine)
+            return a if entries is None else _Node(a.bitmap, tuple(entries), size)
+
+        bitmap, entries = a.bitmap, list(a.entries)
+        remaining = b.bitmap
+        for theirs in b.entries:
+            bit = remaining & -remaining
+            remaining ^= bit
+            i = _index(bitmap, bit)
+            if not bitmap & bit:
+                bitmap |= bit
+                entries.insert(i, theirs)
+                size += _size(theirs)
+                continue
+            mine = entries[i]
+            if mine is not theirs:
+                entry = _merge(mine, theirs, shift + _BITS, combine)
+                entries[i] = entry
+                size += _size(entry) - _size(mine)
+        return _Node(bitmap, tuple(entries), size)
+
+    if type(a) is not _Node and type(b) is _Node:
+        # keep the larger entry and add the leaves of the smaller one
+        for leaf in _leaves(a):
+            current = _get(b, leaf[0], shift, leaf[1], _MISSING)
+            if current is not _MISSING:
+                leaf = (leaf[0], leaf[1], combine(leaf[2], current))
+            b = _set(b, leaf, shift)
+        return b
+
+    for leaf in _leaves(b):
+        current = _get(a, leaf[0], shift, leaf[1], _MISSING)
+        if current is not _MISSING:
+            leaf = (leaf[0], leaf[1], combine(current, leaf[2]))
+        a = _set(a, leaf, shift)
+    return a
+
+
+_MISSING = object()
+
+
+def _second(a, b):
+    return b
+
+
+class PMap(Mapping):
+    """An immutable map, updated by `set`, `delete` and `merge` which return
+    new maps sharing structure with the old one."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self, items: Mapping | None = None):
+        self._root = None
+        if items:
+            root = None
+            for key, value in items.items():
+                leaf = (_hash(key), key, value)
+                root = leaf if root is None else _set(root, leaf, 0)
+            self._root = root
+
+    @classmethod
+    def _of(cls, root) -> "PMap":
+        pmap = object.__new__(cls)
+        pmap._root = root
+        return pmap
+
+    def __len__(self) -> int:
+        return 0 if self._root is None else _size(self._root)
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __getitem__(self, key):
+        if self._root is None:
+            raise KeyError(key)
+        value = _get(self._root, _hash(key), 0, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if self._root is None:
+            return default
+        return _get(self._root, _hash(key), 0, key, default)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator:
+        if self._root is not None:
+            for leaf in _leaves(self._root):
+                yield leaf[1]
+
+    def items(self):
+        return [(leaf[1], leaf[2]) for leaf in self._leaves()]
+
+    def _leaves(self) -> Iterator[tuple]:
+        return iter(()) if self._root is None else _leaves(self._root)
+
+    def set(self, key, value) -> "PMap":
+        leaf = (_hash(key), key, value)
+        if self._root is None:
+            return PMap._of(leaf)
+        root = _set(self._root, leaf, 0)
+        return self if root is self._root else PMap._of(root)
+
+    def delete(self, key) -> "PMap":
+        """The map without key, which does not have to be in the map."""
+        if self._root is None:
+            return self
+        root = _delete(self._root, _hash(key), key, 0)
+        return self if root is self._root else PMap._of(root)
+
+    def merge(
+        self, other: "PMap", combine: Callable[[Any, Any], Any] = _second
+    ) -> "PMap":
+        """The union of the maps, with combine(mine, theirs) as the value of
+        the keys in both, by default their value.
+
+        Shared subtrees are not visited, so combine(v, v) must be v, as it
+        is for the join of a lattice."""
+        if other._root is None or other._root is self._root:
+            return self
+        if self._root is None:
+            return other
+        root = _merge(self._root, other._root, 0, combine)
+        if root is self._root:
+            return self
+        return other if root is other._root else PMap._of(root)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PMap) and other._root is self._root:
+            return True
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return "PMap({" + ", ".join(f"{k!r}: {v!r}" for k, v in self.items()) + "})"
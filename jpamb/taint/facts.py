@@ -0,0 +1,517 @@
+"""
+jpamb.taint.facts
+
+Taint analysis of a whole suite as a Datalog program over facts extracted
+from the bytecode, see jpamb.datalog.
+
+Each method is turned into facts over its variables once: the stack and
+locals are renamed so every value has a variable, with a variable for the
+merged values of a local or stack slot at the start of a block (SSA-like,
+so assignments are flow sensitive), and the opcodes become `move`, `alloc`,
+`append`, `source`, `sink`, `call` and `ret` facts. The facts of the
+methods of a class are cached on disk, keyed by the content hash of the
+decompiled class.
+
+The rules derive which arguments of a method, or which sources it calls,
+may taint each of its variables, and from those which arguments reach a
+sink in the method or in the methods it calls, like the summaries of the
+worklist analyzer. A method is vulnerable when anything reaches a sink,
+as its arguments are untrusted.
+
+    from jpamb.taint import facts
+
+    program = facts.load(suite)
+    program.vulnerable(methodid)
+
+The taint of a method follows the worklist analyzer: locals which may be
+read before they are written are a source, and so is what is read from a
+string carrier which was not allocated in the method. The one difference
+is that StringBuilder and StringBuffer objects are tracked by allocation
+site, but flow insensitively: whatever is appended to a builder taints all
+strings made from it, also the ones made before. So a method may be
+vulnerable here and not in the worklist analyzer, but not the other way.
+
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Sequence
+
+from jpamb import callgraph, cfg, datalog, jvm
+from jpamb.model import ContentStore
+from jpamb.taint.models import ModelTable
+from jpamb.taint.rules import RuleIndex
+
+# The label of taint from a source called in the method, argument labels
+# are their indices.
+SOURCE = -1
+
+BUILDERS = ("java.lang.StringBuilder", "java.lang.StringBuffer")
+
+# The rules the library calls are matched by, unless others are given
+RULES = RuleIndex.default()
+
+# The flows through the string methods of the JDK
+MODELS = ModelTable.default()
+
+
+@dataclass(frozen=True, slots=True)
+class Invoke:
+    """A call, which is either to a method of the suite, or described by
+    the library facts for the methods it does not have."""
+
+    offset: int
+    method: jvm.AbsMethodID
+    args: tuple[str, ...]  # With the receiver first
+    result: str | None
+    library: tuple[tuple[str, tuple], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class MethodFacts:
+    params: tuple[str, ...]  # The variables of the arguments
+    facts: tuple[tuple[str, tuple], ...]
+    invokes: tuple[Invoke, ...]
+
+
+def _parameter_slots(method: jvm.AbsMethodID, static: bool) -> list[int]:
+    slots = [] if static else [0]
+    slot = len(slots)
+    for param in method.extension.params:
+        slots.append(slot)
+        slot += 2 if isinstance(param, (jvm.Long, jvm.Double)) else 1
+    return slots
+
+
+def _library(
+    op: jvm.Opcode, args: tuple[str, ...], result: str | None, rules: RuleIndex
+) -> list[tuple[str, tuple]]:
+    """The facts of a call to a method which is not in the suite, in the
+    order the worklist analyzer matches the method names."""
+    moves = [("move", (result, a)) for a in args] if result is not None else []
+    if isinstance(op, jvm.InvokeDynamic):
+        return moves
+    if isinstance(op, jvm.InvokeSpecial):
+        return ([("append", args[:2])] if len(args) > 1 else []) + moves
+    if (model := MODELS.lookup(op.method)) is not None:
+        facts = [
+            ("append", (args[0], a))
+            for i, a in enumerate(args)
+            if model.receiver >> i & 1
+        ]
+        if result is None:
+            return facts
+        if model.result_is_receiver:
+            return facts + [("move", (result, args[0]))]
+        return facts + [
+            ("move", (result, a)) for i, a in enumerate(args) if model.returns >> i & 1
+        ]
+    receiver = not isinstance(op, jvm.InvokeStatic)
+    params = args[1:] if receiver else args
+    sink = [("sink", (a,)) for a in params]
+    source = [("source", (result,))] if result is not None else []
+    if isinstance(op, jvm.InvokeVirtual):
+        if rules.matches("append", op.method):
+            facts = [("append", args[:2])] if params else []
+            return facts + ([("move", (result, args[0]))] if result is not None else [])
+        if rules.matches("tostring", op.method):
+            return [("move", (result, args[0]))] if result is not None else []
+        if rules.matches("preserving", op.method):
+            return moves
+        if rules.matches("source", op.method):
+            return source
+    if rules.matches("sink", op.method):
+        return sink
+    if not isinstance(op, jvm.InvokeVirtual) and rules.matches("source", op.method):
+        return source
+    return moves
+
+
+def _carrier_call(op: jvm.Opcode, rules: RuleIndex) -> tuple[bool, bool]:
+    """Whether a call reads its string carrier receiver into its result, and
+    whether it returns the carrier itself, like append, in the order the
+    worklist analyzer matches the method names."""
+    if not isinstance(op, (jvm.InvokeVirtual, jvm.InvokeInterface)):
+        return False, False
+    if (model := MODELS.lookup(op.method)) is not None:
+        reads = model.carrier and bool(model.returns & 1)
+        return reads, model.carrier and model.result_is_receiver
+    if isinstance(op, jvm.InvokeVirtual):
+        if rules.matches("append", op.method):
+            return True, True
+        if rules.matches("tostring", op.method):
+            return True, False
+    return False, False
+
+
+def _allocated(facts: list, chains: list[tuple[str, str]]) -> set[str]:
+    """The variables which may hold a builder allocated in the method: the
+    ones it is allocated to, merged into, and returned as by `chains`."""
+    moves = defaultdict(list)
+    for to, source in chains:
+        moves[source].append(to)
+    todo = []
+    for f in facts:
+        if isinstance(f, Invoke):
+            continue
+        name, t = f
+        if name == "move" and t[0].startswith("b"):
+            moves[t[1]].append(t[0])
+        elif name == "alloc":
+            todo.append(t[0])
+    allocated = set(todo)
+    while todo:
+        for v in moves[todo.pop()]:
+            if v not in allocated:
+                allocated.add(v)
+                todo.append(v)
+    return allocated
+
+
+def extract(
+    methodid: jvm.AbsMethodID,
+    opcodes: Sequence[jvm.Opcode],
+    static: bool,
+    rules: RuleIndex = RULES,
+) -> MethodFacts:
+    """The facts of a method, with the library calls matched by rules.
+
+    Locals which are read before they are written are `undefined`, and
+    taint the values read from them, like in the worklist analyzer. So do
+    the calls reading a string carrier which is not allocated in the method.
+    """
+    opcodes = tuple(opcodes)
+    graph = cfg.build(opcodes, methodid)
+    slots = _parameter_slots(methodid, static)
+    width = max(
+        [s + 1 for s in slots]
+        + [
+            op.index + 1
+            for op in opcodes
+            if isinstance(op, (jvm.Load, jvm.Store, jvm.Incr))
+        ],
+        default=0,
+    )
+    params = tuple(f"l{s}" for s in slots)
+    initial = tuple(f"l{i}" if i in slots else f"u{i}" for i in range(width))
+    IN: list[tuple | None] = [None] * len(graph)
+    OUT: list[tuple | None] = [None] * len(graph)
+    IN[0] = (initial, ())
+    # The calls which read a string carrier, with the carrier they read, and
+    # the results of the calls which return their carrier
+    reads: list[tuple[Invoke, str]] = []
+    chains: list[tuple[str, str]] = []
+
+    def transfer(b: int, emit: list | None) -> tuple:
+        locals, stack = map(list, IN[b])
+        invokes = []
+
+        def pop() -> str:
+            return stack.pop() if stack else f"x{op.offset}"
+
+        for op in graph.instructions(b):
+            new = f"v{op.offset}"
+            match op:
+                case jvm.Push():
+                    stack.append(new)
+                case jvm.Load():
+                    stack.append(locals[op.index])
+                case jvm.Store():
+                    locals[op.index] = pop()
+                case jvm.New():
+                    stack.append(new)
+                    if (
+                        emit is not None
+                        and str(op.classname).replace("/", ".") in BUILDERS
+                    ):
+                        emit.append(("alloc", (new, op.offset)))
+                case jvm.Dup():
+                    stack.append(stack[-1] if stack else new)
+                case jvm.Pop() | jvm.Ifz() | jvm.Throw():
+                    pop()
+                case jvm.If():
+                    pop(), pop()
+                case jvm.ArrayLoad():
+                    pop()
+                    array = pop()
+                    stack.append(new)
+                    if emit is not None:
+                        emit.append(("move", (new, array)))
+                case jvm.ArrayStore():
+                    pop(), pop(), pop()
+                case jvm.ArrayLength():
+                    pop()
+                    stack.append(new)
+                case jvm.NewArray():
+                    for _ in range(op.dim):
+                        pop()
+                    stack.append(new)
+                case jvm.Binary() | jvm.Negate() | jvm.Cast():
+                    operands = [
+                        pop() for _ in range(2 if isinstance(op, jvm.Binary) else 1)
+                    ]
+                    stack.append(new)
+                    if emit is not None:
+                        emit.extend(("move", (new, v)) for v in operands)
+                case jvm.Get():
+                    if not op.static:
+                        pop()
+                    stack.append(new)
+                case jvm.Return():
+                    if op.type is not None and emit is not None:
+                        emit.append(("ret", (pop(),)))
+                case (
+                    jvm.InvokeVirtual()
+                    | jvm.InvokeStatic()
+                    | jvm.InvokeSpecial()
+                    | jvm.InvokeInterface()
+                    | jvm.InvokeDynamic()
+                ):
+                    method = op.method
+                    count = len(method.extension.params)
+                    if not isinstance(op, (jvm.InvokeStatic, jvm.InvokeDynamic)):
+                        count += 1
+                    args = tuple(reversed([pop() for _ in range(count)]))
+                    result = None
+                    if method.extension.return_type is not None:
+                        result = new
+                        stack.append(new)
+                    if emit is not None:
+                        invoke = Invoke(
+                            op.offset,
+                            callgraph.target(method),
+                            args,
+                            result,
+                            tuple(_library(op, args, result, rules)),
+                        )
+                        invokes.append(invoke)
+                        read, chain = _carrier_call(op, rules)
+                        if read and result is not None:
+                            reads.append((invoke, args[0]))
+                        if chain and result is not None:
+                            chains.append((result, args[0]))
+        if emit is not None:
+            emit.extend(invokes)
+        return tuple(locals), tuple(stack)
+
+    def merge(b: int, state: tuple) -> bool:
+        if IN[b] is None:
+            IN[b] = state
+            return True
+        old_locals, old_stack = IN[b]
+        locals, stack = list(old_locals), list(old_stack[: len(state[1])])
+        for kind, old, new, values in (
+            ("l", old_locals, locals, state[0]),
+            ("s", old_stack, stack, state[1]),
+        ):
+            for k, v in enumerate(values[: len(new)]):
+                if old[k] != v:
+                    new[k] = f"b{b}.{kind}{k}"
+        if (tuple(locals), tuple(stack)) == IN[b]:
+            return False
+        IN[b] = (tuple(locals), tuple(stack))
+        return True
+
+    worklist = cfg.Worklist(graph)
+    worklist.push(0)
+    while worklist:
+        b = worklist.pop()
+        OUT[b] = transfer(b, None)
+        for s in graph.successors(b):
+            if merge(s, OUT[b]):
+                worklist.push(s)
+
+    emitted: list = []
+    for b in graph.rpo:
+        OUT[b] = transfer(b, emitted)
+        preds = [OUT[p] for p in graph.predecessors(b) if OUT[p] is not None]
+        if b == 0:
+            preds.append((initial, ()))
+        locals, stack = IN[b]
+        for kind, values, i in (("l", locals, 0), ("s", stack, 1)):
+            for k, v in enumerate(values):
+                if v == f"b{b}.{kind}{k}":
+                    emitted.extend(
+                        ("move", (v, p[i][k])) for p in preds if p[i][k] != v
+                    )
+
+    # Like in the worklist analyzer, a carrier which was not allocated in
+    # the method, like one returned by a call, may hold anything appended
+    # to it anywhere, so what is read from it is a source.
+    allocated = _allocated(emitted, chains)
+    untracked = {invoke for invoke, carrier in reads if carrier not in allocated}
+    emitted = [
+        replace(f, library=f.library + (("source", (f.result,)),))
+        if f in untracked
+        else f
+        for f in emitted
+    ]
+
+    undefined = [("undefined", (v,)) for v in initial if v[0] == "u"]
+    return MethodFacts(
+        params,
+        tuple(f for f in emitted if not isinstance(f, Invoke)) + tuple(undefined),
+        tuple(f for f in emitted if isinstance(f, Invoke)),
+    )
+
+
+class FactStore(ContentStore):
+    """An on-disk cache of the facts of the methods of a class, named by
+    the content hash of the decompiled class and the digest of the rules."""
+
+    MAGIC = b"JPAMBFCT"
+    VERSION = 1
+    MODULES = (
+        "jpamb.jvm.base",
+        "jpamb.jvm.opcode",
+        "jpamb.cfg",
+        "jpamb.taint.facts",
+        "jpamb.taint.models",
+        "jpamb.taint.rules",
+    )
+
+
+def class_facts(
+    suite, cn: jvm.ClassName, store: FactStore | None = None, rules: RuleIndex = RULES
+) -> dict[jvm.MethodID, MethodFacts]:
+    """The facts of the methods of a class with decodable opcodes. They
+    are cached by the class and the rules."""
+    if store is None:
+        store = FactStore(suite.cache_folder / "facts")
+    digest = f"{suite.class_digest(cn)}-{rules.digest()}"
+    if (facts := store.load(digest, cn.encode())) is not None:
+        return facts
+
+    facts = {}
+    for methodids in suite.method_index(cn).overloads.values():
+        for methodid in methodids:
+            absmethod = jvm.AbsMethodID(cn, methodid)
+            if (opcodes := callgraph.method_opcodes(suite, absmethod)) is None:
+                continue
+            static = "static" in suite.findmethod(absmethod)["access"]
+            facts[methodid] = extract(absmethod, opcodes, static, rules)
+    store.store(digest, facts, cn.encode())
+    return facts
+
+
+@dataclass
+class TaintProgram:
+    """The taint rules over the facts of the methods added so far.
+
+    Methods can be added after solving, their calls are resolved and the
+    rules evaluated incrementally at the next `solve`. Calls to a method
+    added later are treated as library calls.
+    """
+
+    program: datalog.Program = field(default_factory=datalog.Program)
+    methods: dict[jvm.AbsMethodID, MethodFacts] = field(default_factory=dict)
+    _pending: list[jvm.AbsMethodID] = field(default_factory=list)
+
+    def __post_init__(self):
+        p = self.program
+        param = p.relation("param", 3)  # method, index, variable
+        move = p.relation("move", 3)  # method, to, from
+        alloc = p.relation("alloc", 3)  # method, variable, site
+        append = p.relation("append", 3)  # method, builder, data
+        source = p.relation("source", 2)  # method, variable
+        sink = p.relation("sink", 2)  # method, variable
+        undefined = p.relation("undefined", 2)  # method, variable
+        ret = p.relation("ret", 2)  # method, variable
+        call = p.relation("call", 3)  # method, site, callee
+        call_arg = p.relation("call_arg", 4)  # method, site, index, variable
+        call_ret = p.relation("call_ret", 3)  # method, site, variable
+        # method, variable, label: the argument or source which may taint it
+        label = p.relation("label", 3)
+        points_to = p.relation("points_to", 3)  # method, variable, site
+        site_label = p.relation("site_label", 3)
+        returns = p.relation("returns", 2)  # method, label
+        sinks = p.relation("sinks", 2)  # method, label
+        vulnerable = p.relation("vulnerable", 1)
+
+        M, C, V, W, L, K, S, P, A, B, D = datalog.variables("M C V W L K S P A B D")
+        p.rule(label(M, V, L), param(M, L, V))
+        p.rule(label(M, V, SOURCE), source(M, V))
+        p.rule(label(M, V, SOURCE), undefined(M, V))
+        p.rule(label(M, V, L), move(M, V, W), label(M, W, L))
+        p.rule(points_to(M, V, S), alloc(M, V, S))
+        p.rule(points_to(M, V, S), move(M, V, W), points_to(M, W, S))
+        p.rule(site_label(M, S, L), append(M, B, D), points_to(M, B, S), label(M, D, L))
+        p.rule(label(M, V, L), points_to(M, V, S), site_label(M, S, L))
+        p.rule(returns(M, L), ret(M, V), label(M, V, L))
+        p.rule(
+            label(M, V, L),
+            call_ret(M, P, V),
+            call(M, P, C),
+            returns(C, K),
+            call_arg(M, P, K, A),
+            label(M, A, L),
+        )
+        p.rule(
+            label(M, V, SOURCE), call_ret(M, P, V), call(M, P, C), returns(C, SOURCE)
+        )
+        p.rule(sinks(M, L), sink(M, V), label(M, V, L))
+        p.rule(
+            sinks(M, L),
+            call(M, P, C),
+            sinks(C, K),
+            call_arg(M, P, K, A),
+            label(M, A, L),
+        )
+        p.rule(sinks(M, SOURCE), call(M, P, C), sinks(C, SOURCE))
+        p.rule(vulnerable(M), sinks(M, L))
+
+    def add(self, methodid: jvm.AbsMethodID, facts: MethodFacts):
+        if methodid not in self.methods:
+            self.methods[methodid] = facts
+            self._pending.append(methodid)
+
+    def solve(self) -> datalog.SolveStats:
+        """Add the facts of the new methods and derive what follows."""
+        relations = self.program.relations
+        tuples = defaultdict(list)
+        for m in self._pending:
+            facts = self.methods[m]
+            tuples["param"].extend((m, i, v) for i, v in enumerate(facts.params))
+            for name, t in facts.facts:
+                tuples[name].append((m, *t))
+            for invoke in facts.invokes:
+                if invoke.method in self.methods:
+                    site = invoke.offset
+                    tuples["call"].append((m, site, invoke.method))
+                    tuples["call_arg"].extend(
+                        (m, site, i, a) for i, a in enumerate(invoke.args)
+                    )
+                    if invoke.result is not None:
+                        tuples["call_ret"].append((m, site, invoke.result))
+                else:
+                    for name, t in invoke.library:
+                        tuples[name].append((m, *t))
+        self._pending.clear()
+        for name, ts in tuples.items():
+            self.program.add(relations[name], ts)
+        self.program.solve()
+        return self.program.stats
+
+    def vulnerable(self, methodid: jvm.AbsMethodID) -> bool:
+        return (methodid,) in self.program.relations["vulnerable"]
+
+
+def suite_classes(suite) -> Iterable[jvm.ClassName]:
+    for file in sorted(suite.decompiledfiles()):
+        yield jvm.ClassName.from_parts(
+            *file.relative_to(suite.decompiled_folder).with_suffix("").parts
+        )
+
+
+def load(
+    suite, classes: Iterable[jvm.ClassName] | None = None, rules: RuleIndex = RULES
+) -> TaintProgram:
+    """The solved taint program of the classes, by default all classes of
+    the suite."""
+    store = FactStore(suite.cache_folder / "facts")
+    program = TaintProgram()
+    for cn in suite_classes(suite) if classes is None else classes:
+        for methodid, facts in class_facts(suite, cn, store, rules).items():
+            program.add(jvm.AbsMethodID(cn, methodid), facts)
+    program.solve()
+    return program
@@ -0,0 +1,131 @@
+"""
+jpamb.taint.models
+
+How taint flows through the JDK string methods, argument by argument.
+
+Arguments are numbered in the order they are pushed, with the receiver
+of instance methods as argument 0, like the summaries of the bytecode
+analyzer. A `FlowModel` has a bitmask of the arguments which may taint
+the return value, and one of the arguments which may taint the receiver,
+like the string appended to a StringBuilder. The receivers of the
+StringBuilder methods are string carriers, whose taint the bytecode
+analyzer tracks by allocation site.
+
+    from jpamb.taint.models import ModelTable
+
+    models = ModelTable.default()
+    if (model := models.lookup(methodid)) is not None:
+        ...
+
+Models are keyed by class and method name, for all overloads, or by the
+full method id for a single overload, which takes precedence. The table
+is compiled into a list of models, and the row of each method id is
+looked up once.
+
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from jpamb import jvm
+
+# All arguments, whatever their number
+ALL = -1
+
+
+@dataclass(frozen=True, slots=True)
+class FlowModel:
+    returns: int = 0  # Bit i: argument i may taint the return value
+    receiver: int = 0  # Bit i: argument i may taint the receiver
+    result_is_receiver: bool = False  # The method returns its receiver, like append
+    carrier: bool = False  # The receiver is a string carrier, like a StringBuilder
+
+
+def _models() -> Iterable[tuple[str, FlowModel]]:
+    receiver = FlowModel(returns=0b1)
+    nothing = FlowModel()
+    for name in (
+        "trim",
+        "strip",
+        "toUpperCase",
+        "toLowerCase",
+        "intern",
+        "toString",
+        "substring",
+        "subSequence",
+        "split",
+        "repeat",
+        "charAt",
+        "toCharArray",
+    ):
+        yield f"java.lang.String.{name}", receiver
+    # Booleans and ints do not carry SQL
+    for name in (
+        "length",
+        "isEmpty",
+        "equals",
+        "equalsIgnoreCase",
+        "hashCode",
+        "compareTo",
+        "startsWith",
+        "endsWith",
+        "contains",
+        "indexOf",
+        "lastIndexOf",
+        "matches",
+    ):
+        yield f"java.lang.String.{name}", nothing
+    yield "java.lang.String.concat", FlowModel(returns=0b11)
+    # The replaced text does not end up in the result, the replacement does
+    for name in ("replace", "replaceAll", "replaceFirst"):
+        yield f"java.lang.String.{name}", FlowModel(returns=0b101)
+    for name in ("format", "formatted", "join", "valueOf", "copyValueOf"):
+        yield f"java.lang.String.{name}", FlowModel(returns=ALL)
+
+    for builder in ("java.lang.StringBuilder", "java.lang.StringBuffer"):
+        yield f"{builder}.append", FlowModel(0b11, 0b10, True, True)
+        # insert(offset, value), replace(start, end, value)
+        yield f"{builder}.insert", FlowModel(0b101, 0b100, True, True)
+        yield f"{builder}.replace", FlowModel(0b1001, 0b1000, True, True)
+        yield f"{builder}.reverse", FlowModel(0b1, 0, True, True)
+        for name in ("toString", "substring", "subSequence", "charAt"):
+            yield f"{builder}.{name}", FlowModel(returns=0b1, carrier=True)
+        for name in ("length", "indexOf", "lastIndexOf", "isEmpty"):
+            yield f"{builder}.{name}", nothing
+
+
+class ModelTable:
+    """The flow models of library methods, in a list indexed by row."""
+
+    def __init__(self, models: Iterable[tuple[str, FlowModel]] = ()):
+        self.models: list[FlowModel] = []
+        self._index: dict[str, int] = {}
+        self._rows: dict[jvm.AbsMethodID, int] = {}
+        for key, model in models:
+            self.add(key, model)
+
+    @classmethod
+    def default(cls) -> "ModelTable":
+        """The models of the String and StringBuilder methods."""
+        return cls(_models())
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def add(self, key: str, model: FlowModel):
+        """Add the model of a method, class.name or class.name:descriptor."""
+        self._index[key.replace("/", ".")] = len(self.models)
+        self.models.append(model)
+        self._rows.clear()
+
+    def row(self, method: jvm.AbsMethodID) -> int:
+        """The row of the model of a method, -1 if there is none."""
+        if (row := self._rows.get(method)) is None:
+            full = str(method).replace("/", ".")
+            row = self._index.get(full, self._index.get(full.partition(":")[0], -1))
+            self._rows[method] = row
+        return row
+
+    def lookup(self, method: jvm.AbsMethodID) -> FlowModel | None:
+        row = self.row(method)
+        return None if row < 0 else self.models[row]
@@ -0,0 +1,162 @@
+"""
+jpamb.taint.rules
+
+Classification of methods by rules, such as the sources and sinks of
+jpamb.taint.sources, compiled into one Aho-Corasick automaton.
+
+A rule is a kind and a pattern, and matches the methods whose fully
+qualified name contains the pattern, like `any(p in name for p in rules)`
+does, so the rules can name a method (java.sql.Statement.execute), every
+method of a class (java.sql.Statement.) or of a package (java.sql.). A
+trailing `*` is dropped, so java.sql.* is java.sql. as well.
+
+The automaton finds all patterns in one pass over the name, whatever the
+number of rules, and the kinds of each method are cached, so each method
+is only matched once.
+
+    from jpamb.taint.rules import RuleIndex
+
+    rules = RuleIndex.default()
+    rules.load("extra.rules")
+    if rules.matches("sink", methodid):
+        ...
+
+Rule files have a rule per line, the kind followed by the pattern, and #
+starts a comment:
+
+    source javax.servlet.http.HttpServletRequest.getParameter
+    sink   java.sql.*
+
+"""
+
+from collections import deque
+import hashlib
+from pathlib import Path
+from typing import Iterable
+
+from jpamb import jvm
+
+
+class RuleIndex:
+    """Rules of any number of kinds, with the kinds as bits of a mask."""
+
+    def __init__(self, rules: Iterable[tuple[str, str]] = ()):
+        self.kinds: dict[str, int] = {}
+        self.patterns: dict[str, int] = {}
+        self._automaton: tuple | None = None
+        self._cache: dict[jvm.AbsMethodID | str, int] = {}
+        self.add_all(rules)
+
+    @classmethod
+    def default(cls) -> "RuleIndex":
+        """The sources, sinks, taint-preserving and string builder methods
+        of jpamb.taint.sources."""
+        from jpamb.taint import sources
+
+        return cls(
+            [("source", p) for p in sorted(sources.UNTRUSTED_SOURCES)]
+            + [("sink", p) for p in sorted(sources.SQL_SINKS)]
+            + [("preserving", p) for p in sorted(sources.TAINT_PRESERVING)]
+            + [("append", p) for p in sorted(sources.BUILDER_APPEND)]
+            + [("tostring", p) for p in sorted(sources.BUILDER_TOSTRING)]
+        )
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __getstate__(self) -> dict:
+        # The automaton and the cache are rebuilt on demand
+        return {"kinds": self.kinds, "patterns": self.patterns}
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+        self.kinds = dict(state["kinds"])
+        self.patterns = dict(state["patterns"])
+
+    def kind(self, kind: str) -> int:
+        """The bit of a kind."""
+        if (bit := self.kinds.get(kind)) is None:
+            bit = self.kinds[kind] = 1 << len(self.kinds)
+        return bit
+
+    def digest(self) -> str:
+        """A hash of the rules, for caches of what was derived from them."""
+        h = hashlib.sha256()
+        names = {bit: kind for kind, bit in self.kinds.items()}
+        for pattern in sorted(self.patterns):
+            mask = self.patterns[pattern]
+            kinds = sorted(kind for bit, kind in names.items() if mask & bit)
+            h.update(f"{pattern} {' '.join(kinds)}\n".encode())
+        return h.hexdigest()[:16]
+
+    def add(self, kind: str, pattern: str):
+        pattern = pattern.replace("/", ".").removesuffix("*")
+        if not pattern:
+            raise ValueError(f"Empty pattern for {kind}")
+        self.patterns[pattern] = self.patterns.get(pattern, 0) | self.kind(kind)
+        self._automaton = None
+        self._cache.clear()
+
+    def add_all(self, rules: Iterable[tuple[str, str]]):
+        for kind, pattern in rules:
+            self.add(kind, pattern)
+
+    def load(self, path: Path | str):
+        """Add the rules of a rule file."""
+        with open(path) as fp:
+            for n, line in enumerate(fp, 1):
+                line = line.partition("#")[0].split()
+                if not line:
+                    continue
+                if len(line) != 2:
+                    raise ValueError(f"{path}:{n}: expected a kind and a pattern")
+                self.add(*line)
+
+    def _compile(self) -> tuple:
+        """The goto, fail and output of the automaton, with the outputs of
+        the states along the fail links merged in."""
+        goto: list[dict[str, int]] = [{}]
+        output = [0]
+        for pattern, mask in self.patterns.items():
+            state = 0
+            for char in pattern:
+                if (child := goto[state].get(char)) is None:
+                    child = goto[state][char] = len(goto)
+                    goto.append({})
+                    output.append(0)
+                state = child
+            output[state] |= mask
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(char, 0)
+                output[child] |= output[fail[child]]
+        return goto, fail, output
+
+    def match(self, name: str) -> int:
+        """The kinds of the rules matching a name, as a mask."""
+        if self._automaton is None:
+            self._automaton = self._compile()
+        goto, fail, output = self._automaton
+        state = mask = 0
+        for char in name:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            mask |= output[state]
+        return mask
+
+    def classify(self, method: jvm.AbsMethodID | str) -> int:
+        """The kinds of a method, as a mask, which is cached for the method."""
+        if (mask := self._cache.get(method)) is None:
+            mask = self._cache[method] = self.match(str(method).replace("/", "."))
+        return mask
+
+    def matches(self, kind: str, method: jvm.AbsMethodID | str) -> bool:
+        return bool(self.classify(method) & self.kinds.get(kind, 0))
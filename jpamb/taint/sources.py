@@ -7,8 +7,10 @@ Sources are where untrusted data originates (e.g., HTTP requests).
 Sinks are where untrusted data becomes dangerous (e.g., SQL execution).
 """
 
-from typing import Set
-from dataclasses import dataclass
+from typing import FrozenSet, Set
+from dataclasses import dataclass, field
+
+from .rules import RuleIndex
 
 
 # Define untrusted sources (where taint originates)
@@ -51,6 +53,25 @@ SQL_SINKS: Set[str] = {
     # so we don't include it as a sink
 }
 
+# Methods whose result is tainted if their receiver or an argument is
+TAINT_PRESERVING: Set[str] = {
+    "java.lang.String.concat",
+    "java.lang.String.trim",
+    "java.lang.String.toUpperCase",
+    "java.lang.String.toLowerCase",
+    "java.lang.String.substring",
+    "java.lang.String.replace",
+    "java.lang.String.replaceAll",
+    "java.lang.String.format",
+    "java.lang.String.join",
+    "java.lang.StringBuilder.append",
+    "java.lang.StringBuffer.append",
+}
+
+# The methods of the string builders, which are tracked by allocation site
+BUILDER_APPEND: Set[str] = {"StringBuilder.append", "StringBuffer.append"}
+BUILDER_TOSTRING: Set[str] = {"StringBuilder.toString", "StringBuffer.toString"}
+
 
 @dataclass
 class SourceSinkDetector:
@@ -60,10 +81,27 @@ class SourceSinkDetector:
     This class helps identify:
     - Sources: Where untrusted data enters the program
     - Sinks: Where untrusted data can cause harm
+
+    The sources and sinks are compiled into a RuleIndex. They are frozen
+    sets, so they cannot change behind the index, and assigning new ones
+    compiles the index again.
     """
 
-    sources: Set[str]
-    sinks: Set[str]
+    sources: FrozenSet[str]
+    sinks: FrozenSet[str]
+    rules: RuleIndex = field(init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value):
+        if name in ("sources", "sinks"):
+            value = frozenset(value)
+        super().__setattr__(name, value)
+        if name in ("sources", "sinks") and "rules" in self.__dict__:
+            self.__post_init__()
+
+    def __post_init__(self):
+        self.rules = RuleIndex(
+            [("source", s) for s in self.sources] + [("sink", s) for s in self.sinks]
+        )
 
     @classmethod
     def default(cls) -> "SourceSinkDetector":
@@ -87,7 +125,7 @@ class SourceSinkDetector:
             >>> detector.is_source("java.lang.String.length")
             False
         """
-        return any(source in method_name for source in self.sources)
+        return self.rules.matches("source", method_name)
 
     def is_sink(self, method_name: str) -> bool:
         """
@@ -106,7 +144,7 @@ class SourceSinkDetector:
             >>> detector.is_sink("java.lang.System.out.println")
             False
         """
-        return any(sink in method_name for sink in self.sinks)
+        return self.rules.matches("sink", method_name)
 
     def get_source_type(self, method_name: str) -> str:
         """
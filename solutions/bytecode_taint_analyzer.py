@@ -12,17 +12,32 @@ Advantages over source-based analysis:
 - Canonical representation (no syntactic variations)
 """
 
+import argparse
+import json
 import logging
+import operator
 import sys
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 from pathlib import Path
 
 import jpamb
-from jpamb import jvm
+from jpamb import callgraph, cfg, columnar, ifds, jvm
 from jpamb.model import Suite
-from jpamb.taint import TaintedValue, TaintTransfer, SourceSinkDetector, UNTRUSTED_SOURCES, SQL_SINKS
+from jpamb.persistent import PMap
+from jpamb.taint import (
+    TaintedValue,
+    TaintTransfer,
+    SourceSinkDetector,
+    UNTRUSTED_SOURCES,
+    SQL_SINKS,
+)
+from jpamb.taint.models import FlowModel, ModelTable
+from jpamb.taint.rules import RuleIndex
+from jpamb.taint.sources import TAINT_PRESERVING
+from jpamb.taint import facts as taint_facts
 
 # Setup logging
 log = logging.getLogger(__name__)
@@ -31,15 +46,26 @@ logging.basicConfig(level=logging.WARNING)  # Change to WARNING to reduce noise
 # Initialize source/sink detector
 detector = SourceSinkDetector.default()
 
+# The opcodes come from jvm2json, so skip checking their fields
+jvm.Opcode.strict = False
+
 # Constants
-INITIAL_HEAP_ADDRESS = 1000  # Starting address for heap allocation
-MAX_WORKLIST_ITERATIONS = 1000  # Maximum iterations for fixed-point computation
+HEAP_RECENCY = (
+    1  # Latest objects of an allocation site kept apart from its summary object
+)
+MAX_VISITS_PER_BLOCK = (
+    100  # Safety net, the widening at loop heads ensures a fixed point
+)
+TRANSFER_CACHE_SIZE = (
+    8  # Exit states kept per block by the fingerprint of their entry state
+)
 
 
 # ============================================================================
 # Method Resolution
 # ============================================================================
 
+
 def resolve_method_id(method_signature: str, suite: Suite) -> Optional[jvm.AbsMethodID]:
     """
     Resolve a simple method signature to a JPAMB AbsMethodID.
@@ -61,12 +87,12 @@ def resolve_method_id(method_signature: str, suite: Suite) -> Optional[jvm.AbsMe
     #   2. "jpamb.sqli.SQLi_DirectConcat.vulnerable:(A)V"
 
     # Strip signature part if present
-    if ':' in method_signature:
-        base_signature = method_signature.split(':')[0]
+    if ":" in method_signature:
+        base_signature = method_signature.split(":")[0]
     else:
         base_signature = method_signature
 
-    parts = base_signature.rsplit('.', 1)
+    parts = base_signature.rsplit(".", 1)
     if len(parts) != 2:
         log.error(f"Invalid method signature format: {method_signature}")
         return None
@@ -79,40 +105,24 @@ def resolve_method_id(method_signature: str, suite: Suite) -> Optional[jvm.AbsMe
         # Parse class name to ClassName object
         class_obj = jvm.ClassName.decode(class_name)
 
-        # Get class info from decompiled JSON
-        class_info = suite.findclass(class_obj)
+        # Look up the overloads in the method index of the class
+        overloads = suite.method_index(class_obj).by_name(method_name)
 
-        # Find methods with matching name (methods is a list of dicts)
-        matching_methods = [
-            method_dict for method_dict in class_info['methods']
-            if method_dict['name'] == method_name
-        ]
-
-        if not matching_methods:
+        if not overloads:
             log.error(f"No method named '{method_name}' found in class {class_name}")
             return None
 
-        if len(matching_methods) > 1:
-            log.warning(f"Multiple methods named '{method_name}' found, using first one")
-
-        # Build AbsMethodID from the method dict
-        method_dict = matching_methods[0]
-
-        # Convert params to ParameterType
-        param_types = []
-        for param in method_dict['params']:
-            param_type = jvm.Type.from_json(param['type'])
-            param_types.append(param_type)
-
-        # Convert return type
-        return_type = jvm.Type.from_json(method_dict['returns']['type']) if method_dict['returns']['type'] else None
-
-        # Build MethodID - params must be ParameterType(tuple)
-        method_ext = jvm.MethodID(
-            name=method_name,
-            params=jvm.ParameterType(tuple(param_types)),  # ParameterType takes a tuple
-            return_type=return_type
-        )
+        method_ext = overloads[0]
+        if ":" in method_signature:
+            # Prefer the overload matching the given descriptor
+            wanted = jvm.AbsMethodID.decode(method_signature).extension
+            method_ext = next(
+                (m for m in overloads if m.params == wanted.params), method_ext
+            )
+        elif len(overloads) > 1:
+            log.warning(
+                f"Multiple methods named '{method_name}' found, using first one"
+            )
 
         # Build AbsMethodID
         method_id = jvm.AbsMethodID(class_obj, method_ext)
@@ -130,6 +140,7 @@ def resolve_method_id(method_signature: str, suite: Suite) -> Optional[jvm.AbsMe
 # Abstract State Components
 # ============================================================================
 
+
 @dataclass
 class HeapObject:
     """
@@ -142,14 +153,14 @@ class HeapObject:
     the TAJ-style string carrier approach (see TaintValue.string_carrier).
     StringBuilder/StringBuffer are now treated as primitives, not heap objects.
     """
+
     class_name: str
     taint: TaintedValue
     appended_values: List[TaintedValue] = field(default_factory=list)
 
     def is_string_builder(self) -> bool:
         """Check if this is a StringBuilder or StringBuffer"""
-        return ("StringBuilder" in self.class_name or
-                "StringBuffer" in self.class_name)
+        return "StringBuilder" in self.class_name or "StringBuffer" in self.class_name
 
     def append(self, value: TaintedValue) -> None:
         """Append a value (for StringBuilder/StringBuffer)"""
@@ -164,23 +175,44 @@ class HeapObject:
             return TaintTransfer.concat(*self.appended_values)
         return self.taint
 
+    def join(self, other: "HeapObject") -> "HeapObject":
+        """Summarize two objects of the same allocation site."""
+        if self.taint.is_tainted or not other.taint.is_tainted:
+            return self
+        return other
+
     def __repr__(self):
         taint_marker = "[TAINTED]" if self.taint.is_tainted else "[SAFE]"
         return f"<{self.class_name} {taint_marker}>"
 
 
+def heap_address(site: int, age: int) -> int:
+    """
+    The abstract heap address of an object by its allocation site, the
+    offset of its `new` in the method of the state, like the sites of the
+    string carriers, and its age among the objects allocated there. So the
+    addresses are bounded by the size of the method. The HEAP_RECENCY latest
+    objects have ages 0, 1, ..., and all older objects are merged into the
+    summary object with age HEAP_RECENCY.
+    """
+    return site * (HEAP_RECENCY + 1) + age
+
+
 @dataclass
 class TaintValue:
     """
     Taint value that can represent either a concrete value or a heap reference.
 
-    This is what we track on the JVM stack and in local variables.
+    The abstract state only keeps taint bits for the JVM stack and local
+    variables (see AbstractState), this is the full value built from them
+    when a report or log message needs it.
 
     TAJ-Style String Carriers:
     - StringBuilder/StringBuffer are treated as primitives (not heap objects)
     - is_string_carrier flag marks these special values
     - carrier_taint accumulates taint from all append() operations
     """
+
     tainted_value: TaintedValue
     heap_ref: Optional[int] = None  # Reference to HeapObject if this is an object
     # TAJ-style string carrier support
@@ -220,23 +252,9 @@ class TaintValue:
             tainted_value=initial_taint,
             heap_ref=None,
             is_string_carrier=True,
-            carrier_taint=initial_taint
+            carrier_taint=initial_taint,
         )
 
-    def accumulate_taint(self, new_taint: TaintedValue) -> None:
-        """
-        Accumulate taint for string carrier (TAJ approach).
-
-        This is used when append() is called on a StringBuilder/StringBuffer.
-        """
-        if self.is_string_carrier:
-            if self.carrier_taint:
-                self.carrier_taint = TaintTransfer.concat(self.carrier_taint, new_taint)
-            else:
-                self.carrier_taint = new_taint
-            # Also update tainted_value to keep it in sync
-            self.tainted_value = self.carrier_taint
-
     @property
     def is_tainted(self) -> bool:
         return self.tainted_value.is_tainted
@@ -248,23 +266,61 @@ class TaintValue:
         return f"TaintValue({marker} {self.tainted_value.value})"
 
 
-@dataclass
+# Abstract values on the stack and in locals are ints: bit 0 is the taint of
+# the value itself, and the bits above it are the allocation sites of the
+# string carriers the value may be (see AbstractState.carriers).
+TRUSTED = 0
+UNTRUSTED = 1
+
+
+def carrier(site: int) -> int:
+    """The abstract value of a string carrier allocated at site."""
+    return 2 << site
+
+
+@dataclass(slots=True)
 class AbstractState:
     """
     Abstract state for taint analysis.
 
-    Represents the state of the JVM at a specific program point:
-    - stack: Operand stack
-    - locals: Local variable table (parameters + local variables)
-    - heap: Abstract heap for tracking objects
+    Represents the state of the JVM at a specific program point, with the
+    taint of the locals and the stack packed into integer bitmasks, so that
+    copying and joining states, and comparing them to detect a fixed point,
+    are a few integer operations:
+    - locals: Bit i is set if local i is tainted
+    - defined: Bit i is set if local i has been assigned on some path,
+      and locals not assigned on every path are tainted
+    - stack: Bit i is set if stack slot i (from the bottom) is tainted
+    - height: Number of values on the operand stack
+    - carriers: Bit s is set if the string carriers allocated at site s
+      (the offset of their `new`) have had tainted data appended
+    - refs: The carrier sites, as a bitmask, of the locals which may hold
+      string carriers
+    - stack_refs: The same for the stack slots, as a linked list of
+      (slot, sites, rest) tuples from the top of the stack, or None
+    - heap: Abstract heap for tracking objects, bounded by the number of
+      allocation sites of the method
+
+    The maps are persistent, so copies share them and a state stored in
+    IN or OUT never changes when a copy of it does.
     - pc: Program counter
     - vulnerability_detected: Flag indicating if SQL injection found
+
+    A value is tainted if its own bit is set or if it may be a tainted
+    string carrier. The TaintValue payloads are only built by `value()` and
+    `materialize()`, when a report needs them.
     """
-    stack: List[TaintValue]
-    locals: Dict[int, TaintValue]
-    heap: Dict[int, HeapObject]
-    pc: int
-    next_heap_addr: int = 0
+
+    locals: int = 0
+    defined: int = 0
+    stack: int = 0
+    height: int = 0
+    carriers: int = 0
+    refs: PMap = field(default_factory=PMap)
+    stack_refs: Optional[tuple] = None
+    heap: PMap = field(default_factory=PMap)
+    pc: int = 0
+    method: Optional[jvm.AbsMethodID] = None
     vulnerability_detected: bool = False
 
     @classmethod
@@ -274,65 +330,147 @@ class AbstractState:
 
         All method parameters are marked as UNTRUSTED (they come from external sources).
         """
-        locals = {}
         param_count = len(method.extension.params)
-
-        # Mark all parameters as UNTRUSTED
-        for i in range(param_count):
-            locals[i] = TaintValue.untrusted(
-                f"param_{i}",
-                source="method_parameter"
-            )
+        params = (1 << param_count) - 1
 
         log.debug(f"Initial state: {param_count} parameters marked as UNTRUSTED")
 
-        return cls(
-            stack=[],
-            locals=locals,
-            heap={},
-            pc=0,
-            next_heap_addr=INITIAL_HEAP_ADDRESS
-        )
+        return cls(locals=params, defined=params, method=method)
+
+    def allocate_heap_object(self, class_name: str, offset: int) -> int:
+        """
+        Allocate new object in abstract heap, at the allocation site of
+        the `new` at offset.
 
-    def allocate_heap_object(self, class_name: str) -> int:
-        """Allocate new object in abstract heap"""
-        addr = self.next_heap_addr
-        self.next_heap_addr += 1
-        self.heap[addr] = HeapObject(
-            class_name=class_name,
-            taint=TaintedValue.trusted("", source="new_object")
+        The objects already allocated at the site age by one, and the
+        oldest is merged into the summary object of the site.
+        """
+        site, heap, k = offset, self.heap, HEAP_RECENCY
+        obj = HeapObject(
+            class_name=class_name, taint=TaintedValue.trusted("", source="new_object")
         )
+        addr = heap_address(site, 0)
+        if k == 0:
+            if (summary := heap.get(addr)) is not None:
+                obj = summary.join(obj)
+        elif heap.get(addr) is not None:
+            for age in range(k, 0, -1):
+                older = heap.get(heap_address(site, age - 1))
+                if older is None:
+                    continue
+                if (
+                    age == k
+                    and (summary := heap.get(heap_address(site, k))) is not None
+                ):
+                    older = summary.join(older)
+                heap = heap.set(heap_address(site, age), older)
+        self.heap = heap.set(addr, obj)
         log.debug(f"Allocated {class_name} at heap addr {addr}")
         return addr
 
-    def push(self, value: TaintValue) -> None:
-        """Push value onto stack"""
-        self.stack.append(value)
+    def tainted(self, value: int) -> bool:
+        """Whether an abstract value is tainted in this state."""
+        return bool(value & 1 or (value >> 1) & self.carriers)
 
-    def pop(self) -> TaintValue:
+    def push(self, value: int) -> None:
+        """Push value onto stack"""
+        i = self.height
+        if value & 1:
+            self.stack |= 1 << i
+        if value >> 1:
+            self.stack_refs = (i, value >> 1, self.stack_refs)
+        self.height = i + 1
+
+    def pop(self) -> int:
         """Pop value from stack"""
-        if not self.stack:
+        if not self.height:
             raise RuntimeError(f"Stack underflow at pc={self.pc}")
-        return self.stack.pop()
-
-    def peek(self) -> TaintValue:
+        i = self.height = self.height - 1
+        value = (self.stack >> i) & 1
+        if value:
+            self.stack ^= 1 << i
+        if (refs := self.stack_refs) is not None and refs[0] == i:
+            value |= refs[1] << 1
+            self.stack_refs = refs[2]
+        return value
+
+    def peek(self) -> int:
         """Peek at top of stack without popping"""
-        if not self.stack:
+        if not self.height:
             raise RuntimeError(f"Stack underflow at pc={self.pc}")
-        return self.stack[-1]
+        i = self.height - 1
+        refs = self.stack_refs
+        return (self.stack >> i) & 1 | (
+            refs[1] << 1 if refs is not None and refs[0] == i else 0
+        )
+
+    def load(self, index: int) -> Optional[int]:
+        """The value of a local, or None if it has not been assigned."""
+        if not (self.defined >> index) & 1:
+            return None
+        return (self.locals >> index) & 1 | self.refs.get(index, 0) << 1
+
+    def store(self, index: int, value: int) -> None:
+        """Assign a value to a local."""
+        bit = 1 << index
+        self.defined |= bit
+        self.locals = self.locals | bit if value & 1 else self.locals & ~bit
+        if value >> 1:
+            self.refs = self.refs.set(index, value >> 1)
+        elif self.refs:
+            self.refs = self.refs.delete(index)
+
+    def append(self, value: int, data: int) -> None:
+        """Append data to the string carriers value may be."""
+        if self.tainted(data):
+            self.carriers |= value >> 1
+
+    def value(self, value: int) -> TaintValue:
+        """The payload of an abstract value."""
+        if self.tainted(value):
+            taint = TaintedValue.untrusted("value", source="packed")
+        else:
+            taint = TaintedValue.trusted("value", source="packed")
+        if value >> 1:
+            return TaintValue.string_carrier(taint)
+        return TaintValue.from_tainted(taint)
+
+    def materialize(self) -> Tuple[List[TaintValue], Dict[int, TaintValue]]:
+        """The payloads of the stack and of the assigned locals."""
+        stack_refs, refs = {}, self.stack_refs
+        while refs is not None:
+            stack_refs[refs[0]], refs = refs[1], refs[2]
+        stack = [
+            self.value((self.stack >> i) & 1 | stack_refs.get(i, 0) << 1)
+            for i in range(self.height)
+        ]
+        locals = {
+            i: self.value(self.load(i))
+            for i in range(self.defined.bit_length())
+            if (self.defined >> i) & 1
+        }
+        return stack, locals
 
     def __repr__(self):
-        return f"<State pc={self.pc} stack={len(self.stack)} locals={len(self.locals)} heap={len(self.heap)}>"
+        return (
+            f"<State pc={self.pc} stack={self.height} locals={self.defined.bit_count()} "
+            f"tainted={self.locals:b}/{self.stack:b} heap={len(self.heap)}>"
+        )
 
     def copy(self) -> "AbstractState":
-        """Create a deep copy of the state for branch exploration"""
+        """Create a copy of the state for branch exploration, sharing the maps"""
         return AbstractState(
-            stack=list(self.stack),
-            locals=dict(self.locals),
-            heap=dict(self.heap),
-            pc=self.pc,
-            next_heap_addr=self.next_heap_addr,
-            vulnerability_detected=self.vulnerability_detected
+            self.locals,
+            self.defined,
+            self.stack,
+            self.height,
+            self.carriers,
+            self.refs,
+            self.stack_refs,
+            self.heap,
+            self.pc,
+            self.method,
+            self.vulnerability_detected,
         )
 
     @staticmethod
@@ -341,216 +479,107 @@ class AbstractState:
         Join two abstract states (lattice join operation).
 
         For taint analysis: if a variable is tainted in ANY predecessor,
-        it must be considered tainted at the join point.
+        it must be considered tainted at the join point, so the taint bits
+        are OR'ed.
 
         This is the ⊔ operation: TRUSTED ⊔ UNTRUSTED = UNTRUSTED
-        """
-        # Merge locals: if tainted in either, result is tainted
-        merged_locals = {}
-        all_keys = set(state1.locals.keys()) | set(state2.locals.keys())
-        for key in all_keys:
-            val1 = state1.locals.get(key)
-            val2 = state2.locals.get(key)
-            if val1 is None:
-                merged_locals[key] = val2
-            elif val2 is None:
-                merged_locals[key] = val1
-            elif val1.is_tainted or val2.is_tainted:
-                # Join: if either is tainted, result is tainted
-                merged_locals[key] = TaintValue.untrusted("joined", source="control_flow_join")
-            else:
-                merged_locals[key] = val1
-
-        # For stack: at join points, stacks should be same height
-        # Use conservative approach - if either is tainted, result is tainted
-        merged_stack = []
-        max_len = max(len(state1.stack), len(state2.stack))
-        for i in range(max_len):
-            val1 = state1.stack[i] if i < len(state1.stack) else None
-            val2 = state2.stack[i] if i < len(state2.stack) else None
-            if val1 is None:
-                merged_stack.append(val2)
-            elif val2 is None:
-                merged_stack.append(val1)
-            elif val1.is_tainted or val2.is_tainted:
-                merged_stack.append(TaintValue.untrusted("joined", source="control_flow_join"))
-            else:
-                merged_stack.append(val1)
-
-        # Vulnerability detected if detected in either path
-        vuln = state1.vulnerability_detected or state2.vulnerability_detected
 
+        A local assigned in only one of the states may be unassigned at the
+        join point, and reading an unassigned local is UNTRUSTED, see
+        `transfer_load`, so it is tainted too.
+        """
+        # For stack: at join points, stacks should be same height, if not
+        # the slots of the higher stack are kept
         return AbstractState(
-            stack=merged_stack,
-            locals=merged_locals,
-            heap={**state1.heap, **state2.heap},
-            pc=state1.pc,  # PC at join point
-            next_heap_addr=max(state1.next_heap_addr, state2.next_heap_addr),
-            vulnerability_detected=vuln
+            state1.locals | state2.locals | state1.defined ^ state2.defined,
+            state1.defined | state2.defined,
+            state1.stack | state2.stack,
+            max(state1.height, state2.height),
+            state1.carriers | state2.carriers,
+            state1.refs.merge(state2.refs, operator.or_),
+            _join_stack_refs(state1.stack_refs, state2.stack_refs),
+            state1.heap.merge(state2.heap, HeapObject.join),
+            state1.pc,  # PC at join point
+            state1.method,
+            state1.vulnerability_detected or state2.vulnerability_detected,
         )
 
+    @staticmethod
+    def widen(old: "AbstractState", new: "AbstractState") -> "AbstractState":
+        """
+        Widen the state at a loop head with the state of the next iteration.
+
+        The result is the join of both, slot by slot, so the states at a
+        loop head only grow and the finite taint lattice reaches a fixed
+        point. The JVM verifier ensures the same stack height at a loop
+        head on every iteration, so the height of the old state is kept,
+        and slots above it, which would only come from an opcode with a
+        wrong stack effect, are dropped rather than grow the stack forever.
+        """
+        state = AbstractState.join(old, new)
+        height = old.height
+        if state.height > height:
+            state.stack &= (1 << height) - 1
+            refs = state.stack_refs
+            while refs is not None and refs[0] >= height:
+                refs = refs[2]
+            state.stack_refs = refs
+            state.height = height
+        return state
+
+    def fingerprint(self) -> tuple:
+        """
+        Everything the taint of later states depends on: the taint of the
+        locals and the stack, and the string carriers. The heap only holds
+        objects created TRUSTED which never change, so it has no part in it.
+        """
+        return (
+            self.locals,
+            self.defined,
+            self.stack,
+            self.height,
+            self.carriers,
+            tuple(sorted(self.refs.items())) if self.refs else (),
+            self.stack_refs,
+        )
+
+    def heap_shape(self) -> tuple:
+        """
+        The addresses of the heap and whether their objects are tainted.
+        The heap has at most HEAP_RECENCY + 1 objects per allocation site
+        of the method, so this is bounded too.
+        """
+        return tuple((addr, obj.taint.is_tainted) for addr, obj in self.heap.items())
+
     def __eq__(self, other: "AbstractState") -> bool:
         """Check if two states are equal (for fixed-point detection)"""
         if not isinstance(other, AbstractState):
             return False
-        # Compare taint status of locals
-        if set(self.locals.keys()) != set(other.locals.keys()):
-            return False
-        for key in self.locals:
-            if self.locals[key].is_tainted != other.locals.get(key, TaintValue.trusted("")).is_tainted:
-                return False
-        return True
+        return self.fingerprint() == other.fingerprint()
 
     def __hash__(self):
-        return hash(tuple((k, v.is_tainted) for k, v in sorted(self.locals.items())))
-
-
-# ============================================================================
-# Control Flow Graph (CFG)
-# ============================================================================
-
-@dataclass
-class BasicBlock:
-    """
-    A basic block in the control flow graph.
-
-    A basic block is a sequence of instructions with:
-    - Single entry point (first instruction)
-    - Single exit point (last instruction)
-    - No branches except at the end
-    """
-    id: int                          # Block identifier (start offset)
-    start_offset: int                # First instruction offset
-    end_offset: int                  # Last instruction offset (inclusive)
-    instructions: List[jvm.Opcode]   # Instructions in this block
-    successors: List[int] = field(default_factory=list)    # Successor block IDs
-    predecessors: List[int] = field(default_factory=list)  # Predecessor block IDs
-
-    def __repr__(self):
-        return f"BB{self.id}[{self.start_offset}-{self.end_offset}] -> {self.successors}"
+        return hash(self.fingerprint())
 
 
-def build_cfg(opcodes: List[jvm.Opcode]) -> Dict[int, BasicBlock]:
-    """
-    Build a Control Flow Graph from bytecode opcodes.
-
-    Algorithm:
-    1. Identify leaders (block start points):
-       - First instruction
-       - Target of any branch
-       - Instruction after any branch
-    2. Create basic blocks between leaders
-    3. Connect blocks with edges based on control flow
-
-    Returns:
-        Dictionary mapping block start offset to BasicBlock
-    """
-    if not opcodes:
-        return {}
-
-    # Build offset -> opcode index mapping
-    offset_to_idx = {op.offset: i for i, op in enumerate(opcodes)}
-
-    # Build index -> offset mapping (for branch targets)
-    # NOTE: In jpamb, branch targets are instruction INDICES, not byte offsets
-    idx_to_offset = {i: op.offset for i, op in enumerate(opcodes)}
-
-    # Step 1: Identify leaders (by instruction index)
-    leaders = {0}  # First instruction is always a leader
-
-    for i, op in enumerate(opcodes):
-        if isinstance(op, (jvm.Goto, jvm.If, jvm.Ifz)):
-            # Target of branch is a leader (target is instruction INDEX)
-            target_idx = op.target
-            if 0 <= target_idx < len(opcodes):
-                leaders.add(target_idx)
-            # Instruction after branch is a leader (fall-through)
-            if i + 1 < len(opcodes):
-                leaders.add(i + 1)
-        elif isinstance(op, jvm.Return):
-            # Instruction after return is a leader (if any)
-            if i + 1 < len(opcodes):
-                leaders.add(i + 1)
-
-    # Step 2: Create basic blocks
-    sorted_leaders = sorted(leaders)
-    blocks: Dict[int, BasicBlock] = {}
-
-    for i, leader_idx in enumerate(sorted_leaders):
-        # Find end of this block
-        if i + 1 < len(sorted_leaders):
-            end_idx = sorted_leaders[i + 1] - 1
-        else:
-            end_idx = len(opcodes) - 1
-
-        block_instructions = opcodes[leader_idx:end_idx + 1]
-        if block_instructions:
-            start_offset = block_instructions[0].offset
-            end_offset = block_instructions[-1].offset
-            blocks[start_offset] = BasicBlock(
-                id=start_offset,
-                start_offset=start_offset,
-                end_offset=end_offset,
-                instructions=block_instructions
-            )
-
-    # Step 3: Connect blocks with edges
-    for offset, block in blocks.items():
-        if not block.instructions:
-            continue
-
-        last_instr = block.instructions[-1]
-        last_idx = offset_to_idx.get(last_instr.offset, -1)
-
-        if isinstance(last_instr, jvm.Goto):
-            # Unconditional jump - only successor is target
-            # Convert target index to offset
-            target_idx = last_instr.target
-            if 0 <= target_idx < len(opcodes):
-                target_offset = idx_to_offset[target_idx]
-                if target_offset in blocks:
-                    block.successors.append(target_offset)
-                    blocks[target_offset].predecessors.append(offset)
-
-        elif isinstance(last_instr, (jvm.If, jvm.Ifz)):
-            # Conditional branch - two successors: target and fall-through
-            # Target (branch taken) - convert index to offset
-            target_idx = last_instr.target
-            if 0 <= target_idx < len(opcodes):
-                target_offset = idx_to_offset[target_idx]
-                if target_offset in blocks:
-                    block.successors.append(target_offset)
-                    blocks[target_offset].predecessors.append(offset)
-            # Fall-through (branch not taken)
-            if last_idx + 1 < len(opcodes):
-                fall_through_offset = opcodes[last_idx + 1].offset
-                if fall_through_offset in blocks:
-                    block.successors.append(fall_through_offset)
-                    blocks[fall_through_offset].predecessors.append(offset)
-
-        elif isinstance(last_instr, jvm.Return):
-            # Return - no successors
-            pass
-
-        else:
-            # Normal instruction - fall through to next block
-            if last_idx + 1 < len(opcodes):
-                fall_through_offset = opcodes[last_idx + 1].offset
-                if fall_through_offset in blocks:
-                    block.successors.append(fall_through_offset)
-                    blocks[fall_through_offset].predecessors.append(offset)
-
-    log.debug(f"Built CFG with {len(blocks)} basic blocks")
-    for offset, block in sorted(blocks.items()):
-        log.debug(f"  {block}")
-
-    return blocks
+def _join_stack_refs(refs1: Optional[tuple], refs2: Optional[tuple]) -> Optional[tuple]:
+    """Merge two lists of stack refs, ordered by decreasing slots, up to
+    their shared tail."""
+    if refs1 is refs2 or refs2 is None:
+        return refs1
+    if refs1 is None:
+        return refs2
+    if refs1[0] > refs2[0]:
+        return (refs1[0], refs1[1], _join_stack_refs(refs1[2], refs2))
+    if refs1[0] < refs2[0]:
+        return (refs2[0], refs2[1], _join_stack_refs(refs1, refs2[2]))
+    return (refs1[0], refs1[1] | refs2[1], _join_stack_refs(refs1[2], refs2[2]))
 
 
 # ============================================================================
 # Method Signature Matching
 # ============================================================================
 
+
 class MethodMatcher:
     """
     Matches method signatures to identify sources, sinks, and taint-preserving operations.
@@ -559,6 +588,7 @@ class MethodMatcher:
     so we just need to match method signatures.
 
     Sources and sinks are imported from jpamb.taint.sources for consistency.
+    The rules are compiled into a RuleIndex, which matches each method once.
     """
 
     # Known untrusted sources (from jpamb.taint.sources)
@@ -568,68 +598,156 @@ class MethodMatcher:
     SINKS = SQL_SINKS
 
     # Methods that preserve taint (string operations)
-    TAINT_PRESERVING = {
-        "java.lang.String.concat",
-        "java.lang.String.trim",
-        "java.lang.String.toUpperCase",
-        "java.lang.String.toLowerCase",
-        "java.lang.String.substring",
-        "java.lang.String.replace",
-        "java.lang.String.replaceAll",
-        "java.lang.String.format",          # String.format() preserves taint
-        "java.lang.String.join",            # String.join() preserves taint
-        "java.lang.StringBuilder.append",
-        "java.lang.StringBuffer.append",
-    }
+    TAINT_PRESERVING = TAINT_PRESERVING
+
+    RULES = RuleIndex.default()
+
+    @classmethod
+    def load_rules(cls, path: Path):
+        """Add the rules of a rule file, see jpamb.taint.rules."""
+        cls.RULES.load(path)
 
     @classmethod
     def is_source(cls, method: jvm.AbsMethodID) -> bool:
         """Check if method is an untrusted source (fully qualified signatures only)"""
-        method_str = str(method)
-        # Normalize slashes to dots for comparison (bytecode uses java/lang/String, we use java.lang.String)
-        method_str_normalized = method_str.replace("/", ".")
-        return any(source in method_str_normalized for source in cls.SOURCES)
+        return cls.RULES.matches("source", method)
 
     @classmethod
     def is_sink(cls, method: jvm.AbsMethodID) -> bool:
         """Check if method is a SQL sink"""
-        method_str = str(method)
-        # Normalize slashes to dots for comparison (bytecode uses java/sql/Statement, we use java.sql.Statement)
-        method_str_normalized = method_str.replace("/", ".")
-        return any(sink in method_str_normalized for sink in cls.SINKS)
+        return cls.RULES.matches("sink", method)
 
     @classmethod
     def is_taint_preserving(cls, method: jvm.AbsMethodID) -> bool:
         """Check if method preserves taint"""
-        method_str = str(method)
-        # Normalize slashes to dots for comparison
-        method_str_normalized = method_str.replace("/", ".")
-        return any(op in method_str_normalized for op in cls.TAINT_PRESERVING)
+        return cls.RULES.matches("preserving", method)
+
+    @classmethod
+    def is_string_builder_append(cls, method: jvm.AbsMethodID) -> bool:
+        """Check if method is StringBuilder.append()"""
+        return cls.RULES.matches("append", method)
 
     @classmethod
     def is_string_builder_tostring(cls, method: jvm.AbsMethodID) -> bool:
         """Check if method is StringBuilder.toString()"""
-        method_str = str(method)
-        # Normalize slashes to dots for comparison
-        method_str_normalized = method_str.replace("/", ".")
-        return ("StringBuilder.toString" in method_str_normalized or
-                "StringBuffer.toString" in method_str_normalized)
+        return cls.RULES.matches("tostring", method)
 
 
 # ============================================================================
 # Transfer Functions (Core Bytecode Operations)
 # ============================================================================
 
+
+def push_result(state: AbstractState, method: jvm.AbsMethodID, value: int) -> None:
+    """Push the result of a call, unless the method returns void."""
+    if method.extension.return_type is not None:
+        state.push(value)
+
+
+@dataclass(frozen=True, slots=True)
+class MethodSummary:
+    """
+    How taint flows through a method of the suite, computed from its
+    bytecode by `summarize_callees`.
+
+    Arguments are numbered in the order they are pushed, with the receiver
+    of instance methods as argument 0:
+    - returns: Bit i is set if argument i may taint the return value
+    - sinks: Bit i is set if argument i may reach a SQL sink
+    - source_returns: The return value may be tainted by a source called
+      in the method, whatever the arguments
+    - source_sinks: A source called in the method may reach a sink
+
+    The decoded opcodes have no field stores, so there are no
+    argument-to-field flows to summarize.
+    """
+
+    returns: int = 0
+    sinks: int = 0
+    source_returns: bool = False
+    source_sinks: bool = False
+
+    def join(self, other: "MethodSummary") -> "MethodSummary":
+        return MethodSummary(
+            self.returns | other.returns,
+            self.sinks | other.sinks,
+            self.source_returns or other.source_returns,
+            self.source_sinks or other.source_sinks,
+        )
+
+
+# The summaries of the methods of the suite analyzed so far, which calls
+# to them use instead of matching the method names.
+SUMMARIES: Dict[jvm.AbsMethodID, MethodSummary] = {}
+
+
+def apply_summary(
+    state: AbstractState,
+    method: jvm.AbsMethodID,
+    summary: MethodSummary,
+    args: List[int],
+) -> None:
+    """Transfer a call to a method with a summary, given all its arguments."""
+    tainted = 0
+    for i, arg in enumerate(args):
+        if state.tainted(arg):
+            tainted |= 1 << i
+    log.debug("    → Summary %s with tainted arguments %s", summary, f"{tainted:b}")
+
+    if summary.source_sinks or summary.sinks & tainted:
+        log.warning(
+            f"    → Tainted data reaches a SQL sink in {method.extension.name}!"
+        )
+        state.vulnerability_detected = True
+    if summary.source_returns or summary.returns & tainted:
+        push_result(state, method, UNTRUSTED)
+    else:
+        push_result(state, method, TRUSTED)
+
+
+# How taint flows through the JDK string methods, argument by argument
+MODELS = ModelTable.default()
+
+
+def apply_model(
+    state: AbstractState, method: jvm.AbsMethodID, model: FlowModel, args: List[int]
+) -> None:
+    """Transfer a call to a library method with a flow model, given all its
+    arguments. Methods returning their string carrier receiver, like
+    StringBuilder.append, push the carrier back for chaining.
+
+    A carrier receiver with no tracked allocation site, like a builder
+    returned by a call, may hold anything appended to it anywhere, so it
+    is UNTRUSTED."""
+    receiver = args[0] if args else TRUSTED
+    if model.carrier and not receiver >> 1:
+        log.debug("    → Untracked string carrier, UNTRUSTED")
+        receiver = args[0] = UNTRUSTED
+    if model.receiver and receiver >> 1:
+        for i, arg in enumerate(args):
+            if model.receiver >> i & 1:
+                state.append(receiver, arg)
+    log.debug("    → Flow model %s", model)
+
+    if model.result_is_receiver and receiver >> 1:
+        push_result(state, method, receiver)
+    elif any(
+        state.tainted(arg) for i, arg in enumerate(args) if model.returns >> i & 1
+    ):
+        push_result(state, method, UNTRUSTED)
+    else:
+        push_result(state, method, TRUSTED)
+
+
 def transfer_push(opcode: jvm.Push, state: AbstractState) -> AbstractState:
     """
     Handle push (ldc) instruction.
 
     All constants are TRUSTED (they're literals in the bytecode).
     """
-    value = opcode.value
-    log.debug(f"  PUSH {value} → TRUSTED")
+    log.debug("  PUSH %s → TRUSTED", opcode.value)
 
-    state.push(TaintValue.trusted(value.value, source="constant"))
+    state.push(TRUSTED)
     state.pc += 1
     return state
 
@@ -641,12 +759,12 @@ def transfer_load(opcode: jvm.Load, state: AbstractState) -> AbstractState:
     Load from local variable table onto stack.
     """
     index = opcode.index
-    if index not in state.locals:
+    value = state.load(index)
+    if value is None:
         # Unknown local → assume UNTRUSTED for soundness
         log.debug(f"  LOAD local[{index}] → UNKNOWN (assuming UNTRUSTED for safety)")
-        state.push(TaintValue.untrusted("unknown", source="unknown_local"))
+        state.push(UNTRUSTED)
     else:
-        value = state.locals[index]
         log.debug(f"  LOAD local[{index}] → {value}")
         state.push(value)
 
@@ -664,7 +782,7 @@ def transfer_store(opcode: jvm.Store, state: AbstractState) -> AbstractState:
     value = state.pop()
     log.debug(f"  STORE local[{index}] ← {value}")
 
-    state.locals[index] = value
+    state.store(index, value)
     state.pc += 1
     return state
 
@@ -673,22 +791,20 @@ def transfer_new(opcode: jvm.New, state: AbstractState) -> AbstractState:
     """
     Handle new instruction.
 
-    TAJ-style: StringBuilder/StringBuffer are treated as string carriers (primitives).
-    Other objects are allocated in abstract heap.
+    TAJ-style: StringBuilder/StringBuffer are treated as string carriers (primitives),
+    identified by their allocation site. Other objects are allocated in abstract heap.
     """
     class_name = str(opcode.classname)
     log.debug(f"  NEW {class_name}")
 
     # TAJ-style: StringBuilder/StringBuffer are string carriers (not heap objects)
     if "StringBuilder" in class_name or "StringBuffer" in class_name:
-        initial_taint = TaintedValue.trusted("empty", source="new_stringbuilder")
-        carrier = TaintValue.string_carrier(initial_taint)
         log.debug(f"    → Created string carrier (TAJ-style)")
-        state.push(carrier)
+        state.push(carrier(opcode.offset))
     else:
-        # Regular heap allocation for other objects
-        addr = state.allocate_heap_object(class_name)
-        state.push(TaintValue.from_heap_ref(addr, state.heap))
+        # Regular heap allocation for other objects, which start out TRUSTED
+        state.allocate_heap_object(class_name, opcode.offset)
+        state.push(TRUSTED)
 
     state.pc += 1
     return state
@@ -707,7 +823,9 @@ def transfer_dup(opcode: jvm.Dup, state: AbstractState) -> AbstractState:
     return state
 
 
-def transfer_invoke_virtual(opcode: jvm.InvokeVirtual, state: AbstractState) -> AbstractState:
+def transfer_invoke_virtual(
+    opcode: jvm.InvokeVirtual, state: AbstractState
+) -> AbstractState:
     """
     Handle invokevirtual instruction.
 
@@ -729,85 +847,79 @@ def transfer_invoke_virtual(opcode: jvm.InvokeVirtual, state: AbstractState) ->
 
     # Handle different method types
 
+    # Methods of the suite, by their summary
+    if (summary := SUMMARIES.get(callgraph.target(method))) is not None:
+        apply_summary(state, method, summary, [obj_ref, *args])
+
+    # JDK string methods, by their flow model
+    elif (model := MODELS.lookup(method)) is not None:
+        apply_model(state, method, model, [obj_ref, *args])
+
     # StringBuilder.append(String) - TAJ-style string carrier approach
-    if "StringBuilder.append" in method_str or "StringBuffer.append" in method_str:
-        if obj_ref.is_string_carrier:
-            # TAJ-style: Accumulate taint directly in carrier
+    elif MethodMatcher.is_string_builder_append(method):
+        if obj_ref >> 1:
+            # TAJ-style: Accumulate taint in the carriers of the allocation sites
             if args:
-                obj_ref.accumulate_taint(args[0].tainted_value)
-                log.debug(f"    → String carrier append: {args[0]} → {obj_ref.carrier_taint}")
+                state.append(obj_ref, args[0])
+                log.debug(
+                    f"    → String carrier append: {args[0]} → {state.carriers:b}"
+                )
             # Push carrier back for chaining
-            state.push(obj_ref)
-        elif obj_ref.heap_ref is not None:
-            # Fallback: Old heap-based approach (for compatibility)
-            heap_obj = state.heap[obj_ref.heap_ref]
-            if args:
-                heap_obj.append(args[0].tainted_value)
-                log.debug(f"    → Heap-based append: {args[0]}")
-            state.push(obj_ref)
+            push_result(state, method, obj_ref)
         else:
             log.warning(f"    → StringBuilder.append on unknown object!")
-            state.push(TaintValue.untrusted("unknown"))
+            push_result(state, method, UNTRUSTED)
 
     # StringBuilder.toString() - TAJ-style string carrier approach
     elif MethodMatcher.is_string_builder_tostring(method):
-        if obj_ref.is_string_carrier:
-            # TAJ-style: Return accumulated carrier_taint
-            result_taint = obj_ref.carrier_taint if obj_ref.carrier_taint else obj_ref.tainted_value
-            result = TaintValue.from_tainted(result_taint)
+        if obj_ref >> 1:
+            # TAJ-style: Return accumulated carrier taint
+            result = UNTRUSTED if state.tainted(obj_ref) else TRUSTED
             log.debug(f"    → String carrier toString() returns {result}")
-            state.push(result)
-        elif obj_ref.heap_ref is not None:
-            # Fallback: Old heap-based approach (for compatibility)
-            heap_obj = state.heap[obj_ref.heap_ref]
-            result = TaintValue.from_tainted(heap_obj.to_string())
-            log.debug(f"    → Heap-based toString() returns {result}")
-            state.push(result)
+            push_result(state, method, result)
         else:
-            state.push(TaintValue.untrusted("unknown"))
+            push_result(state, method, UNTRUSTED)
 
     # String.concat, String.trim, String.replaceAll, etc. (taint-preserving)
     elif MethodMatcher.is_taint_preserving(method):
         # If ANY argument or object is tainted, result is tainted
-        all_values = [obj_ref] + args
-        if any(v.is_tainted for v in all_values):
-            combined = TaintTransfer.concat(*[v.tainted_value for v in all_values])
-            result = TaintValue.from_tainted(combined)
-            log.debug(f"    → Taint-preserving operation returns {result}")
-            state.push(result)
+        if state.tainted(obj_ref) or any(state.tainted(arg) for arg in args):
+            log.debug(f"    → Taint-preserving operation returns UNTRUSTED")
+            push_result(state, method, UNTRUSTED)
         else:
-            state.push(TaintValue.trusted("result"))
+            push_result(state, method, TRUSTED)
 
     # Source methods (getParameter, readLine, etc.)
     elif MethodMatcher.is_source(method):
-        source_type = detector.get_source_type(method_str)
-        result = TaintValue.untrusted("user_input", source=source_type)
-        log.debug(f"    → SOURCE method returns UNTRUSTED ({source_type})")
-        state.push(result)
+        log.debug(
+            f"    → SOURCE method returns UNTRUSTED ({detector.get_source_type(method_str)})"
+        )
+        push_result(state, method, UNTRUSTED)
 
     # Sink methods (Statement.execute, etc.)
     elif MethodMatcher.is_sink(method):
         # Check if ANY argument is tainted
-        if any(arg.is_tainted for arg in args):
+        if any(state.tainted(arg) for arg in args):
             log.warning(f"    → SQL SINK called with TAINTED data!")
             log.warning(f"       VULNERABILITY DETECTED: {method_name}")
             state.vulnerability_detected = True
-        state.push(TaintValue.trusted("void"))  # Most sinks return void
+        push_result(state, method, TRUSTED)
 
     # Unknown method - conservative: preserve taint
     else:
         log.debug(f"    → Unknown method, preserving taint conservatively")
-        all_values = [obj_ref] + args
-        if any(v.is_tainted for v in all_values):
-            state.push(TaintValue.untrusted("unknown"))
+        if state.tainted(obj_ref) or any(state.tainted(arg) for arg in args):
+            push_result(state, method, UNTRUSTED)
         else:
-            state.push(TaintValue.trusted("unknown"))
+            push_result(state, method, TRUSTED)
 
     state.pc += 1
     return state
 
 
-def transfer_invoke_static(opcode: jvm.InvokeStatic, state: AbstractState) -> AbstractState:
+def transfer_invoke_static(
+    opcode: jvm.InvokeStatic, state: AbstractState
+) -> AbstractState:
     """
     Handle invokestatic instruction.
 
@@ -824,41 +936,52 @@ def transfer_invoke_static(opcode: jvm.InvokeStatic, state: AbstractState) -> Ab
     args = [state.pop() for _ in range(param_count)]
     args.reverse()
 
+    # Methods of the suite, by their summary
+    if (summary := SUMMARIES.get(callgraph.target(method))) is not None:
+        apply_summary(state, method, summary, args)
+
+    # JDK string methods, by their flow model
+    elif (model := MODELS.lookup(method)) is not None:
+        apply_model(state, method, model, args)
+
     # Check if it's a sink (fully qualified JDBC methods only)
-    if MethodMatcher.is_sink(method):
+    elif MethodMatcher.is_sink(method):
         # Check if ANY argument is tainted
-        if any(arg.is_tainted for arg in args):
+        if any(state.tainted(arg) for arg in args):
             log.warning(f"    → SQL SINK called with TAINTED data!")
             log.warning(f"       VULNERABILITY DETECTED: {method_name}")
             state.vulnerability_detected = True
         else:
             log.debug(f"    → SQL sink with safe data")
-        state.push(TaintValue.trusted("void"))
+        push_result(state, method, TRUSTED)
 
     # Check if it's a source (fully qualified signatures only)
     elif MethodMatcher.is_source(method):
-        source_type = detector.get_source_type(method_str)
-        result = TaintValue.untrusted("user_input", source=source_type)
-        log.debug(f"    → SOURCE method returns UNTRUSTED ({source_type})")
-        state.push(result)
+        log.debug(
+            f"    → SOURCE method returns UNTRUSTED ({detector.get_source_type(method_str)})"
+        )
+        push_result(state, method, UNTRUSTED)
 
     # Unknown static method - conservative: preserve taint
     else:
         log.debug(f"    → Unknown static method, preserving taint conservatively")
-        if any(arg.is_tainted for arg in args):
-            state.push(TaintValue.untrusted("unknown"))
+        if any(state.tainted(arg) for arg in args):
+            push_result(state, method, UNTRUSTED)
         else:
-            state.push(TaintValue.trusted("unknown"))
+            push_result(state, method, TRUSTED)
 
     state.pc += 1
     return state
 
 
-def transfer_invoke_special(opcode: jvm.InvokeSpecial, state: AbstractState) -> AbstractState:
+def transfer_invoke_special(
+    opcode: jvm.InvokeSpecial, state: AbstractState
+) -> AbstractState:
     """
     Handle invokespecial instruction (constructor calls).
 
-    Usually for calling <init> after NEW.
+    Usually for calling <init> after NEW and DUP, which leaves the object
+    reference on the stack.
     """
     method = opcode.method
     param_count = len(method.extension.params)
@@ -867,17 +990,33 @@ def transfer_invoke_special(opcode: jvm.InvokeSpecial, state: AbstractState) ->
 
     # Pop arguments
     args = [state.pop() for _ in range(param_count)]
+    args.reverse()
 
     # Pop object reference
     obj_ref = state.pop()
 
-    # For constructors, just push the object reference back
-    state.push(obj_ref)
+    # Constructors and private methods of the suite, by their summary
+    if (summary := SUMMARIES.get(callgraph.target(method))) is not None:
+        apply_summary(state, method, summary, [obj_ref, *args])
+        state.pc += 1
+        return state
+
+    # new StringBuilder(s) starts out with the content of s
+    if obj_ref >> 1 and args:
+        state.append(obj_ref, args[0])
+
+    # Constructors return void, other methods preserve taint conservatively
+    if state.tainted(obj_ref) or any(state.tainted(arg) for arg in args):
+        push_result(state, method, UNTRUSTED)
+    else:
+        push_result(state, method, TRUSTED)
     state.pc += 1
     return state
 
 
-def transfer_invoke_interface(opcode: jvm.InvokeInterface, state: AbstractState) -> AbstractState:
+def transfer_invoke_interface(
+    opcode: jvm.InvokeInterface, state: AbstractState
+) -> AbstractState:
     """
     Handle invokeinterface instruction.
 
@@ -898,48 +1037,50 @@ def transfer_invoke_interface(opcode: jvm.InvokeInterface, state: AbstractState)
     # Pop object reference (for instance methods)
     obj_ref = state.pop()
 
+    # Methods of the suite, by their summary
+    if (summary := SUMMARIES.get(callgraph.target(method))) is not None:
+        apply_summary(state, method, summary, [obj_ref, *args])
+
+    # JDK string methods, by their flow model
+    elif (model := MODELS.lookup(method)) is not None:
+        apply_model(state, method, model, [obj_ref, *args])
+
     # Check if it's a sink (e.g., Statement.executeQuery)
-    if MethodMatcher.is_sink(method):
+    elif MethodMatcher.is_sink(method):
         # Check if ANY argument is tainted
-        if any(arg.is_tainted for arg in args):
+        if any(state.tainted(arg) for arg in args):
             log.warning(f"    → SQL SINK called with TAINTED data!")
             log.warning(f"       VULNERABILITY DETECTED: {method_name}")
             state.vulnerability_detected = True
         else:
             log.debug(f"    → SQL sink with safe data")
-        state.push(TaintValue.trusted("result"))
+        push_result(state, method, TRUSTED)
 
     # Source methods
     elif MethodMatcher.is_source(method):
-        source_type = detector.get_source_type(method_str)
-        result = TaintValue.untrusted("user_input", source=source_type)
-        log.debug(f"    → SOURCE method returns UNTRUSTED ({source_type})")
-        state.push(result)
-
-    # Taint-preserving operations
-    elif MethodMatcher.is_taint_preserving(method):
-        all_values = [obj_ref] + args
-        if any(v.is_tainted for v in all_values):
-            combined = TaintTransfer.concat(*[v.tainted_value for v in all_values])
-            result = TaintValue.from_tainted(combined)
-            state.push(result)
-        else:
-            state.push(TaintValue.trusted("result"))
+        log.debug(
+            f"    → SOURCE method returns UNTRUSTED ({detector.get_source_type(method_str)})"
+        )
+        push_result(state, method, UNTRUSTED)
 
-    # Unknown method - conservative: preserve taint
+    # Taint-preserving operations, and unknown methods - conservative: preserve taint
     else:
-        log.debug(f"    → Unknown interface method, preserving taint conservatively")
-        all_values = [obj_ref] + args
-        if any(v.is_tainted for v in all_values):
-            state.push(TaintValue.untrusted("unknown"))
+        if not MethodMatcher.is_taint_preserving(method):
+            log.debug(
+                f"    → Unknown interface method, preserving taint conservatively"
+            )
+        if state.tainted(obj_ref) or any(state.tainted(arg) for arg in args):
+            push_result(state, method, UNTRUSTED)
         else:
-            state.push(TaintValue.trusted("unknown"))
+            push_result(state, method, TRUSTED)
 
     state.pc += 1
     return state
 
 
-def transfer_invoke_dynamic(opcode: jvm.InvokeDynamic, state: AbstractState) -> AbstractState:
+def transfer_invoke_dynamic(
+    opcode: jvm.InvokeDynamic, state: AbstractState
+) -> AbstractState:
     """
     Handle invokedynamic instruction.
 
@@ -955,13 +1096,11 @@ def transfer_invoke_dynamic(opcode: jvm.InvokeDynamic, state: AbstractState) ->
     args = [state.pop() for _ in range(param_count)]
 
     # If any argument is tainted, result is tainted (conservative)
-    if any(arg.is_tainted for arg in args):
-        combined = TaintTransfer.concat(*[arg.tainted_value for arg in args])
-        result = TaintValue.from_tainted(combined)
-        log.debug(f"    → Dynamic call with tainted args returns {result}")
-        state.push(result)
+    if any(state.tainted(arg) for arg in args):
+        log.debug(f"    → Dynamic call with tainted args returns UNTRUSTED")
+        push_result(state, method, UNTRUSTED)
     else:
-        state.push(TaintValue.trusted("result"))
+        push_result(state, method, TRUSTED)
 
     state.pc += 1
     return state
@@ -993,14 +1132,13 @@ def transfer_array_load(opcode: jvm.ArrayLoad, state: AbstractState) -> Abstract
     log.debug(f"  ARRAY_LOAD from {array_ref}[{index}]")
 
     # If array is tainted, loaded element is tainted
-    if array_ref.is_tainted:
-        result = TaintValue.untrusted("array_element", source="array_load")
+    if state.tainted(array_ref):
         log.debug(f"    → Loaded TAINTED element from tainted array")
+        state.push(UNTRUSTED)
     else:
-        result = TaintValue.trusted("array_element", source="array_load")
         log.debug(f"    → Loaded TRUSTED element from trusted array")
+        state.push(TRUSTED)
 
-    state.push(result)
     state.pc += 1
     return state
 
@@ -1027,7 +1165,9 @@ def transfer_array_store(opcode: jvm.ArrayStore, state: AbstractState) -> Abstra
     return state
 
 
-def transfer_array_length(opcode: jvm.ArrayLength, state: AbstractState) -> AbstractState:
+def transfer_array_length(
+    opcode: jvm.ArrayLength, state: AbstractState
+) -> AbstractState:
     """
     Handle arraylength instruction.
 
@@ -1037,12 +1177,72 @@ def transfer_array_length(opcode: jvm.ArrayLength, state: AbstractState) -> Abst
     log.debug(f"  ARRAY_LENGTH of {array_ref}")
 
     # Array length is never tainted (it's an integer derived from array structure)
-    state.push(TaintValue.trusted(0, source="array_length"))
+    state.push(TRUSTED)
+    state.pc += 1
+    return state
+
+
+def transfer_new_array(opcode: jvm.NewArray, state: AbstractState) -> AbstractState:
+    """
+    Handle newarray and multianewarray instructions.
+
+    Pop the length of each dimension, the new array is TRUSTED.
+    """
+    for _ in range(opcode.dim):
+        state.pop()
+    log.debug(f"  NEW_ARRAY {opcode.type}")
+    state.push(TRUSTED)
+    state.pc += 1
+    return state
+
+
+def transfer_binary(opcode: jvm.Binary, state: AbstractState) -> AbstractState:
+    """
+    Handle arithmetic instructions (iadd, imul, etc.).
+
+    The result is tainted if either operand is.
+    """
+    right = state.pop()
+    left = state.pop()
+    log.debug(f"  BINARY {opcode.operant} of {left} and {right}")
+    if state.tainted(left) or state.tainted(right):
+        state.push(UNTRUSTED)
+    else:
+        state.push(TRUSTED)
+    state.pc += 1
+    return state
+
+
+def transfer_get(opcode: jvm.Get, state: AbstractState) -> AbstractState:
+    """
+    Handle getfield and getstatic instructions.
+
+    Fields are not tracked: the field of a tainted object is tainted, and
+    static fields are TRUSTED.
+    """
+    log.debug(f"  GET {opcode.field}")
+    if not opcode.static and state.tainted(state.pop()):
+        state.push(UNTRUSTED)
+    else:
+        state.push(TRUSTED)
     state.pc += 1
     return state
 
 
-def transfer_return(opcode: jvm.Return, state: AbstractState) -> Optional[AbstractState]:
+def transfer_throw(opcode: jvm.Throw, state: AbstractState) -> AbstractState:
+    """
+    Handle athrow instruction.
+
+    Pop the exception, the CFG ends the block here.
+    """
+    state.pop()
+    log.debug("  THROW")
+    return state
+
+
+def transfer_return(
+    opcode: jvm.Return, state: AbstractState
+) -> Optional[AbstractState]:
     """
     Handle return instruction.
 
@@ -1056,233 +1256,934 @@ def transfer_return(opcode: jvm.Return, state: AbstractState) -> Optional[Abstra
 # Main Analysis
 # ============================================================================
 
-def transfer_block(block: BasicBlock, state: AbstractState) -> AbstractState:
+
+def transfer_if(opcode: jvm.Opcode, state: AbstractState) -> AbstractState:
     """
-    Apply transfer functions for all instructions in a basic block.
+    Handle conditional branches, which pop the values they compare, two
+    for If and one for Ifz. The CFG handles the control flow.
+    """
+    for _ in range(min(2 if isinstance(opcode, jvm.If) else 1, state.height)):
+        state.pop()
+    return state
+
+
+def transfer_nothing(opcode: jvm.Opcode, state: AbstractState) -> AbstractState:
+    """Handle return, goto and iinc, which leave the taint state as it is,
+    and negations and casts, which keep the taint of the value they
+    replace on the stack."""
+    return state
+
+
+def transfer_unknown(opcode: jvm.Opcode, state: AbstractState) -> AbstractState:
+    """Handle opcodes of a type without a transfer function."""
+    log.debug("    → Unhandled opcode type: %s", type(opcode).__name__)
+    return state
+
+
+Transfer = Callable[[jvm.Opcode, AbstractState], AbstractState]
+
+# The transfer function of each opcode type
+TRANSFERS: Dict[type, Transfer] = {
+    jvm.Push: transfer_push,
+    jvm.Load: transfer_load,
+    jvm.Store: transfer_store,
+    jvm.New: transfer_new,
+    jvm.Dup: transfer_dup,
+    jvm.Pop: transfer_pop,
+    jvm.ArrayLoad: transfer_array_load,
+    jvm.ArrayStore: transfer_array_store,
+    jvm.ArrayLength: transfer_array_length,
+    jvm.NewArray: transfer_new_array,
+    jvm.Binary: transfer_binary,
+    jvm.Negate: transfer_nothing,
+    jvm.Cast: transfer_nothing,
+    jvm.Get: transfer_get,
+    jvm.Incr: transfer_nothing,
+    jvm.Throw: transfer_throw,
+    jvm.InvokeVirtual: transfer_invoke_virtual,
+    jvm.InvokeStatic: transfer_invoke_static,
+    jvm.InvokeSpecial: transfer_invoke_special,
+    jvm.InvokeDynamic: transfer_invoke_dynamic,
+    jvm.InvokeInterface: transfer_invoke_interface,
+    jvm.Return: transfer_nothing,
+    jvm.Goto: transfer_nothing,
+    jvm.If: transfer_if,
+    jvm.Ifz: transfer_if,
+}
+
+
+def transfer_function(kind: type) -> Transfer:
+    """The transfer function of an opcode type, or of the closest of its
+    base classes, which is added to the table for the next lookup."""
+    if (transfer := TRANSFERS.get(kind)) is None:
+        transfer = next(
+            (TRANSFERS[base] for base in kind.__mro__ if base in TRANSFERS),
+            transfer_unknown,
+        )
+        TRANSFERS[kind] = transfer
+    return transfer
+
+
+# A basic block compiled into the transfer functions of its opcodes
+Steps = Tuple[Tuple[Transfer, jvm.Opcode], ...]
+
+
+def compile_block(instructions: Sequence[jvm.Opcode]) -> Steps:
+    """Look up the transfer function of each instruction of a block once,
+    so that visiting it again only runs them."""
+    return tuple((transfer_function(type(opcode)), opcode) for opcode in instructions)
+
+
+def run_steps(steps: Steps, state: AbstractState) -> AbstractState:
+    """
+    Apply the compiled transfer functions of a basic block.
 
     Args:
-        block: The basic block to analyze
+        steps: The block, as compiled by compile_block
         state: The abstract state at block entry
 
     Returns:
         The abstract state at block exit
+
+    Errors of the transfer functions, like a stack underflow, are raised,
+    and fail the analysis of the method.
     """
     current_state = state.copy()
+    debug = log.isEnabledFor(logging.DEBUG)
 
-    for opcode in block.instructions:
-        log.debug(f"  [{opcode.offset:3d}] {opcode}")
+    for transfer, opcode in steps:
+        if debug:
+            log.debug("  [%3d] %s", opcode.offset, opcode)
+        current_state = transfer(opcode, current_state)
 
-        try:
-            match opcode:
-                case jvm.Push():
-                    current_state = transfer_push(opcode, current_state)
-                case jvm.Load():
-                    current_state = transfer_load(opcode, current_state)
-                case jvm.Store():
-                    current_state = transfer_store(opcode, current_state)
-                case jvm.New():
-                    current_state = transfer_new(opcode, current_state)
-                case jvm.Dup():
-                    current_state = transfer_dup(opcode, current_state)
-                case jvm.Pop():
-                    current_state = transfer_pop(opcode, current_state)
-                case jvm.ArrayLoad():
-                    current_state = transfer_array_load(opcode, current_state)
-                case jvm.ArrayStore():
-                    current_state = transfer_array_store(opcode, current_state)
-                case jvm.ArrayLength():
-                    current_state = transfer_array_length(opcode, current_state)
-                case jvm.InvokeVirtual():
-                    current_state = transfer_invoke_virtual(opcode, current_state)
-                case jvm.InvokeStatic():
-                    current_state = transfer_invoke_static(opcode, current_state)
-                case jvm.InvokeSpecial():
-                    current_state = transfer_invoke_special(opcode, current_state)
-                case jvm.InvokeDynamic():
-                    current_state = transfer_invoke_dynamic(opcode, current_state)
-                case jvm.InvokeInterface():
-                    current_state = transfer_invoke_interface(opcode, current_state)
-                case jvm.Return():
-                    # Return doesn't change taint state, just signals end
-                    pass
-                case jvm.Goto():
-                    # Goto doesn't change state, CFG handles control flow
-                    pass
-                case jvm.If() | jvm.Ifz():
-                    # Conditional branches: pop comparison values, CFG handles flow
-                    # For If: pops two values
-                    # For Ifz: pops one value
-                    if isinstance(opcode, jvm.If):
-                        if len(current_state.stack) >= 2:
-                            current_state.pop()
-                            current_state.pop()
-                    else:  # Ifz
-                        if len(current_state.stack) >= 1:
-                            current_state.pop()
-                case _:
-                    # Unknown opcode - skip conservatively
-                    opcode_str = str(opcode)
-                    if 'pop' in opcode_str.lower():
-                        current_state = transfer_pop(opcode, current_state)
-                    else:
-                        log.debug(f"    → Unhandled opcode type: {type(opcode).__name__}")
+    return current_state
 
-        except Exception as e:
-            log.error(f"Error processing opcode {opcode}: {e}")
 
-    return current_state
+def transfer_block(
+    instructions: Sequence[jvm.Opcode], state: AbstractState
+) -> AbstractState:
+    """
+    Apply transfer functions for all instructions in a basic block.
 
+    Args:
+        instructions: The instructions of the basic block to analyze
+        state: The abstract state at block entry
 
-def analyze_method(methodid: jvm.AbsMethodID) -> bool:
+    Returns:
+        The abstract state at block exit
+    """
+    return run_steps(compile_block(instructions), state)
+
+
+class TransferCache:
+    """
+    The exit states of the blocks of a method by the fingerprint of their
+    entry states, so that a block is only transferred again for an input
+    it has not seen.
+
+    The fingerprint of a block only has the locals it loads, as the taint
+    of the others passes through it, like in the exit state given back:
+    the cached exit state with the locals the block does not store taken
+    from the entry state. It has the stack, the string carriers, the heap
+    and whether a vulnerability was found on the way in full. So a loop
+    body visited again as a local it does not read was tainted, and the
+    runs of solve with different arguments tainted for a method summary,
+    reuse the exit states.
+
+    A cache is only valid while the summaries of the methods called do
+    not change. Each block keeps its latest `size` entries, by default
+    TRANSFER_CACHE_SIZE, and none with a size of 0.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = TRANSFER_CACHE_SIZE if size is None else size
+        self.blocks: Dict[int, Dict[tuple, AbstractState]] = {}
+        # The locals each block loads and stores, as bitmasks
+        self.locals: Dict[int, Tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, state: AbstractState, reads: int) -> tuple:
+        refs = state.refs
+        return (
+            state.locals & reads,
+            state.defined & reads,
+            tuple(refs.get(i) for i in range(reads.bit_length()) if reads >> i & 1)
+            if refs
+            else (),
+            state.stack,
+            state.height,
+            state.carriers,
+            state.stack_refs,
+            state.heap_shape(),
+            state.vulnerability_detected,
+        )
+
+    def transfer(self, block: int, steps: Steps, state: AbstractState) -> AbstractState:
+        """The exit state of a block from an entry state."""
+        if (masks := self.locals.get(block)) is None:
+            reads = writes = 0
+            for _, opcode in steps:
+                if isinstance(opcode, jvm.Load):
+                    reads |= 1 << opcode.index
+                elif isinstance(opcode, jvm.Store):
+                    writes |= 1 << opcode.index
+            masks = self.locals[block] = (reads, writes)
+        reads, writes = masks
+        entries = self.blocks.setdefault(block, {})
+        key = self.fingerprint(state, reads)
+        if (out := entries.get(key)) is None:
+            self.misses += 1
+            out = run_steps(steps, state)
+            if self.size:
+                if len(entries) >= self.size:
+                    del entries[next(iter(entries))]
+                entries[key] = out
+            return out
+
+        self.hits += 1
+        out = out.copy()
+        out.locals = state.locals & ~writes | out.locals & writes
+        out.defined = state.defined & ~writes | out.defined & writes
+        refs = state.refs
+        for i in range(writes.bit_length()):
+            if writes >> i & 1:
+                sites = out.refs.get(i)
+                refs = refs.delete(i) if sites is None else refs.set(i, sites)
+        out.refs = refs
+        return out
+
+
+@dataclass
+class WorklistStats:
+    """How much work the worklist algorithm did for a method."""
+
+    blocks: int = 0  # Number of blocks in the CFG
+    iterations: int = 0  # Number of block visits
+    visits: List[int] = field(default_factory=list)  # Visits per block
+    skipped: int = 0  # Visits skipped as the input was unchanged
+    widened: int = 0  # Visits of loop heads which were widened
+    hits: int = 0  # Transfers answered by the transfer cache
+    heap: int = 0  # Objects in the largest heap of a state
+    capped: bool = False  # Whether the visit limit was hit
+
+    def __str__(self):
+        capped = " (capped)" if self.capped else ""
+        return (
+            f"{self.iterations} visits of {self.blocks} blocks, "
+            f"{self.skipped} skipped, {self.hits} cached, {self.widened} widened{capped}"
+        )
+
+
+def analyze_method(
+    methodid: jvm.AbsMethodID,
+    opcodes: Optional[Sequence[jvm.Opcode]] = None,
+    stats: Optional[WorklistStats] = None,
+    worklist_class=cfg.Worklist,
+) -> bool:
     """
     Analyze method using CFG-based worklist algorithm.
 
     This implements a proper forward data-flow analysis:
     1. Build CFG from bytecode
     2. Initialize entry block with initial state
-    3. Use worklist to propagate taint until fixed point
+    3. Use worklist to propagate taint until fixed point, visiting blocks
+       in reverse postorder
     4. Report vulnerability if tainted data reaches sink
 
+    The opcodes default to the ones of the method in the suite. If stats
+    is given, it is filled with the number of block visits.
+
     Returns True if SQL injection vulnerability detected, False otherwise.
     """
-    log.debug(f"\n{'='*60}")
+    log.debug(f"\n{'=' * 60}")
     log.debug(f"Analyzing: {methodid}")
-    log.debug(f"{'='*60}\n")
+    log.debug(f"{'=' * 60}\n")
 
     # Get bytecode
-    suite = Suite()
-    opcodes = list(suite.method_opcodes(methodid))
+    if opcodes is None:
+        opcodes = Suite().method_opcodes(methodid)
+    opcodes = tuple(opcodes)
 
     if not opcodes:
         return False
 
     log.debug(f"Method has {len(opcodes)} opcodes\n")
 
-    # Build CFG
-    cfg = build_cfg(opcodes)
+    # Initialize entry block with initial state (all params UNTRUSTED)
+    _, _, _, vulnerability_detected = solve(
+        methodid, opcodes, AbstractState.initial(methodid), stats, worklist_class
+    )
+    log.debug(f"Vulnerability detected: {vulnerability_detected}")
+
+    return vulnerability_detected
 
-    if not cfg:
-        # Fallback to sequential analysis if CFG building fails
-        log.warning("CFG building failed, falling back to sequential analysis")
-        return analyze_method_sequential(methodid, opcodes)
 
-    # Find entry block (offset 0 or first block)
-    entry_offset = min(cfg.keys())
+def solve(
+    methodid: jvm.AbsMethodID,
+    opcodes: Tuple[jvm.Opcode, ...],
+    initial_state: AbstractState,
+    stats: Optional[WorklistStats] = None,
+    worklist_class=cfg.Worklist,
+    cache: Optional[TransferCache] = None,
+) -> Tuple[cfg.CFG, List[Optional[AbstractState]], List[Optional[AbstractState]], bool]:
+    """
+    Run the worklist algorithm from the initial state of the entry block
+    to a fixed point. The transfers of the blocks go through a cache, a
+    new one unless one is given for other runs on the same opcodes.
+
+    Returns the CFG, the states at the entry and at the exit of its blocks,
+    and whether a vulnerability was detected on the way.
+    """
+    # Build CFG, block 0 is the entry
+    graph = cfg.build(opcodes, methodid)
+    log.debug("CFG: %s", graph)
 
     # Initialize abstract states for each block
     # IN[b] = state at entry to block b
     # OUT[b] = state at exit from block b
-    IN: Dict[int, Optional[AbstractState]] = {offset: None for offset in cfg}
-    OUT: Dict[int, Optional[AbstractState]] = {offset: None for offset in cfg}
+    IN: List[Optional[AbstractState]] = [None] * len(graph)
+    OUT: List[Optional[AbstractState]] = [None] * len(graph)
 
-    # Initialize entry block with initial state (all params UNTRUSTED)
-    initial_state = AbstractState.initial(methodid)
-    IN[entry_offset] = initial_state
+    IN[0] = initial_state
 
     # Worklist algorithm
-    worklist = [entry_offset]
-    iterations = 0
+    worklist = worklist_class(graph)
+    worklist.push(0)
+    iterations = skipped = widened = heap = 0
+    visits = [0] * len(graph)
+    # The fingerprint of IN[b] when b was last transferred
+    seen: List[Optional[tuple]] = [None] * len(graph)
+    # The blocks compiled into their transfer functions on their first visit
+    steps: List[Optional[Steps]] = [None] * len(graph)
+    if cache is None:
+        cache = TransferCache()
+    hits = cache.hits
+    max_iterations = MAX_VISITS_PER_BLOCK * len(graph)
     vulnerability_detected = False
 
-    log.debug(f"Starting worklist analysis with {len(cfg)} blocks")
+    log.debug(f"Starting worklist analysis with {len(graph)} blocks")
 
-    while worklist and iterations < MAX_WORKLIST_ITERATIONS:
+    while worklist and iterations < max_iterations:
         iterations += 1
-        block_offset = worklist.pop(0)
-        block = cfg[block_offset]
+        block = worklist.pop()
+        visits[block] += 1
 
-        log.debug(f"\nProcessing block {block_offset} (iteration {iterations})")
+        log.debug(f"\nProcessing block {block} (iteration {iterations})")
 
         # Compute IN[block] = join of all predecessor OUT states
-        if block.predecessors:
-            pred_states = [OUT[p] for p in block.predecessors if OUT[p] is not None]
+        old_in = IN[block]
+        predecessors = graph.predecessors(block)
+        if predecessors:
+            pred_states = [OUT[p] for p in predecessors if OUT[p] is not None]
             if pred_states:
+                # States are not changed once stored, so they are shared
                 if len(pred_states) == 1:
-                    IN[block_offset] = pred_states[0].copy()
+                    IN[block] = pred_states[0]
                 else:
                     # Join all predecessor states
-                    joined = pred_states[0].copy()
+                    joined = pred_states[0]
                     for ps in pred_states[1:]:
                         joined = AbstractState.join(joined, ps)
-                    IN[block_offset] = joined
+                    IN[block] = joined
+                # Loop heads only grow, which includes the initial state of
+                # the entry, and stop growing after a few iterations
+                if graph.is_loop_header(block) and seen[block] is not None:
+                    widened_state = AbstractState.widen(old_in, IN[block])
+                    if widened_state != IN[block]:
+                        widened += 1
+                    IN[block] = widened_state
 
         # If no input state yet, skip (will be processed when predecessor is done)
-        if IN[block_offset] is None:
+        if IN[block] is None:
             continue
 
+        # If the input has not changed since the last visit, neither has OUT
+        fingerprint = IN[block].fingerprint()
+        if fingerprint == seen[block]:
+            skipped += 1
+            continue
+        seen[block] = fingerprint
+
         # Apply transfer functions for the block
-        old_out = OUT[block_offset]
-        new_out = transfer_block(block, IN[block_offset])
-        OUT[block_offset] = new_out
+        old_out = OUT[block]
+        if steps[block] is None:
+            steps[block] = compile_block(graph.instructions(block))
+        new_out = cache.transfer(block, steps[block], IN[block])
+        OUT[block] = new_out
+        heap = max(heap, len(new_out.heap))
 
         # Check if vulnerability detected in this block
         if new_out.vulnerability_detected:
             vulnerability_detected = True
-            log.debug(f"  Vulnerability detected in block {block_offset}!")
+            log.debug(f"  Vulnerability detected in block {block}!")
 
         # If OUT changed, add successors to worklist
         if old_out is None or old_out != new_out:
-            for succ in block.successors:
+            for succ in graph.successors(block):
                 if succ not in worklist:
-                    worklist.append(succ)
+                    worklist.push(succ)
                     log.debug(f"  Added successor {succ} to worklist")
 
-    log.debug(f"\nAnalysis completed in {iterations} iterations")
-    log.debug(f"Vulnerability detected: {vulnerability_detected}")
+    if worklist:
+        log.warning(
+            f"Gave up on a fixed point for {methodid} after {iterations} iterations"
+        )
+    if stats is not None:
+        stats.blocks = len(graph)
+        stats.iterations = iterations
+        stats.visits = visits
+        stats.skipped = skipped
+        stats.widened = widened
+        stats.hits = cache.hits - hits
+        stats.heap = heap
+        stats.capped = bool(worklist)
 
-    return vulnerability_detected
+    log.info(f"{methodid}: {iterations} iterations over {len(graph)} blocks")
+
+    return graph, IN, OUT, vulnerability_detected
+
+
+# ============================================================================
+# Interprocedural Summaries
+# ============================================================================
+
+
+def parameter_slots(method: jvm.AbsMethodID, static: bool) -> List[int]:
+    """The locals holding the arguments of a method when it is called."""
+    slots = [] if static else [0]
+    slot = len(slots)
+    for param in method.extension.params:
+        slots.append(slot)
+        slot += 2 if isinstance(param, (jvm.Long, jvm.Double)) else 1
+    return slots
 
 
-def analyze_method_sequential(methodid: jvm.AbsMethodID, opcodes: List[jvm.Opcode]) -> bool:
+def summarize_method(
+    methodid: jvm.AbsMethodID, opcodes: Tuple[jvm.Opcode, ...], static: bool
+) -> MethodSummary:
     """
-    Fallback sequential analysis (original implementation).
+    Compute the summary of a method, by analyzing it once without tainted
+    arguments, for the flows from the sources it calls, and once with
+    each argument tainted.
 
-    Used when CFG building fails or for simple straight-line code.
+    Calls in the method use the summaries in SUMMARIES.
     """
-    state = AbstractState.initial(methodid)
+    slots = parameter_slots(methodid, static)
+    defined = 0
+    for slot in slots:
+        defined |= 1 << slot
+
+    # The runs share the exit states of the blocks reached with the same taint
+    cache = TransferCache()
+
+    def run(locals: int) -> Tuple[bool, bool]:
+        state = AbstractState(locals=locals, defined=defined, method=methodid)
+        graph, _, OUT, vulnerable = solve(methodid, opcodes, state, cache=cache)
+        returns = False
+        for b in graph.exits():
+            last, out = opcodes[graph.starts[b + 1] - 1], OUT[b]
+            if (
+                isinstance(last, jvm.Return)
+                and last.type is not None
+                and out is not None
+            ):
+                returns = returns or (out.height > 0 and out.tainted(out.peek()))
+        return vulnerable, returns
+
+    source_sinks, source_returns = run(0)
+    sinks = returns = 0
+    for i, slot in enumerate(slots):
+        vulnerable, tainted = run(1 << slot)
+        if vulnerable:
+            sinks |= 1 << i
+        if tainted:
+            returns |= 1 << i
+    return MethodSummary(returns, sinks, source_returns, source_sinks)
+
+
+def _summarize_components(
+    components: List[
+        Tuple[bool, List[Tuple[jvm.AbsMethodID, Tuple[jvm.Opcode, ...], bool]]]
+    ],
+    summaries: Dict[jvm.AbsMethodID, MethodSummary],
+) -> Dict[jvm.AbsMethodID, MethodSummary]:
+    """
+    Summarize strongly connected components of the call graph, given as
+    (recursive, [(method, opcodes, static), ...]), callees first, with the
+    summaries of the methods they call.
 
-    for opcode in opcodes:
-        log.debug(f"[{opcode.offset:3d}] {opcode}")
+    The methods of a recursive component start out with empty summaries,
+    which grow until none of them changes.
+    """
+    SUMMARIES.update(summaries)
+    new = {}
+    for recursive, methods in components:
+        if recursive:
+            for methodid, _, _ in methods:
+                SUMMARIES.setdefault(methodid, MethodSummary())
+        changed = True
+        while changed:
+            changed = False
+            for methodid, opcodes, static in methods:
+                old = SUMMARIES.get(methodid)
+                try:
+                    summary = summarize_method(methodid, opcodes, static)
+                except Exception as e:
+                    # Calls of it are transferred like calls of unknown methods
+                    log.error(f"Error summarizing {methodid}: {e}")
+                    SUMMARIES.pop(methodid, None)
+                    new.pop(methodid, None)
+                    continue
+                if old is not None:
+                    summary = summary.join(old)
+                changed = changed or (recursive and summary != old)
+                SUMMARIES[methodid] = new[methodid] = summary
+    return new
+
+
+def _init_worker(rules: RuleIndex) -> None:
+    """Match method names by the rules of the parent process in a pool
+    worker, which only inherits them if it was forked."""
+    MethodMatcher.RULES = rules
+
+
+def worker_pool(jobs: int) -> ProcessPoolExecutor:
+    """A pool of jobs processes matching the rules of this one, with the
+    rule files loaded with --rules, whatever the start method."""
+    return ProcessPoolExecutor(
+        jobs, initializer=_init_worker, initargs=(MethodMatcher.RULES,)
+    )
+
+
+def summarize_callees(
+    suite: Suite, roots: Sequence[jvm.AbsMethodID], jobs: int = 1
+) -> Dict[jvm.AbsMethodID, MethodSummary]:
+    """
+    Summarize the methods of the suite the roots call, transitively, which
+    are not in SUMMARIES already, bottom-up over the strongly connected
+    components of the call graph.
 
-        try:
-            match opcode:
-                case jvm.Push():
-                    state = transfer_push(opcode, state)
-                case jvm.Load():
-                    state = transfer_load(opcode, state)
-                case jvm.Store():
-                    state = transfer_store(opcode, state)
-                case jvm.New():
-                    state = transfer_new(opcode, state)
-                case jvm.Dup():
-                    state = transfer_dup(opcode, state)
-                case jvm.Pop():
-                    state = transfer_pop(opcode, state)
-                case jvm.ArrayLoad():
-                    state = transfer_array_load(opcode, state)
-                case jvm.ArrayStore():
-                    state = transfer_array_store(opcode, state)
-                case jvm.ArrayLength():
-                    state = transfer_array_length(opcode, state)
-                case jvm.InvokeVirtual():
-                    state = transfer_invoke_virtual(opcode, state)
-                case jvm.InvokeStatic():
-                    state = transfer_invoke_static(opcode, state)
-                case jvm.InvokeSpecial():
-                    state = transfer_invoke_special(opcode, state)
-                case jvm.InvokeDynamic():
-                    state = transfer_invoke_dynamic(opcode, state)
-                case jvm.InvokeInterface():
-                    state = transfer_invoke_interface(opcode, state)
-                case jvm.Return():
-                    break
-                case _:
-                    pass
+    The components are grouped in waves which only call components of
+    earlier waves, and the components of a wave are summarized by a pool
+    of jobs processes. The roots themselves are only summarized if other
+    methods call them.
+
+    Returns the new summaries, which are also added to SUMMARIES.
+    """
+    graph = callgraph.build(suite, roots)
+    roots = {graph.index[r] for r in roots if r in graph}
+
+    def component(c: int):
+        methods = []
+        for m in graph.sccs[c]:
+            methodid = graph.methods[m]
+            static = "static" in suite.findmethod(methodid)["access"]
+            methods.append((methodid, graph.opcodes[m], static))
+        return graph.is_recursive(c), methods
+
+    def callee_summaries(wave: List[int]) -> Dict[jvm.AbsMethodID, MethodSummary]:
+        return {
+            graph.methods[t]: SUMMARIES[graph.methods[t]]
+            for c in wave
+            for m in graph.sccs[c]
+            for t in graph.callees(m)
+            if graph.methods[t] in SUMMARIES
+        }
+
+    # The wave of each component, -1 for the ones which are not needed
+    level = [-1] * len(graph.sccs)
+    waves: List[List[int]] = []
+    for c, methods in enumerate(graph.sccs):
+        if all(graph.methods[m] in SUMMARIES for m in methods):
+            continue
+        if (
+            not graph.is_recursive(c)
+            and methods[0] in roots
+            and not len(graph.callers(methods[0]))
+        ):
+            continue
+        level[c] = 1 + max((level[d] for d in graph.scc_callees(c)), default=-1)
+        if level[c] == len(waves):
+            waves.append([])
+        waves[level[c]].append(c)
+
+    new: Dict[jvm.AbsMethodID, MethodSummary] = {}
+    pool = worker_pool(jobs) if jobs > 1 and len(waves) else None
+    try:
+        for wave in waves:
+            if pool is None or len(wave) == 1:
+                new.update(_summarize_components([component(c) for c in wave], {}))
+                continue
+            futures = [
+                pool.submit(
+                    _summarize_components,
+                    [component(c) for c in chunk],
+                    callee_summaries(chunk),
+                )
+                for chunk in (wave[i::jobs] for i in range(min(jobs, len(wave))))
+            ]
+            for future in futures:
+                summaries = future.result()
+                SUMMARIES.update(summaries)
+                new.update(summaries)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    log.info(f"Summarized {len(new)} methods in {len(waves)} waves")
+    return new
+
+
+# ============================================================================
+# IFDS Engine
+# ============================================================================
+
+# IFDS facts are ints, an index shifted past a two bit kind: the taint of
+# a local, of a stack slot, or of the string carriers of an allocation
+# site. FACT_SINK holds once tainted data has reached a sink.
+FACT_ZERO = 0
+FACT_SINK = 1 << 2
+FACT_LOCAL, FACT_STACK, FACT_CARRIER = 1, 2, 3
+
+
+def state_facts(state: AbstractState) -> List[int]:
+    """The facts of the taint bits of a state."""
+    facts = []
+    for kind, bits in (
+        (FACT_LOCAL, state.locals),
+        (FACT_STACK, state.stack),
+        (FACT_CARRIER, state.carriers),
+    ):
+        while bits:
+            low = bits & -bits
+            facts.append((low.bit_length() - 1) << 2 | kind)
+            bits ^= low
+    if state.vulnerability_detected:
+        facts.append(FACT_SINK)
+    return facts
+
+
+def _stack_sites(state: AbstractState, slot: int) -> int:
+    """The carrier sites a stack slot may hold, as a bitmask."""
+    refs = state.stack_refs
+    while refs is not None and refs[0] > slot:
+        refs = refs[2]
+    return refs[1] if refs is not None and refs[0] == slot else 0
+
+
+@dataclass
+class _IfdsMethod:
+    opcodes: Tuple[jvm.Opcode, ...]
+    graph: cfg.CFG
+    shapes: List[Optional[AbstractState]]  # Untainted state before each opcode
+    unset: Tuple[int, ...]  # Facts of the locals unassigned at the start
+
+
+class TaintProblem(ifds.Problem):
+    """
+    Taint analysis as an IFDS problem, with the nodes (method, index) of
+    the opcodes of the methods of the suite.
+
+    The flow function of an opcode is its transfer function: the facts
+    after it from a fact d are the taint bits after the opcode in the
+    state with only d set. The stack heights and the carrier sites of the
+    states are the same for all facts, they come from a worklist analysis
+    of each method without taint. Calls to methods of the suite are call
+    nodes, which map arguments to parameters, and the returned value and
+    FACT_SINK back to the caller.
+
+    Locals which are not assigned are UNTRUSTED, as in `transfer_load`, so
+    they start out tainted, and a store clears their fact.
+    """
+
+    zero = FACT_ZERO
+
+    def __init__(self, root: jvm.AbsMethodID, opcodes_of):
+        self.root = root
+        self.opcodes_of = opcodes_of
+        self._methods: Dict[jvm.AbsMethodID, _IfdsMethod] = {}
+        self._static: Dict[jvm.AbsMethodID, bool] = {}
+        self._callees: Dict[tuple, tuple] = {}
+        self._flows: Dict[tuple, Tuple[int, ...]] = {}
+
+    def method(self, methodid: jvm.AbsMethodID) -> _IfdsMethod:
+        if (info := self._methods.get(methodid)) is None:
+            opcodes = tuple(self.opcodes_of(methodid))
+            if methodid == self.root:
+                params = AbstractState.initial(methodid).defined
+            else:
+                params = 0
+                for slot in parameter_slots(methodid, self._static[methodid]):
+                    params |= 1 << slot
+            used = params
+            for op in opcodes:
+                if isinstance(op, (jvm.Load, jvm.Store)):
+                    used |= 1 << op.index
+            initial = AbstractState(defined=used, method=methodid)
+            graph, IN, _, _ = solve(methodid, opcodes, initial)
+            shapes: List[Optional[AbstractState]] = [None] * len(opcodes)
+            for b in graph.rpo:
+                if (state := IN[b]) is None:
+                    continue
+                for i in range(graph.starts[b], graph.starts[b + 1]):
+                    state = state.copy()
+                    state.locals = state.stack = state.carriers = 0
+                    state.vulnerability_detected = False
+                    shapes[i] = state
+                    state = transfer_block((opcodes[i],), state)
+            unset = used & ~params
+            info = self._methods[methodid] = _IfdsMethod(
+                opcodes,
+                graph,
+                shapes,
+                tuple(
+                    i << 2 | FACT_LOCAL
+                    for i in range(unset.bit_length())
+                    if (unset >> i) & 1
+                ),
+            )
+        return info
+
+    def seeds(self) -> Dict[tuple, List[int]]:
+        """The facts at the start of the root, with the parameters tainted."""
+        params = AbstractState.initial(self.root).locals
+        return {
+            self.start(self.root): [FACT_ZERO, *self.method(self.root).unset]
+            + [
+                i << 2 | FACT_LOCAL
+                for i in range(params.bit_length())
+                if (params >> i) & 1
+            ]
+        }
+
+    def method_of(self, node):
+        return node[0]
+
+    def start(self, method):
+        return (method, 0)
+
+    def successors(self, node):
+        methodid, i = node
+        graph = self.method(methodid).graph
+        b = graph.block_of[i]
+        if i + 1 < graph.starts[b + 1]:
+            return ((methodid, i + 1),)
+        return tuple((methodid, graph.starts[s]) for s in graph.successors(b))
+
+    def callees(self, node):
+        if (callees := self._callees.get(node)) is None:
+            op = self.method(node[0]).opcodes[node[1]]
+            callees = ()
+            if isinstance(op, callgraph.INVOKES):
+                callee = callgraph.target(op.method)
+                if callee in self._static or self.opcodes_of(callee) is not None:
+                    self._static[callee] = isinstance(op, jvm.InvokeStatic)
+                    callees = (callee,)
+            self._callees[node] = callees
+        return callees
+
+    def return_site(self, call):
+        return (call[0], call[1] + 1)
+
+    def is_exit(self, node):
+        return isinstance(self.method(node[0]).opcodes[node[1]], jvm.Return)
+
+    def normal_flow(self, node, fact):
+        key = (node, fact)
+        if (facts := self._flows.get(key)) is not None:
+            return facts
+        info = self.method(node[0])
+        if fact == FACT_SINK or (shape := info.shapes[node[1]]) is None:
+            facts = (fact,) if fact == FACT_SINK else ()
+        else:
+            state = shape.copy()
+            kind, index = fact & 3, fact >> 2
+            if kind == FACT_LOCAL:
+                state.locals = 1 << index
+            elif kind == FACT_STACK:
+                state.stack = 1 << index
+            elif kind == FACT_CARRIER:
+                state.carriers = 1 << index
+            out = transfer_block((info.opcodes[node[1]],), state)
+            if fact == FACT_ZERO:
+                facts = (FACT_ZERO, *state_facts(out))
+            else:
+                generated = self.normal_flow(node, FACT_ZERO)
+                facts = tuple(f for f in state_facts(out) if f not in generated)
+        self._flows[key] = facts
+        return facts
+
+    def _arguments(self, call) -> Tuple[AbstractState, int]:
+        """The state before a call and the stack slot of its first argument."""
+        shape = self.method(call[0]).shapes[call[1]]
+        op = self.method(call[0]).opcodes[call[1]]
+        count = len(op.method.extension.params) + (
+            0 if isinstance(op, jvm.InvokeStatic) else 1
+        )
+        return shape, shape.height - count
+
+    def call_flow(self, call, callee, fact):
+        if fact == FACT_ZERO:
+            return (FACT_ZERO, *self.method(callee).unset)
+        kind, index = fact & 3, fact >> 2
+        shape, base = self._arguments(call)
+        slots = parameter_slots(callee, self._static[callee])
+        if kind == FACT_STACK and index >= base:
+            return (slots[index - base] << 2 | FACT_LOCAL,)
+        if kind == FACT_CARRIER:
+            return tuple(
+                slots[slot - base] << 2 | FACT_LOCAL
+                for slot in range(base, shape.height)
+                if (_stack_sites(shape, slot) >> index) & 1
+            )
+        return ()
+
+    def return_flow(self, call, callee, exit, fact):
+        if fact == FACT_ZERO or fact == FACT_SINK:
+            return (fact,)
+        if callee.extension.return_type is None:
+            return ()
+        _, base = self._arguments(call)
+        shape = self.method(callee).shapes[exit[1]]
+        slot = shape.height - 1
+        kind, index = fact & 3, fact >> 2
+        if (kind == FACT_STACK and index == slot) or (
+            kind == FACT_CARRIER and (_stack_sites(shape, slot) >> index) & 1
+        ):
+            return (base << 2 | FACT_STACK,)
+        return ()
+
+    def call_to_return_flow(self, call, fact):
+        if fact & 3 == FACT_STACK:
+            _, base = self._arguments(call)
+            return (fact,) if fact >> 2 < base else ()
+        return (fact,)
+
+
+def analyze_method_ifds(
+    methodid: jvm.AbsMethodID,
+    opcodes: Optional[Sequence[jvm.Opcode]] = None,
+    opcodes_of=None,
+    stats: Optional[ifds.SolverStats] = None,
+) -> bool:
+    """
+    Analyze a method and the methods of the suite it calls, transitively,
+    with the IFDS tabulation solver. Each method is analyzed once per fact
+    it is called with, however many call chains lead to it.
+
+    The opcodes of the methods come from opcodes_of, by default from the
+    suite, and the ones of the method itself can be given as opcodes. The
+    other calls go through the transfer functions, and so through the
+    summaries in SUMMARIES, like in the worklist engine.
+
+    Returns True if SQL injection vulnerability detected, False otherwise.
+    """
+    if opcodes_of is None:
+        suite = Suite()
+
+        def opcodes_of(m):
+            return callgraph.method_opcodes(suite, m)
+
+    if opcodes is not None:
+        opcodes, lookup = tuple(opcodes), opcodes_of
+
+        def opcodes_of(m):
+            return opcodes if m == methodid else lookup(m)
+
+    if not opcodes_of(methodid):
+        return False
 
+    problem = TaintProblem(methodid, opcodes_of)
+    solver = ifds.Solver(problem, stats)
+    solver.solve(problem.seeds())
+    log.info(f"{methodid}: {solver.stats}")
+
+    return any(
+        FACT_SINK in solver.facts(node)
+        for node in solver.nodes()
+        if node[0] == methodid
+    )
+
+
+# ============================================================================
+# Batch Analysis
+# ============================================================================
+
+
+def _analyze_methods(
+    engine: str,
+    methodids: List[jvm.AbsMethodID],
+    summaries: Dict[jvm.AbsMethodID, MethodSummary],
+) -> Dict[jvm.AbsMethodID, Optional[bool]]:
+    """Analyze methods with the worklist or IFDS engine, given the
+    summaries of their callees. None marks the methods which failed."""
+    SUMMARIES.update(summaries)
+    analyze = analyze_method_ifds if engine == "ifds" else analyze_method
+    results: Dict[jvm.AbsMethodID, Optional[bool]] = {}
+    for methodid in methodids:
+        try:
+            results[methodid] = analyze(methodid)
         except Exception as e:
-            log.error(f"Error processing opcode {opcode}: {e}")
+            log.error(f"Error analyzing {methodid}: {e}")
+            results[methodid] = None
+    return results
 
-    return getattr(state, 'vulnerability_detected', False)
+
+def analyze_batch(
+    suite: Suite,
+    methodids: Sequence[jvm.AbsMethodID],
+    engine: str = "worklist",
+    jobs: int = 1,
+) -> Dict[jvm.AbsMethodID, Optional[bool]]:
+    """
+    Analyze many methods in one process, sharing the decoded suite, the
+    CFGs, the matched method names and the summaries of the callees, which
+    are computed once for all methods, for both the worklist and the IFDS
+    engine.
+
+    With jobs > 1 the methods are split over a pool of jobs processes,
+    which get the summaries and the rules of this one. The answers are the
+    same as the ones of analyzing each method on its own.
+    None marks the methods which failed.
+    """
+    methodids = list(dict.fromkeys(methodids))
+    if engine == "datalog":
+        program = taint_facts.load(suite, rules=MethodMatcher.RULES)
+        return {m: program.vulnerable(m) for m in methodids}
+    summarize_callees(suite, methodids, jobs)
+    if jobs <= 1 or len(methodids) <= 1:
+        return _analyze_methods(engine, methodids, {})
+
+    results: Dict[jvm.AbsMethodID, Optional[bool]] = {}
+    with worker_pool(jobs) as pool:
+        futures = [
+            pool.submit(_analyze_methods, engine, methodids[i::jobs], SUMMARIES)
+            for i in range(min(jobs, len(methodids)))
+        ]
+        for future in futures:
+            results.update(future.result())
+    return {m: results[m] for m in methodids}
+
+
+def batch_signatures(suite: Suite, args: argparse.Namespace) -> List[str]:
+    """The method signatures of a batch run: the given ones, the ones of
+    the test cases file, and all methods of the suite."""
+    signatures = list(args.method)
+    if args.cases is not None:
+        with open(args.cases) as fp:
+            for case in json.load(fp)["test_cases"]:
+                signatures.extend([case["vulnerable_method"], case["safe_method"]])
+    if args.all:
+        signatures.extend(m.encode() for m in columnar.suite_methods(suite))
+    return signatures
+
+
+def format_result(vulnerable: Optional[bool]) -> str:
+    """The answer in JPAMB format."""
+    if vulnerable is None:
+        return "error;0%"
+    return "sql injection;90%" if vulnerable else "ok;90%"
 
 
 def main():
@@ -1296,32 +2197,105 @@ def main():
         print("no")
         sys.exit(0)
 
-    # Get method signature from command line
-    if len(sys.argv) < 2:
-        print("Usage: bytecode_taint_analyzer.py <method_signature>", file=sys.stderr)
-        print("Example: bytecode_taint_analyzer.py jpamb.sqli.SQLi_DirectConcat.vulnerable", file=sys.stderr)
-        sys.exit(1)
-
-    method_signature = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Bytecode taint analyzer for SQL injection"
+    )
+    parser.add_argument(
+        "method",
+        nargs="*",
+        help="e.g. jpamb.sqli.SQLi_DirectConcat.vulnerable, more than one runs a batch",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["worklist", "ifds", "datalog"],
+        default="worklist",
+        help="worklist: intraprocedural with summaries of the callees, "
+        "ifds: context-sensitive tabulation over the called methods, "
+        "datalog: taint rules over the cached facts of the whole suite",
+    )
+    parser.add_argument(
+        "--all", action="store_true", help="analyze all methods of the suite"
+    )
+    parser.add_argument(
+        "--cases",
+        type=Path,
+        help="analyze the vulnerable and safe methods of a test_cases.json file",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="processes of a batch run")
+    parser.add_argument(
+        "--rules",
+        type=Path,
+        action="append",
+        default=[],
+        help="a file of more sources and sinks, see jpamb.taint.rules",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print JSON lines like a batch run, also for one method",
+    )
+    args = parser.parse_args()
+    for path in args.rules:
+        MethodMatcher.load_rules(path)
 
     # Create suite
     suite = Suite()
 
+    # Batch runs print a JSON line per method
+    if args.json or args.all or args.cases is not None or len(args.method) != 1:
+        signatures = batch_signatures(suite, args)
+        if not signatures:
+            parser.error("no methods to analyze")
+        methodids = {s: resolve_method_id(s, suite) for s in signatures}
+        results = analyze_batch(
+            suite,
+            [m for m in methodids.values() if m is not None],
+            args.engine,
+            args.jobs,
+        )
+        failed = False
+        for signature, methodid in methodids.items():
+            vulnerable = None if methodid is None else results[methodid]
+            failed |= vulnerable is None
+            print(
+                json.dumps(
+                    {
+                        "method": signature,
+                        "methodid": None if methodid is None else methodid.encode(),
+                        "vulnerable": vulnerable,
+                        "output": format_result(vulnerable),
+                    }
+                )
+            )
+        # Like a single method, a batch fails if any of its methods did
+        sys.exit(1 if failed else 0)
+
     # Resolve method signature to method ID
-    methodid = resolve_method_id(method_signature, suite)
+    methodid = resolve_method_id(args.method[0], suite)
 
     if methodid is None:
         print(f"error;0%")
         sys.exit(1)
 
-    # Analyze the method
-    has_vulnerability = analyze_method(methodid)
+    # Analyze the method, after summarizing the methods it calls like a batch
+    try:
+        if args.engine == "datalog":
+            has_vulnerability = taint_facts.load(
+                suite, rules=MethodMatcher.RULES
+            ).vulnerable(methodid)
+        else:
+            summarize_callees(suite, [methodid])
+            if args.engine == "ifds":
+                has_vulnerability = analyze_method_ifds(methodid)
+            else:
+                has_vulnerability = analyze_method(methodid)
+    except Exception as e:
+        log.error(f"Error analyzing {methodid}: {e}")
+        print(format_result(None))
+        sys.exit(1)
 
     # Output result in JPAMB format
-    if has_vulnerability:
-        print("sql injection;90%")
-    else:
-        print("ok;90%")
+    print(format_result(has_vulnerability))
 
     sys.exit(0)
 
@@ -8,6 +8,8 @@ from loguru import logger
 logger.remove()
 logger.add(sys.stderr, format="[{level}] {message}")
 
+jvm.Opcode.strict = False
+
 methodid, input = jpamb.getcase()
 
 
@@ -0,0 +1,11 @@
+"""
+The analyzer in solutions/ and the generated programs in benchmarks/ are
+scripts rather than modules of jpamb, so their tests import them from there.
+"""
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "solutions"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
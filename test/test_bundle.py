@@ -0,0 +1,62 @@
+import shutil
+
+from jpamb import jvm, model
+from jpamb.bundle import SuiteBundle
+
+
+def make_suite(tmp_path):
+    suite = model.Suite()
+    for file in ["stats/cases.txt", "decompiled/jpamb/cases/Simple.json"]:
+        target = tmp_path / "target" / file
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(suite.workfolder / "target" / file, target)
+    return model.Suite(tmp_path)
+
+
+def test_bundle_roundtrip(tmp_path):
+    suite = make_suite(tmp_path)
+    SuiteBundle.write(suite, suite.bundle_file)
+    bundle = SuiteBundle(suite.bundle_file)
+
+    cn = jvm.ClassName.decode("jpamb.cases.Simple")
+    assert bundle.classes() == [cn]
+    assert bundle.findclass(cn) == model._load_json(suite.decompiledfile(cn))
+
+    index = bundle.method_index(cn)
+    expected = model.MethodIndex.from_json(model._load_json(suite.decompiledfile(cn)))
+    assert index.overloads == expected.overloads
+    assert dict(index.methods) == expected.methods
+    assert bundle.case_text() == suite.case_file.read_bytes()
+
+
+def test_suite_reads_from_bundle(tmp_path):
+    suite = make_suite(tmp_path)
+    methodid = jvm.AbsMethodID.decode("jpamb.cases.Simple.divideByN:(I)I")
+    expected = suite.findmethod(methodid)
+    cases = suite.cases
+
+    SuiteBundle.write(suite, suite.bundle_file)
+    suite.decompiledfile(methodid.classname).unlink()
+    suite.case_file.unlink()
+    suite.invalidate_cache()
+
+    assert suite.method_index(methodid.classname) is suite.bundle.method_index(
+        methodid.classname
+    )
+    assert suite.findmethod(methodid) == expected
+    assert suite.findclass(methodid.classname)["name"] == "jpamb/cases/Simple"
+    assert suite.cases == cases
+
+
+def test_suite_ignores_stale_bundle(tmp_path):
+    suite = make_suite(tmp_path)
+    cn = jvm.ClassName.decode("jpamb.cases.Simple")
+    SuiteBundle.write(suite, suite.bundle_file)
+    assert suite._bundled(cn) is not None
+    digest = suite.class_digest(cn)
+    assert digest == suite.bundle.digest(cn)
+
+    file = suite.decompiledfile(cn)
+    file.write_text(file.read_text() + "\n")
+    assert suite._bundled(cn) is None
+    assert suite.class_digest(cn) not in (digest, suite.bundle.digest(cn))
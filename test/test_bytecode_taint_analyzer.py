@@ -0,0 +1,432 @@
+"""
+Tests for the worklist engine of solutions/bytecode_taint_analyzer.py: the
+bit-vector lattice of its abstract states, and its verdicts on small
+methods and on the generated ones of benchmarks/sqli_programs.py, where
+the IFDS engine must agree with it and the Datalog engine may only find
+more, and the exit code of batch runs of every engine
+"""
+
+import json
+import subprocess
+import sys
+
+from hypothesis import given, strategies as st
+import pytest
+
+import bytecode_taint_analyzer as analyzer
+from bytecode_taint_analyzer import TRUSTED, UNTRUSTED, AbstractState, carrier
+from jpamb import jvm
+from jpamb.taint import facts
+from sqli_programs import (
+    APPEND,
+    CONCAT,
+    OBJECT,
+    SINK,
+    SOURCE,
+    TOSTRING,
+    UNKNOWN,
+    Generator,
+    programs,
+)
+
+M = jvm.AbsMethodID.decode
+RUN = M("jpamb.Test.run:(A)V")
+PROGRAMS = list(programs(300))
+
+
+VALUES = st.sampled_from([TRUSTED, UNTRUSTED, carrier(0), carrier(1), carrier(2) | 1])
+
+
+@st.composite
+def states(draw, height: int = 3):
+    """A state of four locals, some of them unassigned, and a stack."""
+    state = AbstractState(method=RUN)
+    for i in range(4):
+        if draw(st.booleans()):
+            state.store(i, draw(VALUES))
+    for _ in range(height):
+        state.push(draw(VALUES))
+    state.carriers = draw(st.integers(0, 7))
+    return state
+
+
+def slot(state: AbstractState, i: int) -> int:
+    """The abstract value of stack slot i."""
+    refs = state.stack_refs
+    while refs is not None and refs[0] > i:
+        refs = refs[2]
+    sites = refs[1] if refs is not None and refs[0] == i else 0
+    return state.stack >> i & 1 | sites << 1
+
+
+def below(a: AbstractState, b: AbstractState) -> bool:
+    """Whether everything tainted or a carrier in a is so in b."""
+    return (
+        a.locals & ~b.locals == 0
+        and a.defined & ~b.defined == 0
+        and a.stack & ~b.stack == 0
+        and a.carriers & ~b.carriers == 0
+        and all(sites & ~b.refs.get(i, 0) == 0 for i, sites in a.refs.items())
+        and all(slot(a, i) >> 1 & ~(slot(b, i) >> 1) == 0 for i in range(a.height))
+    )
+
+
+@given(states(), states())
+def test_join(a, b):
+    joined = AbstractState.join(a, b)
+    assert joined == AbstractState.join(b, a)
+    assert AbstractState.join(a, a) == a
+    assert below(a, joined) and below(b, joined)
+
+
+@given(states(), states())
+def test_widen(old, new):
+    widened = AbstractState.widen(old, new)
+    assert widened == AbstractState.join(old, new)
+    assert AbstractState.widen(widened, new) == widened
+
+
+def test_widen_stack_in_place():
+    old, new = AbstractState(method=RUN), AbstractState(method=RUN)
+    for value in (TRUSTED, TRUSTED):
+        old.push(value)
+    for value in (TRUSTED, carrier(1), UNTRUSTED):
+        new.push(value)
+    # the slots are joined where they are, at the height of the old state
+    widened = AbstractState.widen(old, new)
+    assert [slot(widened, i) for i in range(widened.height)] == [TRUSTED, carrier(1)]
+
+
+@given(states())
+def test_fingerprint(state):
+    copy = state.copy()
+    assert copy == state and copy.fingerprint() == state.fingerprint()
+    # the heap only holds objects created TRUSTED
+    copy.allocate_heap_object("java/lang/Object", 0)
+    assert copy.fingerprint() == state.fingerprint()
+    copy.push(UNTRUSTED)
+    assert copy.fingerprint() != state.fingerprint()
+
+
+def test_carriers():
+    state = AbstractState(method=RUN)
+    state.store(1, carrier(3))
+    state.push(state.load(1))
+    assert state.peek() == carrier(3) and not state.tainted(state.peek())
+    state.append(state.pop(), UNTRUSTED)
+    # every value which may be the carrier is tainted
+    assert state.carriers == 1 << 3 and state.tainted(state.load(1))
+    assert not state.tainted(carrier(2))
+
+
+FIELD = jvm.AbsFieldID.decode("jpamb.Test.name:A")
+
+
+@pytest.mark.parametrize(
+    "stack, opcode, result",
+    [
+        (
+            [UNTRUSTED, TRUSTED],
+            jvm.Binary(0, jvm.Int(), jvm.BinaryOpr.Add),
+            [UNTRUSTED],
+        ),
+        ([TRUSTED, TRUSTED], jvm.Binary(0, jvm.Int(), jvm.BinaryOpr.Mul), [TRUSTED]),
+        ([UNTRUSTED], jvm.Negate(0, jvm.Int()), [UNTRUSTED]),
+        ([UNTRUSTED], jvm.Cast(0, jvm.Int(), jvm.Short()), [UNTRUSTED]),
+        ([UNTRUSTED], jvm.Get(0, False, FIELD), [UNTRUSTED]),
+        ([UNTRUSTED], jvm.Get(0, True, FIELD), [UNTRUSTED, TRUSTED]),
+        ([UNTRUSTED, TRUSTED], jvm.NewArray(0, jvm.Int(), 2), [TRUSTED]),
+        ([TRUSTED], jvm.Throw(0), []),
+        ([UNTRUSTED], jvm.Incr(0, 0, 1), [UNTRUSTED]),
+    ],
+)
+def test_stack_effects(stack, opcode, result):
+    state = AbstractState(method=RUN)
+    for value in stack:
+        state.push(value)
+    state = analyzer.transfer_block((opcode,), state)
+    assert [state.pop() for _ in range(state.height)][::-1] == result
+
+
+INIT = M("java.lang.StringBuilder.<init>:(A)V")
+BUILDER = jvm.ClassName.decode("java.lang.StringBuilder")
+
+
+@pytest.mark.parametrize(
+    "opcode, result",
+    [
+        # a void method pushes no result
+        (jvm.InvokeStatic(0, M("jpamb.Test.log:(A)V")), []),
+        (jvm.InvokeStatic(0, M("jpamb.Test.copy:(A)A")), [UNTRUSTED]),
+        (jvm.InvokeVirtual(0, M("jpamb.Test.log:()V")), []),
+        (jvm.InvokeInterface(0, M("jpamb.Log.log:()V"), 1), []),
+    ],
+)
+def test_void_invokes(opcode, result):
+    state = AbstractState(method=RUN)
+    state.push(UNTRUSTED)
+    state = analyzer.transfer_block((opcode,), state)
+    assert [state.pop() for _ in range(state.height)] == result
+
+
+def test_constructor():
+    # new StringBuilder(param0), where <init> consumes the copy of dup and
+    # leaves the one under it
+    opcodes = (
+        jvm.New(0, BUILDER),
+        jvm.Dup(1, 1),
+        jvm.Load(2, jvm.Reference(), 0),
+        jvm.InvokeSpecial(3, INIT, False),
+    )
+    state = analyzer.transfer_block(opcodes, AbstractState.initial(RUN))
+    assert state.height == 1 and state.peek() == carrier(0)
+    assert state.tainted(state.peek())
+
+
+def test_stack_underflow():
+    with pytest.raises(RuntimeError, match="underflow"):
+        analyzer.analyze_method(RUN, (jvm.Pop(0, 1), jvm.Return(1, None)))
+
+
+def test_allocation_sites():
+    # sites are the offsets of the `new`s, whatever was analyzed before
+    for method in (RUN, M("jpamb.Test.other:()V"), RUN):
+        state = AbstractState(method=method)
+        assert state.allocate_heap_object("java/lang/Object", 7) == (
+            analyzer.heap_address(7, 0)
+        )
+    for methodid, opcodes in PROGRAMS:
+        stats = analyzer.WorklistStats()
+        analyzer.analyze_method(methodid, opcodes, stats)
+        sites = sum(isinstance(op, jvm.New) for op in opcodes)
+        assert stats.heap <= (analyzer.HEAP_RECENCY + 1) * sites
+
+
+def sink_of(expression) -> tuple[jvm.Opcode, ...]:
+    """A method of one parameter passing a string to executeQuery."""
+    g = Generator(0, params=1)
+    expression(g)
+    g.emit(jvm.Store, jvm.Reference(), 1)
+    g.emit(jvm.New, OBJECT)
+    g.emit(jvm.Load, jvm.Reference(), 1)
+    g.emit(jvm.InvokeInterface, SINK, 2)
+    g.emit(jvm.Pop, 1)
+    g.emit(jvm.Return, None)
+    return tuple(g.opcodes)
+
+
+def param(g):
+    g.emit(jvm.Load, jvm.Reference(), 0)
+
+
+def constant(g):
+    g.emit(jvm.Push, jvm.Value.int(0))
+
+
+def source(g):
+    constant(g)
+    g.emit(jvm.InvokeStatic, SOURCE)
+
+
+def concat(g):
+    constant(g)
+    param(g)
+    g.emit(jvm.InvokeVirtual, CONCAT)
+
+
+def maybe_assigned(g):
+    # if (...) { l2 = "0" }, read l2 after it
+    constant(g)
+    branch = g.emit(jvm.Ifz, "eq", -1)
+    constant(g)
+    g.emit(jvm.Store, jvm.Reference(), 2)
+    g.patch(branch, jvm.Ifz, "eq", len(g.opcodes))
+    g.emit(jvm.Load, jvm.Reference(), 2)
+
+
+def builder(*parts):
+    def expression(g):
+        g.new_builder()
+        for part in parts:
+            part(g)
+            g.emit(jvm.InvokeVirtual, APPEND)
+        g.emit(jvm.InvokeVirtual, TOSTRING)
+
+    return expression
+
+
+@pytest.mark.parametrize(
+    "expression, vulnerable",
+    [
+        (param, True),
+        (constant, False),
+        (source, True),
+        (concat, True),
+        (builder(constant, constant), False),
+        (builder(constant, param), True),
+        (builder(source), True),
+        # an unassigned local is UNTRUSTED, on any of the paths
+        (maybe_assigned, True),
+    ],
+)
+def test_verdicts(expression, vulnerable):
+    assert analyzer.analyze_method(RUN, sink_of(expression)) == vulnerable
+
+
+def test_generated_programs():
+    verdicts = [analyzer.analyze_method(m, opcodes) for m, opcodes in PROGRAMS]
+    # without a call of the sink, nothing is vulnerable
+    for (_, opcodes), vulnerable in zip(PROGRAMS, verdicts):
+        if not any(getattr(op, "method", None) == SINK for op in opcodes):
+            assert not vulnerable
+    assert sum(verdicts) == 211
+
+
+def test_ifds_agrees_on_generated_programs():
+    for methodid, opcodes in PROGRAMS:
+        assert analyzer.analyze_method(methodid, opcodes) == (
+            analyzer.analyze_method_ifds(methodid, opcodes, opcodes_of=lambda _: None)
+        ), methodid
+
+
+def test_ifds_agrees_on_suite_cases():
+    suite = analyzer.Suite()
+    methodids = [m for m, _ in suite.case_methods()]
+    analyzer.summarize_callees(suite, methodids)
+    for methodid in methodids:
+        assert analyzer.analyze_method(methodid) == (
+            analyzer.analyze_method_ifds(methodid)
+        ), methodid
+
+
+def datalog_verdicts(methods) -> list[bool]:
+    program = facts.TaintProgram()
+    for methodid, opcodes in methods:
+        program.add(methodid, facts.extract(methodid, opcodes, static=True))
+    program.solve()
+    return [program.vulnerable(methodid) for methodid, _ in methods]
+
+
+def untracked(g):
+    # escape("0").toString(), of a builder the method did not allocate
+    constant(g)
+    g.emit(jvm.InvokeStatic, UNKNOWN)
+    g.emit(jvm.InvokeVirtual, TOSTRING)
+
+
+def appended_later(g):
+    # b = new StringBuilder(); s = b.toString(); b.append(param0); s
+    g.new_builder()
+    g.emit(jvm.Store, jvm.Reference(), 2)
+    g.emit(jvm.Load, jvm.Reference(), 2)
+    g.emit(jvm.InvokeVirtual, TOSTRING)
+    g.emit(jvm.Load, jvm.Reference(), 2)
+    param(g)
+    g.emit(jvm.InvokeVirtual, APPEND)
+    g.emit(jvm.Pop, 1)
+
+
+@pytest.mark.parametrize(
+    "expression, worklist, datalog",
+    [
+        (maybe_assigned, True, True),
+        (untracked, True, True),
+        # builders are flow insensitive in Datalog
+        (appended_later, False, True),
+    ],
+)
+def test_datalog_verdicts(expression, worklist, datalog):
+    opcodes = sink_of(expression)
+    assert analyzer.analyze_method(RUN, opcodes) == worklist
+    assert datalog_verdicts([(RUN, opcodes)]) == [datalog]
+
+
+def test_datalog_on_generated_programs():
+    # Datalog finds everything the worklist engine finds, and only finds
+    # more through its flow insensitive builders
+    verdicts = [analyzer.analyze_method(m, opcodes) for m, opcodes in PROGRAMS]
+    datalog = datalog_verdicts(PROGRAMS)
+    assert all(d for w, d in zip(verdicts, datalog) if w)
+    assert sum(datalog) - sum(verdicts) == 2
+
+
+def test_datalog_agrees_on_suite_cases():
+    suite = analyzer.Suite()
+    methodids = [m for m, _ in suite.case_methods()]
+    analyzer.summarize_callees(suite, methodids)
+    program = facts.load(suite)
+    for methodid in methodids:
+        assert analyzer.analyze_method(methodid) == program.vulnerable(methodid), (
+            methodid
+        )
+
+
+def test_widening_of_a_growing_stack():
+    # while (...) { load param0 } leaves one more string on the stack on
+    # every iteration, which only the widening at the loop head folds
+    opcodes = (
+        jvm.Push(0, jvm.Value.int(0)),
+        jvm.Ifz(1, "eq", 4),
+        jvm.Load(2, jvm.Reference(), 0),
+        jvm.Goto(3, 0),
+        jvm.Return(4, None),
+    )
+    stats = analyzer.WorklistStats()
+    assert not analyzer.analyze_method(RUN, opcodes, stats)
+    assert stats.widened and not stats.capped
+
+
+def test_widening_of_a_shifting_loop():
+    # while (...) { l4 = l3; l3 = l2; l2 = l1; l1 = param0 } taints one more
+    # local on every iteration, and l4 only after the fourth
+    def shifting(g):
+        for i in range(1, 5):
+            constant(g)
+            g.emit(jvm.Store, jvm.Reference(), i)
+        head = len(g.opcodes)
+        constant(g)
+        branch = g.emit(jvm.Ifz, "eq", -1)
+        for i in range(4, 0, -1):
+            g.emit(jvm.Load, jvm.Reference(), i - 1)
+            g.emit(jvm.Store, jvm.Reference(), i)
+        g.emit(jvm.Goto, head)
+        g.patch(branch, jvm.Ifz, "eq", len(g.opcodes))
+        g.emit(jvm.Load, jvm.Reference(), 4)
+
+    stats = analyzer.WorklistStats()
+    assert analyzer.analyze_method(RUN, sink_of(shifting), stats)
+    assert not stats.capped
+    assert max(stats.visits) < analyzer.MAX_VISITS_PER_BLOCK
+
+
+def test_transfer_cache():
+    hits = 0
+    for methodid, opcodes in PROGRAMS:
+        initial = AbstractState.initial(methodid)
+        cached = analyzer.WorklistStats()
+        _, IN, OUT, vulnerable = analyzer.solve(methodid, opcodes, initial, cached)
+        uncached = analyzer.WorklistStats()
+        _, in_, out, expected = analyzer.solve(
+            methodid,
+            opcodes,
+            initial,
+            uncached,
+            cache=analyzer.TransferCache(size=0),
+        )
+        assert (vulnerable, IN, OUT) == (expected, in_, out)
+        assert uncached.hits == 0
+        hits += cached.hits
+    assert hits
+
+
+@pytest.mark.parametrize("engine", ["worklist", "ifds", "datalog"])
+def test_batch_fails_with_a_method(engine):
+    methods = ["jpamb.cases.Simple.assertFalse", "jpamb.cases.Nothing.nothing"]
+    run = subprocess.run(
+        [sys.executable, analyzer.__file__, "--engine", engine, *methods],
+        capture_output=True,
+        text=True,
+    )
+    assert run.returncode == 1
+    lines = [json.loads(line) for line in run.stdout.splitlines()]
+    assert [line["vulnerable"] for line in lines] == [False, None]
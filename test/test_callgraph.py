@@ -0,0 +1,64 @@
+from jpamb import callgraph, jvm, model
+
+from hypothesis import given, strategies as st
+
+suite = model.Suite()
+
+
+def reachable(n, successors, start):
+    seen, stack = {start}, [start]
+    while stack:
+        for s in successors(stack.pop()):
+            if s not in seen:
+                seen.add(s)
+                stack.append(s)
+    return seen
+
+
+def test_suite_calls():
+    graph = callgraph.suite_callgraph(suite)
+    for m, methodid in enumerate(graph.methods):
+        assert graph.index[methodid] == m
+        invoked = {
+            callgraph.target(op.method)
+            for op in suite.method_opcodes(methodid)
+            if isinstance(op, callgraph.INVOKES)
+        }
+        callees = {graph.methods[t] for t in graph.callees(m)}
+        assert callees == invoked & set(graph.methods)
+        for t in graph.callees(m):
+            assert m in graph.callers(t)
+
+
+def test_roots_and_recursion():
+    fib = jvm.AbsMethodID.decode("jpamb.cases.Calls.fib:(I)I")
+    caller = jvm.AbsMethodID.decode("jpamb.cases.Calls.callsAssertFib:(I)V")
+    graph = callgraph.build(suite, [caller])
+    assert graph.methods[0] == caller and fib in graph
+    assert graph.is_recursive(graph.scc_of[graph.index[fib]])
+    assert not graph.is_recursive(graph.scc_of[0])
+    # callees come first
+    assert graph.scc_of[graph.index[fib]] < graph.scc_of[0]
+
+
+@given(
+    st.integers(1, 12).flatmap(
+        lambda n: st.lists(
+            st.lists(st.integers(0, n - 1), max_size=3), min_size=n, max_size=n
+        )
+    )
+)
+def test_tarjan(edges):
+    n = len(edges)
+    successors = edges.__getitem__
+    components = callgraph._tarjan(n, successors)
+    assert sorted(m for c in components for m in c) == list(range(n))
+
+    reach = [reachable(n, successors, m) for m in range(n)]
+    scc_of = {m: c for c, component in enumerate(components) for m in component}
+    for a in range(n):
+        for b in range(n):
+            same = b in reach[a] and a in reach[b]
+            assert same == (scc_of[a] == scc_of[b])
+        for b in edges[a]:
+            assert scc_of[b] <= scc_of[a]
@@ -0,0 +1,156 @@
+from jpamb import cfg, jvm, model
+
+from hypothesis import given, strategies as st
+
+suite = model.Suite()
+
+
+def st_casemethods():
+    return st.sampled_from(sorted(suite.cases.index))
+
+
+def dominator_sets(n, entries, predecessors):
+    """The dominators of every node, by the classic iterative algorithm."""
+    nodes = set(range(n))
+    dom = {b: set(nodes) for b in nodes}
+    for e in entries:
+        dom[e] = {e}
+    changed = True
+    while changed:
+        changed = False
+        for b in nodes - set(entries):
+            preds = [dom[p] for p in predecessors(b)]
+            new = {b} | (set.intersection(*preds) if preds else set())
+            if new != dom[b]:
+                dom[b], changed = new, True
+    return dom
+
+
+def strict_dominators(tree, b):
+    result = set()
+    while (b := tree[b]) != -1:
+        result.add(b)
+    return result
+
+
+@given(st_casemethods())
+def test_blocks_and_edges(method):
+    opcodes = suite.method_opcodes(method)
+    graph = cfg.method_cfg(suite, method)
+    assert cfg.method_cfg(suite, method) is graph
+
+    assert sum((graph.instructions(b) for b in range(len(graph))), ()) == opcodes
+    for b in range(len(graph)):
+        for s in graph.successors(b):
+            assert b in graph.predecessors(s)
+        last = graph.instructions(b)[-1]
+        if isinstance(last, (jvm.Return, jvm.Throw)):
+            assert len(graph.successors(b)) == 0
+        if isinstance(last, (jvm.Goto, jvm.If, jvm.Ifz)):
+            assert graph.block_of[last.target] in graph.successors(b)
+
+
+@given(st_casemethods())
+def test_dominators(method):
+    graph = cfg.method_cfg(suite, method)
+    reachable = set(graph.rpo)
+    assert graph.rpo[0] == 0
+    for b in graph.rpo:
+        for s in graph.successors(b):
+            # only back edges go backwards in a reverse postorder
+            assert graph.rpo_number[s] > graph.rpo_number[b] or graph.dominates(s, b)
+
+    dom = dominator_sets(len(graph), [0], graph.predecessors)
+    for b in reachable:
+        assert strict_dominators(graph.idom, b) == dom[b] - {b}
+
+
+@given(st_casemethods())
+def test_post_dominators(method):
+    graph = cfg.method_cfg(suite, method)
+    n = len(graph)
+    exits = graph.exits()
+
+    def successors(b):
+        succ = list(graph.successors(b))
+        return succ if succ else [n]
+
+    pdom = dominator_sets(n + 1, [n], lambda b: successors(b) if b < n else [])
+    reaches_exit, stack = set(), list(exits)
+    while stack:
+        if (b := stack.pop()) not in reaches_exit:
+            reaches_exit.add(b)
+            stack.extend(graph.predecessors(b))
+
+    for b in graph.rpo:
+        if b not in reaches_exit:
+            assert graph.ipdom[b] == -1
+            continue
+        if b in exits:
+            assert graph.ipdom[b] == -1
+        assert strict_dominators(graph.ipdom, b) == pdom[b] - {b, n}
+
+
+def test_loop_nesting():
+    method = jvm.AbsMethodID.decode("jpamb.cases.Calls.generatePrimeArray:(I)[I")
+    graph = cfg.method_cfg(suite, method)
+    assert len(graph.loops) == 2
+    for h, loop in graph.loops.items():
+        assert all(graph.dominates(h, b) for b in loop.blocks)
+        if loop.parent is not None:
+            assert loop.blocks < graph.loops[loop.parent].blocks
+            assert loop.depth == graph.loops[loop.parent].depth + 1
+        assert graph.loop_of[h] == h
+    assert max(graph.loop_depth(b) for b in range(len(graph))) == 2
+
+
+def test_straight_line():
+    graph = cfg.build((jvm.Push(0, jvm.Value.int(1)), jvm.Return(1, jvm.Int())))
+    assert len(graph) == 1
+    assert list(graph.rpo) == [0]
+    assert graph.loops == {}
+    assert graph.exits() == [0]
+
+
+def test_cache_by_method():
+    method = jvm.AbsMethodID.decode("jpamb.Test.run:()V")
+    opcodes = (jvm.Return(0, None),)
+    graph = cfg.build(opcodes, method)
+    assert cfg.build(opcodes, method) is graph
+    assert cfg.build((jvm.Return(0, None),), method) is not graph
+    assert cfg.build(opcodes) is not graph
+
+
+def test_unreachable_block():
+    graph = cfg.build(
+        (
+            jvm.Goto(0, 2),
+            jvm.Push(1, jvm.Value.int(1)),
+            jvm.Return(2, None),
+        )
+    )
+    assert len(graph) == 3 and graph.rpo_number[1] == -1
+    worklist = cfg.Worklist(graph)
+    worklist.push(1)
+    assert 1 not in worklist and not worklist
+    worklist.push(2)
+    worklist.push(0)
+    assert [worklist.pop(), worklist.pop()] == [0, 2]
+
+
+@given(st_casemethods())
+def test_worklist_order(method):
+    graph = cfg.method_cfg(suite, method)
+    for worklist_class in (cfg.Worklist, cfg.FifoWorklist):
+        worklist = worklist_class(graph)
+        for b in reversed(graph.rpo):
+            worklist.push(b)
+            worklist.push(b)
+            assert b in worklist
+        assert len(worklist) == len(graph.rpo)
+        popped = [worklist.pop() for _ in range(len(graph.rpo))]
+        assert not worklist and not any(b in worklist for b in graph.rpo)
+        if worklist_class is cfg.Worklist:
+            assert popped == list(graph.rpo)
+        else:
+            assert popped == list(reversed(graph.rpo))
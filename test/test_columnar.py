@@ -0,0 +1,60 @@
+from collections import Counter
+
+import pytest
+
+from jpamb import cli, jvm, model
+
+np = pytest.importorskip("numpy")
+columnar = pytest.importorskip("jpamb.columnar")
+
+suite = model.Suite()
+
+
+def case_methods():
+    return list(suite.cases.index)
+
+
+def test_method_table():
+    for methodid in case_methods():
+        opcodes = suite.method_opcodes(methodid)
+        table = columnar.method_table(suite, methodid)
+        assert columnar.method_table(suite, methodid) is table
+        assert [columnar.KINDS[k] for k in table.kind] == [type(op) for op in opcodes]
+        assert list(table.offset) == [op.offset for op in opcodes]
+        assert [table.symbols[m] for m in table.mnemonic] == [
+            op.mnemonic() for op in opcodes
+        ]
+
+
+def test_suite_table_queries():
+    methods = case_methods()
+    table = columnar.suite_table(suite, methods)
+    opcodes = {m: suite.method_opcodes(m) for m in methods}
+
+    assert table.histogram() == Counter(
+        type(op) for ops in opcodes.values() for op in ops
+    )
+    assert table.methods_with(jvm.Throw) == [
+        m for m in methods if any(isinstance(op, jvm.Throw) for op in opcodes[m])
+    ]
+
+    invoked = next(
+        op.method
+        for ops in opcodes.values()
+        for op in ops
+        if isinstance(op, jvm.InvokeStatic)
+    )
+    assert table.methods_invoking(invoked) == [
+        m
+        for m in methods
+        if any(getattr(op, "method", None) == invoked for op in opcodes[m])
+    ]
+
+
+def test_suite_table_all_methods():
+    table = columnar.suite_table(suite)
+    assert set(case_methods()) <= set(table.methods)
+
+
+def test_count_opcodes_columnar():
+    assert cli.count_opcodes_columnar(suite) == cli.count_opcodes(suite)
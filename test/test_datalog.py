@@ -0,0 +1,121 @@
+import pytest
+
+from jpamb import datalog
+from jpamb.taint import facts
+from jpamb import jvm, model
+
+X, Y, Z = datalog.variables("X Y Z")
+
+
+def closure():
+    program = datalog.Program()
+    edge = program.relation("edge", 2)
+    path = program.relation("path", 2)
+    program.rule(path(X, Y), edge(X, Y))
+    program.rule(path(X, Z), path(X, Y), edge(Y, Z))
+    return program, edge, path
+
+
+def test_transitive_closure():
+    program, edge, path = closure()
+    n = 50
+    program.add(edge, [(i, i + 1) for i in range(n)])
+    program.solve()
+    assert set(path) == {(i, j) for i in range(n + 1) for j in range(i + 1, n + 1)}
+    # semi-naive: one round per path length
+    assert program.stats.rounds == n
+
+
+def test_incremental():
+    program, edge, path = closure()
+    program.add(edge, [(0, 1), (1, 2)])
+    program.solve()
+    program.add(edge, [(2, 0)])
+    program.solve()
+    assert set(path) == {(i, j) for i in range(3) for j in range(3)}
+
+    again, again_edge, again_path = closure()
+    again.add(again_edge, [(0, 1), (1, 2), (2, 0)])
+    again.solve()
+    assert set(again_path) == set(path)
+    assert program.stats.derived == again.stats.derived
+
+
+def test_constants_and_repeated_variables():
+    program = datalog.Program()
+    edge = program.relation("edge", 2)
+    loop = program.relation("loop", 1)
+    from_zero = program.relation("from_zero", 1)
+    program.rule(loop(X), edge(X, X))
+    program.rule(from_zero(Y), edge(0, Y))
+    program.add(edge, [(0, 0), (0, 1), (1, 1), (1, 2)])
+    program.solve()
+    assert set(loop) == {(0,), (1,)}
+    assert set(from_zero) == {(0,), (1,)}
+
+
+def test_errors():
+    program = datalog.Program()
+    edge = program.relation("edge", 2)
+    path = program.relation("path", 2)
+    with pytest.raises(ValueError):
+        edge(X)
+    with pytest.raises(ValueError):
+        program.relation("edge", 3)
+    with pytest.raises(ValueError):
+        program.rule(path(X, Z), edge(X, Y))
+    with pytest.raises(ValueError):
+        program.add(edge, [(1, 2, 3)])
+
+
+M = jvm.AbsMethodID.decode
+SINK = M("java.sql.Statement.executeQuery:(A)A")
+SOURCE = M("java.lang.System.getenv:(A)A")
+OBJECT = jvm.ClassName.decode("java.lang.Object")
+
+
+def calls(helper):
+    """entry(s) runs helper(s), or a source if s is null, as a query."""
+    return [
+        jvm.Load(0, jvm.Reference(), 0),
+        jvm.Ifz(1, "ne", 5),
+        jvm.Push(2, jvm.Value.int(0)),
+        jvm.InvokeStatic(3, SOURCE),
+        jvm.Store(4, jvm.Reference(), 0),
+        jvm.New(5, OBJECT),
+        jvm.Load(6, jvm.Reference(), 0),
+        jvm.InvokeStatic(7, helper),
+        jvm.InvokeInterface(8, SINK, 2),
+        jvm.Pop(9, 1),
+        jvm.Return(10, None),
+    ]
+
+
+def test_taint_facts():
+    identity, constant = M("jpamb.T.identity:(A)A"), M("jpamb.T.constant:(A)A")
+    methods = {
+        M("jpamb.T.unsafe:(A)V"): calls(identity),
+        M("jpamb.T.safe:(A)V"): calls(constant),
+        identity: [jvm.Load(0, jvm.Reference(), 0), jvm.Return(1, jvm.Reference())],
+        constant: [jvm.Push(0, jvm.Value.int(0)), jvm.Return(1, jvm.Reference())],
+    }
+    program = facts.TaintProgram()
+    for methodid, opcodes in methods.items():
+        program.add(methodid, facts.extract(methodid, opcodes, static=True))
+    program.solve()
+    assert program.vulnerable(M("jpamb.T.unsafe:(A)V"))
+    assert not program.vulnerable(M("jpamb.T.safe:(A)V"))
+    # the local read after the branch merges the argument and the source
+    label = program.program.relations["label"]
+    unsafe = M("jpamb.T.unsafe:(A)V")
+    assert {i for m, v, i in label if m == unsafe and v == "b2.l0"} == {0, facts.SOURCE}
+    assert set(program.program.relations["returns"]) == {(identity, 0)}
+
+
+def test_suite_facts_are_cached(tmp_path):
+    suite = model.Suite()
+    store = facts.FactStore(tmp_path)
+    cn = jvm.ClassName.decode("jpamb.cases.Calls")
+    first = facts.class_facts(suite, cn, store)
+    assert first and [f.name for f in tmp_path.iterdir()] == [cn.encode()]
+    assert facts.class_facts(suite, cn, store) == first
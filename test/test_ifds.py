@@ -0,0 +1,102 @@
+from jpamb import ifds
+
+
+class Program(ifds.Problem):
+    """Methods of straight-line nodes (method, i) over facts "a", "b", ...
+
+    `gen` and `kill` give the facts a node adds and removes, and `calls`
+    the method a node calls. Callees take the facts of the caller as they
+    are, and give back the facts at their exit.
+    """
+
+    zero = "0"
+
+    def __init__(self, methods, gen=(), kill=(), calls=()):
+        self.methods = methods
+        self.gen = dict(gen)
+        self.kill = dict(kill)
+        self.calls = dict(calls)
+
+    def method_of(self, node):
+        return node[0]
+
+    def start(self, method):
+        return (method, 0)
+
+    def successors(self, node):
+        method, i = node
+        return [(method, i + 1)] if i + 1 < self.methods[method] else []
+
+    def callees(self, node):
+        return [self.calls[node]] if node in self.calls else []
+
+    def return_site(self, call):
+        return (call[0], call[1] + 1)
+
+    def is_exit(self, node):
+        return node[1] == self.methods[node[0]] - 1
+
+    def normal_flow(self, node, fact):
+        if fact == self.zero:
+            return [self.zero, *self.gen.get(node, ())]
+        return [] if fact in self.kill.get(node, ()) else [fact]
+
+    def call_flow(self, call, callee, fact):
+        return [fact]
+
+    def return_flow(self, call, callee, exit, fact):
+        return [fact]
+
+    def call_to_return_flow(self, call, fact):
+        return [self.zero] if fact == self.zero else []
+
+
+def test_context_sensitive():
+    # main calls id once with "a" and once with "b", between the calls "a"
+    # is killed, so only "b" comes back from the second call
+    problem = Program(
+        {"main": 5, "id": 1},
+        gen={("main", 0): ["a"], ("main", 2): ["b"]},
+        kill={("main", 2): ["a"]},
+        calls={("main", 1): "id", ("main", 3): "id"},
+    )
+    solver = ifds.Solver(problem)
+    solver.solve({("main", 0): [problem.zero]})
+    assert solver.facts(("main", 2)) == {"0", "a"}
+    assert solver.facts(("main", 3)) == {"0", "b"}
+    assert solver.facts(("main", 4)) == {"0", "b"}
+    assert solver.facts(("id", 0)) == {"0", "a", "b"}
+    assert solver.stats.summary_uses > 0
+
+
+def test_summaries_are_reused():
+    # f0 calls f1 twice, which calls f2 twice, ... the call chains double
+    # with each level, the path edges do not
+    depth = 12
+    methods = {f"f{k}": 3 for k in range(depth)}
+    methods[f"f{depth}"] = 2
+    calls = {}
+    for k in range(depth):
+        calls[(f"f{k}", 0)] = f"f{k + 1}"
+        calls[(f"f{k}", 1)] = f"f{k + 1}"
+    problem = Program(methods, gen={(f"f{depth}", 0): ["x"]}, calls=calls)
+    solver = ifds.Solver(problem)
+    solver.solve({("f0", 0): [problem.zero]})
+    assert solver.facts(("f0", 2)) == {"0", "x"}
+    # entered with "0", and with "x" returned from the first call
+    assert solver.stats.entries == 2 * depth
+    assert solver.stats.path_edges < 10 * depth
+
+
+def test_recursion():
+    # rec gens "r" and calls itself before its exit
+    problem = Program(
+        {"main": 2, "rec": 3},
+        gen={("rec", 0): ["r"]},
+        calls={("main", 0): "rec", ("rec", 1): "rec"},
+    )
+    problem.call_to_return_flow = lambda call, fact: [fact]
+    solver = ifds.Solver(problem)
+    solver.solve({("main", 0): [problem.zero]})
+    assert solver.facts(("main", 1)) == {"0", "r"}
+    assert solver.facts(("rec", 2)) == {"0", "r"}
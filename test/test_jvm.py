@@ -62,3 +62,71 @@ def test_types_math_should_return_string(tp):
 @given(jvm_values())
 def test_values_math_should_return_string(v):
     assert isinstance(v.math(), str)
+
+
+@given(jvm_types())
+def test_types_pickle_to_same_instance(tp):
+    import pickle
+
+    assert pickle.loads(pickle.dumps(tp)) == tp
+
+
+def test_identifiers_are_interned():
+    import gc
+    import pickle
+
+    a = jvm.AbsMethodID.decode("jpamb.cases.Simple.divideByN:(I)I")
+    b = jvm.AbsMethodID(
+        jvm.ClassName.from_parts("jpamb", "cases", "Simple"),
+        jvm.MethodID("divideByN", jvm.ParameterType((jvm.Int(),)), jvm.Int()),
+    )
+    assert a is b
+    assert a.extension.params is jvm.ParameterType.decode("I")
+    assert pickle.loads(pickle.dumps(a)) is a
+    assert a.encode() is a.encode()
+    assert a != jvm.AbsMethodID.decode("jpamb.cases.Simple.divideByN:(I)V")
+
+    key = ("jpamb.cases.Unused",)
+    jvm.ClassName(*key)
+    gc.collect()
+    assert key not in jvm.ClassName._interned
+
+
+@given(jvm_types(), jvm_types())
+def test_types_equality_and_order(a, b):
+    assert (a == b) == (a.encode() == b.encode())
+    assert (a < b) == (a.encode() < b.encode())
+    assert (a <= b) == (a.encode() <= b.encode())
+    assert (a > b) == (a.encode() > b.encode())
+    if a == b:
+        assert hash(a) == hash(b)
+
+
+def test_hash_is_the_same_in_every_process():
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "from jpamb import jvm;"
+        "print(hash(jvm.Array(jvm.Int())),"
+        " hash(jvm.AbsMethodID.decode('jpamb.cases.Simple.divideByN:(I)I')))"
+    )
+    env = {**os.environ, "PYTHONHASHSEED": "0"}
+    runs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for _ in range(2)
+    }
+    assert len(runs) == 1
+
+
+@given(st.lists(jvm_types()))
+def test_parameter_types_sort_like_encoding(types):
+    params = [jvm.ParameterType((t,)) for t in types]
+    assert [p.encode() for p in sorted(params)] == sorted(p.encode() for p in params)
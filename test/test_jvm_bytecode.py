@@ -1,6 +1,8 @@
 from jpamb import jvm, model
 
 from hypothesis import given, strategies as st
+import pickle
+import pytest
 
 suite = model.Suite()
 
@@ -50,3 +52,28 @@ def test_opcode_real(op):
 @given(st_caseopcodes())
 def test_opcode_hash(op):
     assert hash(op)
+
+
+@given(st_casemethods())
+def test_parse_opcode_fast(method):
+    bytecode = suite.findmethod(method)["code"]["bytecode"]
+    strict = [jvm.Opcode.from_json(opcode) for opcode in bytecode]
+    jvm.Opcode.strict = False
+    try:
+        fast = [jvm.Opcode.from_json(opcode) for opcode in bytecode]
+    finally:
+        jvm.Opcode.strict = True
+    assert fast == strict
+
+
+def test_parse_unknown_opcode():
+    with pytest.raises(NotImplementedError):
+        jvm.Opcode.from_json({"opr": "lookupswitch", "offset": 0})
+    with pytest.raises(NotImplementedError):
+        jvm.Opcode.from_json({"opr": "invoke", "access": "unknown", "offset": 0})
+
+
+@given(st_caseopcodes())
+def test_opcode_slots(op):
+    assert not hasattr(op, "__dict__")
+    assert pickle.loads(pickle.dumps(op)) == op
@@ -30,6 +30,39 @@ def test_cases_roundtrip():
     assert sorted(cases) == sorted(sorted(cases))
 
 
+def test_cases_decode():
+    with open(model.Suite().case_file) as fp:
+        lines = fp.read().splitlines()
+    cases = model.Cases.decode(lines)
+    assert list(cases) == [model.Case.decode(line) for line in lines]
+
+    methodid, group = next((m, cs) for m, cs in cases.index.items() if len(cs) > 1)
+    assert group[0].methodid is group[1].methodid
+
+    assert model.Case.by_methodid(cases) == model.Case.by_methodid(list(cases))
+    # grouped with the index, but not shared with it
+    groups = cases.by_methodid()
+    groups[0][1].clear()
+    assert cases.by_methodid() != groups
+    assert all(cases.index[m] for m, _ in cases.by_methodid())
+    assert list(cases.index) == sorted(cases.index)
+    for methodid, group in cases.index.items():
+        assert all(c.methodid is methodid for c in group)
+
+
+def test_case_store_roundtrip(tmp_path):
+    cases = model.Suite().cases
+    store = model.CaseStore(tmp_path)
+    assert not isinstance(store, model.OpcodeStore)
+    assert store.header() != model.OpcodeStore.header()
+    assert store.load("abc") is None
+    store.store("abc", cases)
+    loaded = store.load("abc")
+    assert isinstance(loaded, model.Cases)
+    assert loaded == cases
+    assert loaded.index == cases.index
+
+
 @pytest.mark.slow
 def test_checkhealth():
     model.Suite().checkhealth(failfast=True)
@@ -47,3 +80,105 @@ def test_classlookup():
         assert suite.sourcefile(cn) in sourcefiles
         assert suite.classfile(cn) in classfiles
         assert suite.decompiledfile(cn) in decompiledfiles
+
+
+def test_classcache_hits_and_misses():
+    suite = model.Suite()
+    cache = model.ClassCache()
+    path = suite.decompiledfile(jvm.ClassName.decode("jpamb.cases.Simple"))
+
+    first = cache.get(path, model._load_json)
+    assert cache.get(path, model._load_json) is first
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+    assert cache.nbytes == path.stat().st_size
+
+
+def test_classcache_invalidates_on_change(tmp_path):
+    cache = model.ClassCache()
+    path = tmp_path / "A.json"
+    path.write_text('{"name": "A"}')
+    assert cache.get(path, model._load_json) == {"name": "A"}
+
+    path.write_text('{"name": "AB"}')
+    assert cache.get(path, model._load_json) == {"name": "AB"}
+    assert cache.stats.invalidations == 1
+    assert cache.stats.misses == 2
+
+
+def test_classcache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for name in "ABC":
+        path = tmp_path / f"{name}.json"
+        path.write_text(f'{{"name": "{name}"}}')
+        paths.append(path)
+    a, b, c = paths
+
+    cache = model.ClassCache(max_bytes=2 * a.stat().st_size)
+    cache.get(a, model._load_json)
+    cache.get(b, model._load_json)
+    cache.get(a, model._load_json)
+    cache.get(c, model._load_json)
+
+    assert a in cache and c in cache and b not in cache
+    assert cache.stats.evictions == 1
+
+    cache.resize(0)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_method_index():
+    suite = model.Suite()
+    cn = jvm.ClassName.decode("jpamb.cases.Simple")
+    index = suite.method_index(cn)
+    assert suite.method_index(cn) is index
+
+    (methodid,) = index.by_name("divideByN")
+    assert methodid.encode() == "divideByN:(I)I"
+    assert index.lookup(methodid)["name"] == "divideByN"
+    assert index.by_name("doesNotExist") == ()
+
+    with pytest.raises(IndexError):
+        suite.findmethod(jvm.AbsMethodID.decode("jpamb.cases.Simple.divideByN:(Z)I"))
+
+
+def test_method_index_from_file():
+    suite = model.Suite()
+    for path in suite.decompiledfiles():
+        full = model.MethodIndex.from_json(model._load_json(path))
+        lazy = model.MethodIndex.from_file(path)
+        assert lazy.overloads == full.overloads
+        assert list(lazy.methods) == list(full.methods)
+        assert dict(lazy.methods) == full.methods
+
+
+def test_scan_methods_escapes():
+    content = b'{"methods": [{"name": "a\\"]{", "x": [1, {"y": null}]}], "z": 1}'
+    (span,) = model.scan_methods(content)
+    assert span.field(content, b"name") == 'a"]{'
+    assert span.field(content, b"x") == [1, {"y": None}]
+    assert content[span.start : span.end].endswith(b"}]}")
+
+
+def test_opcode_store_roundtrip(tmp_path):
+    suite = model.Suite()
+    methodid = jvm.AbsMethodID.decode("jpamb.cases.Arrays.arraySpellsHello:([C)V")
+    opcodes = suite.method_opcodes(methodid)
+    assert opcodes == tuple(
+        jvm.Opcode.from_json(op)
+        for op in suite.findmethod(methodid)["code"]["bytecode"]
+    )
+
+    store = model.OpcodeStore(tmp_path)
+    assert store.load("abc") is None
+    store.store("abc", {("arraySpellsHello", "[C"): opcodes})
+    assert store.load("abc") == {("arraySpellsHello", "[C"): opcodes}
+
+    store.file("abc").write_bytes(b"garbage")
+    assert store.load("abc") is None
+
+    # a newer version of a class supersedes the older ones
+    store.store("v1", {}, "jpamb.cases.Arrays")
+    store.store("v2", {}, "jpamb.cases.Arrays")
+    assert store.load("v1", "jpamb.cases.Arrays") is None
+    assert store.load("v2", "jpamb.cases.Arrays") == {}
+    assert store.load("abc") is None and store.file("abc").exists()
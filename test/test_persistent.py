@@ -0,0 +1,88 @@
+from jpamb.persistent import PMap
+
+from hypothesis import given, strategies as st
+
+
+class Colliding:
+    """A key with few hashes, to get collisions."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def __hash__(self):
+        return self.n % 3
+
+    def __eq__(self, other):
+        return isinstance(other, Colliding) and other.n == self.n
+
+    def __repr__(self):
+        return f"Colliding({self.n})"
+
+
+keys = st.one_of(
+    st.integers(-(2**70), 2**70),
+    st.integers(0, 64),
+    st.text(max_size=3),
+    st.integers(0, 10).map(Colliding),
+)
+operations = st.lists(
+    st.tuples(st.sampled_from(["set", "delete"]), keys, st.integers()), max_size=80
+)
+
+
+def apply(ops, pmap, model):
+    for op, key, value in ops:
+        if op == "set":
+            pmap, model[key] = pmap.set(key, value), value
+        else:
+            pmap = pmap.delete(key)
+            model.pop(key, None)
+    return pmap
+
+
+@given(operations)
+def test_pmap_like_dict(ops):
+    model = {}
+    pmap = apply(ops, PMap(), model)
+    assert len(pmap) == len(model)
+    assert dict(pmap.items()) == model
+    assert pmap == model
+    for _, key, _ in ops:
+        assert (key in pmap) == (key in model)
+        assert pmap.get(key, "missing") == model.get(key, "missing")
+
+
+@given(operations)
+def test_pmap_is_persistent(ops):
+    model = {}
+    pmap = apply(ops, PMap(), model)
+    before = dict(model)
+    apply([(op, k, v + 1) for op, k, v in reversed(ops)], pmap, {})
+    assert pmap == before
+    assert pmap.set(object(), 1) != pmap
+
+
+@given(operations, operations, operations)
+def test_pmap_merge(common, left, right):
+    base_model = {}
+    base = apply(common, PMap(), base_model)
+    a_model, b_model = dict(base_model), dict(base_model)
+    a = apply(left, base, a_model)
+    b = apply(right, base, b_model)
+
+    assert a.merge(b) == {**a_model, **b_model}
+    assert a.merge(b, lambda x, y: x) == {**b_model, **a_model}
+    combined = a.merge(b, lambda x, y: x | y)
+    for key, value in combined.items():
+        if key in a_model and key in b_model:
+            assert value == a_model[key] | b_model[key]
+    assert len(combined) == len(a_model.keys() | b_model.keys())
+    assert a.merge(a) is a
+    assert a.merge(PMap()) is a
+
+
+def test_pmap_shares_unchanged_maps():
+    pmap = PMap({i: i for i in range(1000)})
+    assert pmap.set(5, 5) is pmap
+    assert pmap.delete(-1) is pmap
+    assert pmap.merge(pmap.set(5, 6)) == {**{i: i for i in range(1000)}, 5: 6}
@@ -0,0 +1,66 @@
+"""
+Tests for jpamb.taint.models module
+"""
+
+import bytecode_taint_analyzer as analyzer
+from jpamb import jvm
+from jpamb.taint import facts
+from jpamb.taint.models import ALL, FlowModel, ModelTable
+
+M = jvm.AbsMethodID.decode
+
+
+def test_default_models():
+    models = ModelTable.default()
+    append = models.lookup(M("java/lang/StringBuilder.append:(A)A"))
+    assert append == FlowModel(
+        returns=0b11, receiver=0b10, result_is_receiver=True, carrier=True
+    )
+    assert models.lookup(M("java/lang/String.toString:()A")) == FlowModel(returns=0b1)
+    # the replaced text does not flow into the result
+    assert models.lookup(M("java/lang/String.replaceAll:(AA)A")).returns == 0b101
+    assert models.lookup(M("java/lang/String.format:(AA)A")).returns == ALL
+    assert models.lookup(M("java/lang/String.length:()I")) == FlowModel()
+    assert models.lookup(M("java/sql/Statement.executeQuery:(A)A")) is None
+
+
+def test_overloads():
+    models = ModelTable([("a.B.f", FlowModel(returns=0b1))])
+    one, two = M("a/B.f:(I)A"), M("a/B.f:(A)A")
+    assert models.row(one) == models.row(two) == 0
+    # a model of one overload takes precedence, also for looked up methods
+    models.add("a/B.f:(A)A", FlowModel(returns=0b10))
+    assert models.lookup(one).returns == 0b1
+    assert models.lookup(two).returns == 0b10
+    assert len(models) == 2
+
+
+def test_library_facts():
+    replace = M("java/lang/String.replaceAll:(AA)A")
+    call = facts._library(
+        jvm.InvokeVirtual(0, replace), ("s", "regex", "by"), "r", facts.RULES
+    )
+    assert call == [("move", ("r", "s")), ("move", ("r", "by"))]
+
+    append = M("java/lang/StringBuilder.append:(A)A")
+    call = facts._library(jvm.InvokeVirtual(0, append), ("sb", "s"), "r", facts.RULES)
+    assert call == [("append", ("sb", "s")), ("move", ("r", "sb"))]
+
+
+def test_untracked_carrier():
+    # a builder returned by a call has no allocation site whose taint is tracked
+    opcodes = (
+        jvm.InvokeStatic(0, M("x/Y.make:()A")),
+        jvm.Store(1, jvm.Reference(), 1),
+        jvm.Load(2, jvm.Reference(), 1),
+        jvm.Load(3, jvm.Reference(), 0),
+        jvm.InvokeVirtual(4, M("java/lang/StringBuilder.append:(A)A")),
+        jvm.Pop(5, 1),
+        jvm.New(6, jvm.ClassName.decode("java/lang/Object")),
+        jvm.Load(7, jvm.Reference(), 1),
+        jvm.InvokeVirtual(8, M("java/lang/StringBuilder.toString:()A")),
+        jvm.InvokeInterface(9, M("java/sql/Statement.executeQuery:(A)A"), 2),
+        jvm.Pop(10, 1),
+        jvm.Return(11, None),
+    )
+    assert analyzer.analyze_method(M("jpamb/Test.run:(A)V"), opcodes)
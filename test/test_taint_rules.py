@@ -0,0 +1,86 @@
+"""
+Tests for jpamb.taint.rules module
+"""
+
+import pickle
+
+import pytest
+from hypothesis import given, strategies as st
+
+from jpamb import jvm
+from jpamb.taint.rules import RuleIndex
+from jpamb.taint.sources import SQL_SINKS, UNTRUSTED_SOURCES
+
+text = st.text("ab.", max_size=12)
+
+
+@given(
+    st.lists(
+        st.tuples(st.sampled_from(["x", "y", "z"]), text.filter(bool)), max_size=8
+    ),
+    text,
+)
+def test_match_is_substring(rules, name):
+    """A name matches the kinds of the patterns it contains"""
+    index = RuleIndex(rules)
+    expected = 0
+    for kind, pattern in rules:
+        if pattern in name:
+            expected |= index.kinds[kind]
+    assert index.match(name) == expected
+
+
+def test_default_rules():
+    index = RuleIndex.default()
+    for source in UNTRUSTED_SOURCES:
+        assert index.matches("source", source)
+    for sink in SQL_SINKS:
+        assert index.matches("sink", "full.package." + sink)
+    assert not index.matches("sink", "java.lang.String.trim")
+    assert not index.matches("unknown", "java.sql.Statement.execute")
+
+
+def test_classify_methods():
+    index = RuleIndex.default()
+    query = jvm.AbsMethodID.decode("java/sql/Statement.executeQuery:(A)A")
+    assert index.matches("sink", query)
+    assert index.classify(query) == index.kinds["sink"]
+    # new rules are seen by methods matched before
+    index.add("source", "java.sql.Statement.executeQuery")
+    assert index.matches("source", query)
+
+
+def test_load_rules(tmp_path):
+    rules = tmp_path / "extra.rules"
+    rules.write_text(
+        "# more sinks\n"
+        "sink org.hibernate.*   # every method of the package\n"
+        "\n"
+        "source my.app.Request.get\n"
+    )
+    index = RuleIndex.default()
+    index.load(rules)
+    assert index.matches("sink", "org.hibernate.Session.createQuery:(A)A")
+    assert index.matches("source", "my.app.Request.getParameter:(A)A")
+    assert index.matches("sink", "java.sql.Statement.execute")
+
+    rules.write_text("sink\n")
+    with pytest.raises(ValueError):
+        index.load(rules)
+
+
+def test_digest():
+    assert RuleIndex.default().digest() == RuleIndex.default().digest()
+    index = RuleIndex.default()
+    index.add("sink", "org.hibernate.")
+    assert index.digest() != RuleIndex.default().digest()
+
+
+def test_pickle():
+    """Pool workers get the rules of the parent, with the loaded ones"""
+    index = RuleIndex.default()
+    index.add("sink", "org.hibernate.")
+    index.match("java.sql.Statement.execute")
+    copy = pickle.loads(pickle.dumps(index))
+    assert copy.kinds == index.kinds and copy.digest() == index.digest()
+    assert copy.matches("sink", "org.hibernate.Session.createQuery:(A)A")
@@ -156,6 +156,27 @@ class TestPartialMatching:
         )
 
 
+class TestCustomRules:
+    """Test detectors with their own sources and sinks"""
+
+    def test_assigning_recompiles(self):
+        """New sources and sinks are matched, the old ones are not"""
+        detector = SourceSinkDetector({"my.app.Request.get"}, {"my.app.Db.run"})
+        assert detector.is_source("my.app.Request.getParam")
+        detector.sources = {"my.app.Cache.get"}
+        detector.sinks = detector.sinks | {"my.app.Db.query"}
+        assert not detector.is_source("my.app.Request.getParam")
+        assert detector.is_source("my.app.Cache.get")
+        assert detector.is_sink("my.app.Db.query") and detector.is_sink("my.app.Db.run")
+
+    def test_sets_are_read_only(self):
+        """The sets cannot change behind the compiled rules"""
+        detector = SourceSinkDetector.default()
+        with pytest.raises(AttributeError):
+            detector.sources.add("my.app.Request.get")
+        assert detector.sources == UNTRUSTED_SOURCES
+
+
 class TestConstants:
     """Test the constant sets"""
 